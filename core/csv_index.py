@@ -0,0 +1,286 @@
+import codecs
+import csv
+import io
+import mmap
+import os
+from array import array
+from itertools import accumulate
+
+# Marca no índice de ordem as linhas editadas, guardadas fora do arquivo mapeado
+EDITED_ROW = 1 << 31
+
+# Tamanho dos blocos lidos na validação da codificação
+ENCODING_CHUNK = 1024 * 1024
+
+def detect_encoding(data):
+    """Retorna a codificação do CSV: UTF-8 se o arquivo inteiro for UTF-8 válido, senão
+    cp1252 (padrão do Excel no Windows)"""
+    # A validação é feita em blocos, sem copiar o arquivo inteiro para a memória
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for start in range(0, len(data), ENCODING_CHUNK):
+            decoder.decode(data[start:start + ENCODING_CHUNK])
+        decoder.decode(b'', final=True)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+class CSVRowIndex:
+    """Sequência de nomes de um CSV mapeado em memória, decodificados sob demanda"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = None
+        self._mmap = None
+        # Início de cada registro no arquivo (mais o tamanho do arquivo como sentinela)
+        self._starts = array('Q', [0])
+        # Ordem atual das linhas; None enquanto for a ordem do arquivo
+        self._order = None
+        self._edited = []
+        # Registro do arquivo de onde veio cada linha editada (None nas linhas novas),
+        # para a gravação manter as outras colunas (como o novo nome do modo por chave)
+        self._edited_sources = []
+        self.encoding = 'utf-8'
+        # Terminador usado nas linhas gravadas; CSVs do Excel para Mac usam só CR
+        self.line_terminator = '\r\n'
+        self.open()
+
+    def open(self):
+        """Mapeia o arquivo e monta o índice de registros em uma única passada"""
+        self.close()
+        self._file = open(self.file_path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Arquivo vazio não pode ser mapeado
+            self._starts = array('Q', [0])
+            self._order = None
+            self._edited = []
+            self._edited_sources = []
+            return
+        self.encoding = detect_encoding(self._mmap)
+        self._starts = self.build_index(self._mmap)
+        self._order = None
+        self._edited = []
+        self._edited_sources = []
+
+    def build_index(self, data):
+        """Retorna os inícios dos registros não vazios do CSV"""
+        starts = array('Q')
+        # O BOM do UTF-8 não faz parte do primeiro nome
+        offset = 3 if data[:3] == b'\xef\xbb\xbf' else 0
+        data.seek(offset)
+        readline = data.readline
+        # Sem nenhum LF, as linhas terminam só com CR e readline não as separa
+        cr_only = data.find(b'\n', offset) == -1 and data.find(b'\r', offset) != -1
+        if cr_only:
+            self.line_terminator = '\r'
+            readline = self.cr_line_reader(data, offset)
+        elif data.find(b'\r', offset) == -1:
+            self.line_terminator = '\n'
+        has_quotes = data.find(b'"', offset) != -1
+        has_blank_lines = (
+            data[offset:offset + 1] in (b'\n', b'\r') or
+            any(data.find(blank, offset) != -1 for blank in (b'\n\n', b'\n\r\n', b'\r\r'))
+        )
+        if not has_quotes and not has_blank_lines and not cr_only:
+            # Caso comum: cada linha é um registro e os inícios saem da soma acumulada
+            # dos tamanhos das linhas, sem laço em Python
+            return array('Q', accumulate(map(len, iter(readline, b'')), initial=offset))
+        # Campos entre aspas podem conter quebras de linha: um registro só termina
+        # quando o número de aspas acumulado é par. Linhas vazias são puladas.
+        in_quotes = False
+        for line in iter(readline, b''):
+            if not in_quotes and line not in (b'\n', b'\r\n', b'\r'):
+                starts.append(offset)
+            if has_quotes and line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            offset += len(line)
+        starts.append(len(data))
+        return starts
+
+    def cr_line_reader(self, data, offset):
+        """Retorna uma função que, como readline, lê a próxima linha terminada em CR"""
+        position = offset
+
+        def readline():
+            nonlocal position
+            end = data.find(b'\r', position)
+            end = len(data) if end == -1 else end + 1
+            line = data[position:end]
+            position = end
+            return line
+        return readline
+
+    def close(self):
+        """Libera o mapeamento e o arquivo"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read_record(self, record):
+        """Retorna os bytes brutos de um registro do arquivo, sem a quebra de linha"""
+        return self._mmap[self._starts[record]:self._starts[record + 1]].rstrip(b'\r\n')
+
+    def decode_record(self, record):
+        """Decodifica a primeira coluna de um registro do arquivo"""
+        raw = self.read_record(record)
+        # A codificação foi validada na abertura; 'replace' só cobre os bytes sem
+        # caractere no cp1252, para a leitura nunca falhar dentro da tabela
+        text = raw.decode(self.encoding, errors='replace')
+        if '"' not in text and ',' not in text:
+            return text
+        try:
+            return next(csv.reader(io.StringIO(text)), [''])[0]
+        except csv.Error:
+            return text
+
+    def decode_row(self, record):
+        """Decodifica todas as colunas de um registro do arquivo"""
+        text = self.read_record(record).decode(self.encoding, errors='replace')
+        try:
+            return next(csv.reader(io.StringIO(text)), [''])
+        except csv.Error:
+            return [text]
+
+    def resolve(self, key):
+        """Converte uma entrada do índice de ordem no nome correspondente"""
+        if key & EDITED_ROW:
+            return self._edited[key ^ EDITED_ROW]
+        return self.decode_record(key)
+
+    def ensure_order(self):
+        """Materializa o índice de ordem antes da primeira alteração"""
+        if self._order is None:
+            self._order = array('I', range(len(self._starts) - 1))
+        return self._order
+
+    def __len__(self):
+        if self._order is None:
+            return len(self._starts) - 1
+        return len(self._order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice de linha fora do intervalo")
+        if self._order is None:
+            return self.decode_record(index)
+        return self.resolve(self._order[index])
+
+    def __iter__(self):
+        if self._order is None:
+            for record in range(len(self._starts) - 1):
+                yield self.decode_record(record)
+        else:
+            for key in self._order:
+                yield self.resolve(key)
+
+    def __setitem__(self, index, name):
+        order = self.ensure_order()
+        key = order[index]
+        self._edited.append(name)
+        self._edited_sources.append(self._edited_sources[key ^ EDITED_ROW] if key & EDITED_ROW else key)
+        order[index] = EDITED_ROW | (len(self._edited) - 1)
+
+    def pop(self, index=-1):
+        """Remove e retorna uma linha"""
+        name = self[index]
+        self.ensure_order().pop(index)
+        return name
+
+    def insert(self, index, name):
+        """Insere uma linha nova na posição informada"""
+        self._edited.append(name)
+        self._edited_sources.append(None)
+        self.ensure_order().insert(index, EDITED_ROW | (len(self._edited) - 1))
+
+    def snapshot(self):
+        """Percorre os nomes na ordem atual, sem ser afetado por alterações posteriores da ordem"""
+        keys = array('I', self._order) if self._order is not None else range(len(self._starts) - 1)
+        for key in keys:
+            yield self.resolve(key)
+
+    def move(self, current_index, new_index):
+        """Move uma linha sem decodificá-la, alterando só o índice de ordem"""
+        order = self.ensure_order()
+        order.insert(new_index, order.pop(current_index))
+
+    def swap(self, first_index, second_index):
+        """Troca duas linhas de posição"""
+        order = self.ensure_order()
+        order[first_index], order[second_index] = order[second_index], order[first_index]
+
+    def iter_runs(self):
+        """Agrupa a ordem atual em trechos contíguos do arquivo e linhas editadas (estas
+        como a posição em _edited)"""
+        if self._order is None:
+            if len(self._starts) > 1:
+                yield 0, len(self._starts) - 1, None
+            return
+        run_start = run_end = None
+        for key in self._order:
+            if key & EDITED_ROW:
+                if run_start is not None:
+                    yield run_start, run_end, None
+                    run_start = None
+                yield None, None, key ^ EDITED_ROW
+            elif run_start is not None and key == run_end:
+                run_end += 1
+            else:
+                if run_start is not None:
+                    yield run_start, run_end, None
+                run_start, run_end = key, key + 1
+        if run_start is not None:
+            yield run_start, run_end, None
+
+    def save(self, file_path):
+        """Grava as linhas em file_path e retorna o índice de registros do arquivo gravado"""
+        starts = array('Q')
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator=self.line_terminator)
+        with open(file_path, 'wb') as f:
+            offset = 0
+            for run_start, run_end, edited in self.iter_runs():
+                if edited is not None:
+                    name = self._edited[edited]
+                    source = self._edited_sources[edited]
+                    # Só a primeira coluna foi editada; as demais saem como estavam
+                    row = [name] if source is None else [name] + self.decode_row(source)[1:]
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerow(row)
+                    try:
+                        chunk = buffer.getvalue().encode(self.encoding)
+                    except UnicodeEncodeError:
+                        raise Exception(f"o nome '{name}' não pode ser gravado na codificação {self.encoding} do arquivo")
+                    starts.append(offset)
+                else:
+                    # Registros seguidos no arquivo são copiados de uma vez, como estão,
+                    # e seus inícios são apenas deslocados para a nova posição
+                    source_offset = self._starts[run_start]
+                    chunk = self._mmap[source_offset:self._starts[run_end]]
+                    if not chunk.endswith((b'\n', b'\r')):
+                        chunk += self.line_terminator.encode('ascii')
+                    starts.extend(map((offset - source_offset).__add__, self._starts[run_start:run_end]))
+                f.write(chunk)
+                offset += len(chunk)
+            starts.append(offset)
+        return starts
+
+    def replace_file(self, temp_path, starts):
+        """Troca o arquivo mapeado pelo recém-gravado, reaproveitando o índice já calculado"""
+        self.close()
+        os.replace(temp_path, self.file_path)
+        self._file = open(self.file_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if starts[-1] else None
+        self._starts = starts
+        self._order = None
+        self._edited = []
+        self._edited_sources = []
@@ -1,14 +1,32 @@
 import csv
 import os
+from bisect import bisect_left, bisect_right, insort
+
+from core.csv_index import CSVRowIndex
+from core.trigram_index import TrigramIndex
+
+# Cabeçalhos reconhecidos na primeira linha do modo por chave
+KEY_HEADERS = ("old_name", "key", "nome_antigo", "chave", "nombre_antiguo", "clave")
+NEW_NAME_HEADERS = ("new_name", "novo_nome", "nuevo_nombre")
 
 class CSVManager:
     def __init__(self):
         self.csv_file_path = ""
         self.csv_data = []
+        # Alterações ainda não gravadas no arquivo (gravação adiada e agrupada)
+        self.dirty = False
+        # Busca aproximada pelos nomes. As chaves são as posições das linhas na montagem
+        # do índice; as linhas removidas depois dela ficam em _removed_keys (ordenada).
+        # O índice só é montado com a busca aproximada ligada
+        self.name_index = TrigramIndex()
+        self._removed_keys = []
+        self.fuzzy_search_enabled = False
 
     def open_csv(self, file_path):
         """'Abre um arquivo CSV e carrega seus dados"""
         if file_path:
+            # Alterações pendentes pertencem ao arquivo anterior
+            self.save_if_dirty()
             self.csv_file_path = file_path
             self.load_csv_data()
             return True
@@ -16,14 +34,109 @@ class CSVManager:
 
     def load_csv_data(self):
         """Carrega dados do arquivo CSV"""
+        # O arquivo é mapeado em memória e só o índice de registros é montado; os nomes
+        # são decodificados quando a tabela ou a renomeação pedem cada linha
+        self.close_csv()
+        try:
+            self.csv_data = CSVRowIndex(self.csv_file_path)
+            self.rebuild_name_index()
+            return self.csv_data
+        except Exception as e:
+            self.csv_data = []
+            raise Exception(f"Erro ao ler arquivo CSV: {str(e)}")
+
+    def close_csv(self):
+        """Libera o mapeamento do arquivo CSV carregado"""
+        if isinstance(self.csv_data, CSVRowIndex):
+            self.csv_data.close()
         self.csv_data = []
+        self.dirty = False
+        self.rebuild_name_index()
+
+    def rebuild_name_index(self):
+        """Monta em segundo plano o índice de busca aproximada com a ordem atual das linhas"""
+        self._removed_keys = []
+        if not self.fuzzy_search_enabled:
+            self.name_index.clear()
+            return
+        if isinstance(self.csv_data, CSVRowIndex):
+            names = self.csv_data.snapshot()
+        else:
+            names = list(self.csv_data)
+        self.name_index.rebuild(enumerate(names))
+
+    def set_fuzzy_search(self, enabled):
+        """Liga (montando o índice) ou desliga (descartando-o) a busca aproximada"""
+        if enabled == self.fuzzy_search_enabled:
+            return
+        self.fuzzy_search_enabled = enabled
+        self.rebuild_name_index()
+
+    def row_key(self, row_index):
+        """Converte a posição atual de uma linha na sua chave no índice de busca"""
+        # A chave é a menor k cuja posição atual (k menos as removidas até k) é row_index
+        key = row_index
+        while True:
+            removed = bisect_right(self._removed_keys, key)
+            if key - removed == row_index:
+                return key
+            key = row_index + removed
+
+    def key_position(self, key):
+        """Converte a chave do índice de busca na posição atual da linha"""
+        return key - bisect_left(self._removed_keys, key)
+
+    def reindex_rows(self, first_index, last_index):
+        """Atualiza no índice de busca os nomes de um intervalo de linhas"""
+        if not self.name_index.is_enabled():
+            return
+        for row_index in range(first_index, last_index + 1):
+            self.name_index.add(self.row_key(row_index), self.csv_data[row_index])
+
+    def fuzzy_search(self, query):
+        """Retorna as posições das linhas parecidas com a busca, da mais parecida para a menos"""
+        keys = self.name_index.search(query)
+        if keys is None:
+            return None
+        return [self.key_position(key) for key in keys]
+
+    def file_encoding(self):
+        """Codificação do CSV aberto, detectada na carga (UTF-8 com BOM opcional ou cp1252)"""
+        if isinstance(self.csv_data, CSVRowIndex) and self.csv_data.encoding != 'utf-8':
+            return self.csv_data.encoding
+        return 'utf-8-sig'
+
+    def load_mapping(self, key_column=0, value_column=1):
+        """Monta o índice chave -> (linha, novo nome) do CSV em uma única passada e retorna
+        também as chaves repetidas e as linhas sem a coluna da chave ou do novo nome"""
+        if not self.csv_file_path:
+            raise Exception("Nenhum arquivo CSV selecionado")
+        
+        mapping = {}
+        duplicates = []
+        incomplete_rows = []
         try:
-            with open(self.csv_file_path, 'r', encoding='utf-8') as file:
+            with open(self.csv_file_path, 'r', newline='', encoding=self.file_encoding(), errors='replace') as file:
                 csv_reader = csv.reader(file)
                 for row in csv_reader:
-                    if row and len(row) > 0:
-                        self.csv_data.append(row[0])
-            return self.csv_data
+                    if len(row) <= max(key_column, value_column):
+                        # Linhas vazias são ignoradas; as que não têm a coluna pedida são avisadas
+                        if any(cell.strip() for cell in row):
+                            incomplete_rows.append(csv_reader.line_num)
+                        continue
+                    key = row[key_column].strip()
+                    new_name = row[value_column].strip()
+                    # Cabeçalho opcional (old_name,new_name ou key,new_name)
+                    if csv_reader.line_num == 1 and (key.lower() in KEY_HEADERS or new_name.lower() in NEW_NAME_HEADERS):
+                        continue
+                    if not key:
+                        continue
+                    normalized_key = os.path.normcase(key)
+                    if normalized_key in mapping:
+                        duplicates.append((csv_reader.line_num, key))
+                        continue
+                    mapping[normalized_key] = (csv_reader.line_num, new_name)
+            return mapping, duplicates, incomplete_rows
         except Exception as e:
             raise Exception(f"Erro ao ler arquivo CSV: {str(e)}")
 
@@ -33,18 +146,49 @@ class CSVManager:
             raise Exception("Nenhum arquivo CSV selecionado")
         
         try:
-            with open(self.csv_file_path, 'w', newline='', encoding='utf-8') as file:
-                csv_writer = csv.writer(file)
-                for name in self.csv_data:
-                    csv_writer.writerow([name])
+            if isinstance(self.csv_data, CSVRowIndex):
+                # O arquivo mapeado não pode ser truncado enquanto está aberto: a cópia é
+                # gravada ao lado e substitui o original, já com o novo índice de registros
+                temp_path = self.csv_file_path + ".tmp"
+                try:
+                    starts = self.csv_data.save(temp_path)
+                except Exception:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    raise
+                self.csv_data.replace_file(temp_path, starts)
+                # Um índice ainda em montagem lia o arquivo anterior
+                if self.name_index.is_enabled() and not self.name_index.is_ready():
+                    self.rebuild_name_index()
+            else:
+                # Grava em um arquivo temporário e troca de uma vez: uma queda no meio
+                # da gravação nunca deixa o CSV pela metade
+                temp_path = self.csv_file_path + ".tmp"
+                with open(temp_path, 'w', newline='', encoding='utf-8') as file:
+                    csv_writer = csv.writer(file)
+                    for name in self.csv_data:
+                        csv_writer.writerow([name])
+                os.replace(temp_path, self.csv_file_path)
+            self.dirty = False
             return True
         except Exception as e:
             raise Exception(f"Erro ao atualizar arquivo CSV: {str(e)}")
 
+    def save_if_dirty(self):
+        """Grava o CSV só se houver alterações pendentes"""
+        if self.dirty and self.csv_file_path:
+            return self.update_csv_file()
+        return False
+
     def remove_row(self, row_index):
         """Remove uma linha do CSV"""
         if 0 <= row_index < len(self.csv_data):
+            if self.name_index.is_enabled():
+                key = self.row_key(row_index)
+                self.name_index.remove(key)
+                insort(self._removed_keys, key)
             self.csv_data.pop(row_index)
+            self.dirty = True
             return True
         return False
 
@@ -52,13 +196,38 @@ class CSVManager:
         """Move uma linha do CSV para uma nova posição"""
         if (0 <= current_index < len(self.csv_data) and 
             0 <= new_index < len(self.csv_data)):
-            item = self.csv_data.pop(current_index)
-            self.csv_data.insert(new_index, item)
+            if isinstance(self.csv_data, CSVRowIndex):
+                self.csv_data.move(current_index, new_index)
+            else:
+                item = self.csv_data.pop(current_index)
+                self.csv_data.insert(new_index, item)
+            self.reindex_rows(min(current_index, new_index), max(current_index, new_index))
+            self.dirty = True
             return True
         return False
 
-    def filter_data(self, search_text):
-        """Filtra os dados do CSV baseado no texto de busca"""
-        if not search_text:
-            return self.csv_data
-        return [name for name in self.csv_data if search_text.lower() in name.lower()] 
\ No newline at end of file
+    def swap_rows(self, first_index, second_index):
+        """Troca duas linhas do CSV de posição"""
+        if (0 <= first_index < len(self.csv_data) and
+            0 <= second_index < len(self.csv_data)):
+            if isinstance(self.csv_data, CSVRowIndex):
+                self.csv_data.swap(first_index, second_index)
+            else:
+                self.csv_data[first_index], self.csv_data[second_index] = (
+                    self.csv_data[second_index], self.csv_data[first_index]
+                )
+            self.reindex_rows(first_index, first_index)
+            self.reindex_rows(second_index, second_index)
+            self.dirty = True
+            return True
+        return False
+
+    def set_row(self, row_index, name):
+        """Altera o nome de uma linha do CSV"""
+        if 0 <= row_index < len(self.csv_data) and self.csv_data[row_index] != name:
+            self.csv_data[row_index] = name
+            if self.name_index.is_enabled():
+                self.name_index.add(self.row_key(row_index), name)
+            self.dirty = True
+            return True
+        return False
@@ -0,0 +1,97 @@
+import struct
+from PyQt5.QtGui import QImage, QTransform
+
+# Marcadores JPEG que encerram os cabeçalhos (início da imagem comprimida e fim)
+JPEG_SOS = 0xDA
+JPEG_EOI = 0xD9
+JPEG_APP1 = 0xE1
+
+# Tags EXIF usadas
+TAG_ORIENTATION = 0x0112
+TAG_THUMBNAIL_OFFSET = 0x0201
+TAG_THUMBNAIL_LENGTH = 0x0202
+
+def read_exif_segment(file_path):
+    """Retorna o bloco TIFF do segmento EXIF de um JPEG ou None, lendo só os cabeçalhos"""
+    with open(file_path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8':
+            return None
+        while True:
+            header = f.read(4)
+            if len(header) < 4 or header[0] != 0xFF:
+                return None
+            marker = header[1]
+            if marker in (JPEG_SOS, JPEG_EOI):
+                return None
+            length = struct.unpack('>H', header[2:])[0]
+            if marker == JPEG_APP1:
+                segment = f.read(length - 2)
+                if segment[:6] == b'Exif\x00\x00':
+                    return segment[6:]
+            else:
+                f.seek(length - 2, 1)
+
+def read_ifd(tiff, offset, endian):
+    """Lê as entradas de um IFD; retorna {tag: (tipo, quantidade, valor bruto)} e o próximo IFD"""
+    count = struct.unpack(endian + 'H', tiff[offset:offset + 2])[0]
+    entries = {}
+    for index in range(count):
+        start = offset + 2 + index * 12
+        tag, value_type, value_count = struct.unpack(endian + 'HHI', tiff[start:start + 8])
+        entries[tag] = (value_type, value_count, tiff[start + 8:start + 12])
+    end = offset + 2 + count * 12
+    next_offset = struct.unpack(endian + 'I', tiff[end:end + 4])[0]
+    return entries, next_offset
+
+def entry_value(entry, endian):
+    """Converte o valor de uma entrada SHORT ou LONG"""
+    value_type, value_count, raw = entry
+    if value_type == 3:
+        return struct.unpack(endian + 'H', raw[:2])[0]
+    return struct.unpack(endian + 'I', raw)[0]
+
+def read_exif_thumbnail(file_path):
+    """Retorna (miniatura JPEG embutida, orientação EXIF); (None, 1) se não houver"""
+    try:
+        tiff = read_exif_segment(file_path)
+        if not tiff or tiff[:2] not in (b'II', b'MM'):
+            return None, 1
+        endian = '<' if tiff[:2] == b'II' else '>'
+        ifd0, ifd1_offset = read_ifd(tiff, struct.unpack(endian + 'I', tiff[4:8])[0], endian)
+        orientation = entry_value(ifd0[TAG_ORIENTATION], endian) if TAG_ORIENTATION in ifd0 else 1
+        if not ifd1_offset:
+            return None, orientation
+        # O IFD1 descreve a miniatura
+        ifd1, _ = read_ifd(tiff, ifd1_offset, endian)
+        if TAG_THUMBNAIL_OFFSET not in ifd1 or TAG_THUMBNAIL_LENGTH not in ifd1:
+            return None, orientation
+        start = entry_value(ifd1[TAG_THUMBNAIL_OFFSET], endian)
+        length = entry_value(ifd1[TAG_THUMBNAIL_LENGTH], endian)
+        thumbnail = tiff[start:start + length]
+        if len(thumbnail) != length or thumbnail[:2] != b'\xff\xd8':
+            return None, orientation
+        return thumbnail, orientation
+    except (OSError, struct.error, ValueError):
+        # EXIF corrompido: a visualização decodifica a imagem principal
+        return None, 1
+
+def apply_orientation(image, orientation):
+    """Aplica a orientação EXIF a uma imagem (a miniatura é gravada sem rotação)"""
+    if orientation in (2, 5, 7):
+        image = image.mirrored(True, False)
+    elif orientation == 4:
+        image = image.mirrored(False, True)
+    angle = {3: 180, 5: 270, 6: 90, 7: 90, 8: 270}.get(orientation)
+    if angle:
+        image = image.transformed(QTransform().rotate(angle))
+    return image
+
+def load_exif_thumbnail(file_path):
+    """Retorna a miniatura EXIF decodificada e já orientada, ou None"""
+    data, orientation = read_exif_thumbnail(file_path)
+    if data is None:
+        return None
+    image = QImage.fromData(data, 'JPEG')
+    if image.isNull():
+        return None
+    return apply_orientation(image, orientation)
@@ -1,11 +1,83 @@
 import os
 import subprocess
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import QMessageBox
 
+from core.trigram_index import TrigramIndex
+
+# Dados de cada arquivo capturados na mesma passada da listagem (mtime em nanossegundos)
+FileInfo = namedtuple("FileInfo", ["size", "mtime", "inode"])
+
 class FileManager:
     def __init__(self):
         self.folder_path = ""
-        self.folder_files = []
+        # Lista ordenada de arquivos; posições removidas ficam como None até a compactação
+        self._files = []
+        # Índice nome -> posição em _files para buscas, renomeações e remoções em O(1)
+        self._file_index = {}
+        self._removed_count = 0
+        # Protege as estruturas em memória quando várias threads renomeiam ao mesmo tempo
+        self._lock = threading.Lock()
+        # Tamanho, data de modificação e inode de cada arquivo carregado
+        self.file_info = {}
+        self.extensions = frozenset()
+        # Modo recursivo: subpastas entram como caminhos relativos à pasta aberta
+        self.recursive = False
+        self.max_depth = None
+        self.max_workers = 8
+        self.folder_directories = []
+        # Todos os nomes vistos na listagem (inclusive os filtrados), normalizados com
+        # normcase, para validar colisões sem consultar o disco
+        self.existing_names = set()
+        # Busca aproximada pelos nomes carregados, mantida a cada renomeação; só é
+        # montada com a busca aproximada ligada
+        self.name_index = TrigramIndex()
+        self.fuzzy_search_enabled = False
+        # Funções chamadas com o caminho de cada arquivo renomeado ou deletado e, nas
+        # renomeações, o caminho novo e o FileInfo lido logo após a renomeação
+        self.change_listeners = []
+
+    def add_change_listener(self, listener):
+        """Registra uma função chamada com o caminho dos arquivos alterados"""
+        self.change_listeners.append(listener)
+
+    def notify_change(self, file_path, new_path=None, info=None):
+        """Avisa os interessados que um caminho mudou (new_path é None em deleções)"""
+        for listener in self.change_listeners:
+            listener(file_path, new_path, info)
+
+    @property
+    def folder_files(self):
+        """Lista ordenada dos arquivos carregados"""
+        if self._removed_count:
+            self.compact_files()
+        return self._files
+
+    @folder_files.setter
+    def folder_files(self, files):
+        self._files = list(files)
+        self._file_index = {file_name: index for index, file_name in enumerate(self._files)}
+        self._removed_count = 0
+
+    def compact_files(self):
+        """Remove as posições vazias deixadas por arquivos deletados, mantendo a ordem"""
+        self.folder_files = [file_name for file_name in self._files if file_name is not None]
+
+    def has_file(self, file_name):
+        """Verifica se o arquivo está na lista carregada"""
+        return file_name in self._file_index
+
+    def index_of(self, file_name):
+        """Retorna a posição do arquivo na lista carregada ou -1"""
+        if self._removed_count:
+            self.compact_files()
+        return self._file_index.get(file_name, -1)
+
+    def get_file_info(self, file_name):
+        """Retorna os dados capturados na listagem (tamanho, mtime, inode) ou None"""
+        return self.file_info.get(file_name)
 
     def open_folder(self, folder_path):
         """Abre uma pasta e lista seus arquivos"""
@@ -23,37 +95,300 @@ class FileManager:
         extensions = [ext.strip() for ext in extensions_text.split(',')]
         return [ext if ext.startswith('.') else f'.{ext}' for ext in extensions]
 
+    def get_extensions_set(self, extensions_text):
+        """Converte texto de extensões em um conjunto normalizado (minúsculas, com ponto)"""
+        return frozenset(ext.lower() for ext in self.get_extensions_list(extensions_text) if ext != '.')
+
+    def match_extension(self, file_name, extensions, compound_extensions=()):
+        """Verifica se o arquivo tem uma das extensões do conjunto"""
+        if not extensions:
+            return True
+        dot = file_name.rfind('.')
+        if dot >= 0 and file_name[dot:].lower() in extensions:
+            return True
+        # Extensões compostas (ex.: .tar.gz) não cabem na busca pelo último ponto
+        return bool(compound_extensions) and file_name.lower().endswith(compound_extensions)
+
+    def iter_folder_entries(self, extensions, existing_names=None):
+        """Percorre as entradas da pasta que são arquivos com uma das extensões"""
+        compound_extensions = tuple(ext for ext in extensions if ext.count('.') > 1)
+        # scandir traz o tipo de cada entrada junto com a listagem, sem um stat extra
+        # por arquivo; no Windows o stat da entrada também já vem em cache
+        with os.scandir(self.folder_path) as entries:
+            for entry in entries:
+                if existing_names is not None:
+                    existing_names.add(os.path.normcase(entry.name))
+                try:
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                if self.match_extension(entry.name, extensions, compound_extensions):
+                    yield entry
+
+    def make_file_info(self, entry):
+        """Cria o registro de um arquivo a partir da entrada do scandir"""
+        stat = entry.stat()
+        return FileInfo(stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+    def stat_file_info(self, file_name):
+        """Cria o registro de um arquivo já carregado a partir de um stat"""
+        stat = os.stat(os.path.join(self.folder_path, file_name))
+        return FileInfo(stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+    def refresh_file_info(self, file_name):
+        """Relê o registro de um arquivo carregado e o retorna, ou None se o stat falhar"""
+        try:
+            info = self.stat_file_info(file_name)
+        except OSError:
+            return None
+        with self._lock:
+            self.file_info[file_name] = info
+        return info
+
+    def set_recursive(self, recursive, max_depth=None):
+        """Ativa ou desativa a leitura de subpastas (max_depth=None para sem limite)"""
+        self.recursive = recursive
+        self.max_depth = max_depth
+
+    def scan_directory(self, executor, relative_dir, depth, extensions, compound_extensions, with_info,
+                       recurse=True):
+        """Lê uma pasta da árvore e já agenda a leitura das subpastas no pool (recurse=False
+        lê só a pasta)"""
+        directory = os.path.join(self.folder_path, relative_dir) if relative_dir else self.folder_path
+        files = []
+        subdirs = []
+        names = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    names.append(os.path.normcase(os.path.join(relative_dir, entry.name)))
+                    try:
+                        # Links para pastas não são seguidos para evitar ciclos
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.max_depth is None or depth < self.max_depth:
+                                subdirs.append(entry.name)
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    if self.match_extension(entry.name, extensions, compound_extensions):
+                        info = self.make_file_info(entry) if with_info else None
+                        files.append((os.path.join(relative_dir, entry.name), info))
+        except OSError:
+            # Uma subpasta sem permissão não deve interromper a leitura do restante
+            if not relative_dir:
+                raise
+        
+        files.sort()
+        subdirs.sort()
+        subdirs = [os.path.join(relative_dir, name) for name in subdirs]
+        children = [
+            executor.submit(self.scan_directory, executor, subdir, depth + 1,
+                            extensions, compound_extensions, with_info)
+            for subdir in subdirs
+        ] if recurse else []
+        return files, subdirs, children, names
+
+    def iter_folder_tree(self, extensions, with_info=True, directories=None, existing_names=None, roots=("",)):
+        """Percorre a árvore de pastas em paralelo, entregando os arquivos em ordem determinística"""
+        compound_extensions = tuple(ext for ext in extensions if ext.count('.') > 1)
+        # A leitura de pastas em rede é limitada pela latência, então várias pastas são
+        # lidas ao mesmo tempo; o consumo em pré-ordem mantém a ordem independente do pool
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = [executor.submit(self.scan_directory, executor, root, self.directory_depth(root),
+                                       extensions, compound_extensions, with_info)
+                       for root in reversed(roots)]
+            while pending:
+                files, subdirs, children, names = pending.pop().result()
+                if directories is not None:
+                    directories.extend(subdirs)
+                if existing_names is not None:
+                    existing_names.update(names)
+                yield from files
+                pending.extend(reversed(children))
+
+    def directory_depth(self, relative_dir):
+        """Profundidade de uma subpasta na árvore (0 para a pasta aberta)"""
+        return relative_dir.count(os.sep) + 1 if relative_dir else 0
+
+    def iter_folder_files(self, extensions, with_info=True, directories=None, existing_names=None):
+        """Percorre os arquivos da pasta (ou da árvore, no modo recursivo) como (nome, FileInfo)"""
+        if self.recursive:
+            yield from self.iter_folder_tree(extensions, with_info, directories, existing_names)
+            return
+        for entry in self.iter_folder_entries(extensions, existing_names):
+            yield entry.name, self.make_file_info(entry) if with_info else None
+
     def load_folder_files(self, extensions_text=""):
         """Carrega arquivos da pasta com filtro de extensões"""
         if not self.folder_path:
             return []
         
-        extensions = self.get_extensions_list(extensions_text)
-        self.folder_files = []
+        extensions = self.get_extensions_set(extensions_text)
         
         try:
-            all_files = os.listdir(self.folder_path)
-            all_files.sort()
+            file_info = {}
+            folder_files = []
+            directories = []
+            existing_names = set()
+            for file_name, info in self.iter_folder_files(extensions, directories=directories,
+                                                          existing_names=existing_names):
+                file_info[file_name] = info
+                folder_files.append(file_name)
             
-            for file_name in all_files:
-                file_path = os.path.join(self.folder_path, file_name)
-                if os.path.isfile(file_path):
-                    if not extensions or any(file_name.lower().endswith(ext.lower()) for ext in extensions):
-                        self.folder_files.append(file_name)
+            # A árvore já chega em pré-ordem determinística; a pasta simples é ordenada por nome
+            if not self.recursive:
+                folder_files.sort()
             
+            self.extensions = extensions
+            self.file_info = file_info
+            self.folder_directories = directories
+            self.existing_names = existing_names
+            self.folder_files = folder_files
+            self.rebuild_name_index()
             return self.folder_files
         except Exception as e:
             raise Exception(f"Erro ao listar arquivos: {str(e)}")
 
-    def rename_file(self, old_name, new_name):
-        """Renomeia um arquivo"""
+    def rebuild_name_index(self):
+        """Monta o índice de busca aproximada em segundo plano, ou o descarta se ela estiver desligada"""
+        if not self.fuzzy_search_enabled:
+            self.name_index.clear()
+            return
+        # A montagem usa uma cópia da lista
+        self.name_index.rebuild([(file_name, file_name) for file_name in self.folder_files])
+
+    def set_fuzzy_search(self, enabled):
+        """Liga (montando o índice) ou desliga (descartando-o) a busca aproximada"""
+        if enabled == self.fuzzy_search_enabled:
+            return
+        self.fuzzy_search_enabled = enabled
+        self.rebuild_name_index()
+
+    def sync_folder_files(self):
+        """Aplica à lista carregada as diferenças em relação ao conteúdo atual da pasta"""
+        if not self.folder_path:
+            return [], []
+        
+        try:
+            # Só os arquivos novos precisam de stat; os já carregados mantêm seus registros
+            directories = []
+            existing_names = set()
+            current = [file_name for file_name, _ in
+                       self.iter_folder_files(self.extensions, with_info=False, directories=directories,
+                                              existing_names=existing_names)]
+            current_set = set(current)
+            
+            removed = [file_name for file_name in self._file_index if file_name not in current_set]
+            added = [file_name for file_name in current if file_name not in self._file_index]
+            if not self.recursive:
+                added.sort()
+            
+            self.remove_files(removed)
+            self.add_files((file_name, self.stat_file_info(file_name)) for file_name in added)
+            self.folder_directories = directories
+            self.existing_names = existing_names
+            return added, removed
+        except Exception as e:
+            raise Exception(f"Erro ao sincronizar arquivos: {str(e)}")
+
+    def sync_directories(self, relative_dirs):
+        """Aplica à lista as diferenças de algumas pastas da árvore (caminhos relativos, "" para
+        a pasta aberta), sem percorrer as demais"""
+        if not self.folder_path:
+            return [], []
+        
+        try:
+            compound_extensions = tuple(ext for ext in self.extensions if ext.count('.') > 1)
+            changed = set(relative_dirs)
+            known_directories = set(self.folder_directories)
+            current = []
+            names = set()
+            new_directories = []
+            lost_directories = []
+            # Só as pastas alteradas são listadas, cada uma sem descer às subpastas
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                scans = [executor.submit(self.scan_directory, executor, relative_dir, self.directory_depth(relative_dir),
+                                         self.extensions, compound_extensions, False, False)
+                         for relative_dir in sorted(changed)]
+                for relative_dir, scan in zip(sorted(changed), scans):
+                    files, subdirs, _, directory_names = scan.result()
+                    # Uma subpasta apagada é lida como vazia e sai da árvore com o que havia nela
+                    if relative_dir and not os.path.isdir(os.path.join(self.folder_path, relative_dir)):
+                        lost_directories.append(relative_dir)
+                        continue
+                    current.extend(file_name for file_name, _ in files)
+                    names.update(directory_names)
+                    new_directories.extend(subdir for subdir in subdirs if subdir not in known_directories)
+                    subdirs = set(subdirs)
+                    lost_directories.extend(directory for directory in known_directories
+                                            if os.path.dirname(directory) == relative_dir and directory not in subdirs)
+            
+            # Subpastas novas (criadas ou movidas para dentro da árvore) são lidas inteiras
+            directories = []
+            if new_directories:
+                current.extend(file_name for file_name, _ in
+                               self.iter_folder_tree(self.extensions, with_info=False, directories=directories,
+                                                     existing_names=names, roots=new_directories))
+            
+            # Arquivos carregados das pastas alteradas e das subárvores que sumiram ou surgiram
+            subtrees = tuple(directory + os.sep for directory in lost_directories + new_directories)
+            current_set = set(current)
+            removed = [file_name for file_name in self._file_index
+                       if (os.path.dirname(file_name) in changed or file_name.startswith(subtrees))
+                       and file_name not in current_set]
+            added = [file_name for file_name in current if file_name not in self._file_index]
+            
+            self.remove_files(removed)
+            self.add_files((file_name, self.stat_file_info(file_name)) for file_name in added)
+            self.folder_directories = [
+                directory for directory in self.folder_directories
+                if not (directory in lost_directories or directory.startswith(subtrees))
+            ] + new_directories + directories
+            # Os nomes normalizados das mesmas pastas são substituídos pelos da listagem
+            normalized_changed = {os.path.normcase(directory) for directory in changed}
+            normalized_subtrees = tuple(os.path.normcase(directory) for directory in subtrees)
+            self.existing_names = {
+                name for name in self.existing_names
+                if not (os.path.dirname(name) in normalized_changed or name.startswith(normalized_subtrees))
+            }
+            self.existing_names.update(names)
+            return added, removed
+        except Exception as e:
+            raise Exception(f"Erro ao sincronizar arquivos: {str(e)}")
+
+    def add_files(self, files):
+        """Acrescenta arquivos (nome, FileInfo) ao final da lista carregada"""
+        for file_name, info in files:
+            if file_name in self._file_index:
+                continue
+            self._file_index[file_name] = len(self._files)
+            self._files.append(file_name)
+            self.file_info[file_name] = info
+            self.name_index.add(file_name, file_name)
+
+    def remove_files(self, file_names):
+        """Retira arquivos da lista carregada sem tocar no disco"""
+        for file_name in file_names:
+            # Marca a posição como vazia; a lista é compactada na próxima leitura
+            index = self._file_index.pop(file_name, None)
+            if index is not None:
+                self._files[index] = None
+                self._removed_count += 1
+            self.file_info.pop(file_name, None)
+            self.name_index.remove(file_name)
+
+    def rename_file(self, old_name, new_name, check_source=True):
+        """Renomeia um arquivo (check_source=False quando a origem acabou de ser verificada)"""
         if not self.folder_path:
             raise Exception("Nenhuma pasta selecionada")
         
         old_path = os.path.join(self.folder_path, old_name)
         new_path = os.path.join(self.folder_path, new_name)
         
-        if not os.path.exists(old_path):
+        if check_source and not os.path.exists(old_path):
             raise Exception(f"Arquivo não encontrado: {old_name}")
         
         if os.path.exists(new_path):
@@ -61,9 +396,20 @@ class FileManager:
         
         try:
             os.rename(old_path, new_path)
-            # Atualiza o nome na lista de arquivos
-            index = self.folder_files.index(old_name)
-            self.folder_files[index] = new_name
+            with self._lock:
+                # Atualiza o nome na lista de arquivos mantendo a posição
+                index = self._file_index.pop(old_name, None)
+                if index is not None:
+                    self._files[index] = new_name
+                    self._file_index[new_name] = index
+                self.file_info.pop(old_name, None)
+                self.existing_names.discard(os.path.normcase(old_name))
+                self.existing_names.add(os.path.normcase(new_name))
+            # A impressão digital é lida agora: o arquivo pode ter mudado desde a listagem
+            if index is not None:
+                self.refresh_file_info(new_name)
+            self.name_index.rename(old_name, new_name, new_name)
+            self.notify_change(old_path, new_path, self.file_info.get(new_name))
             return True
         except Exception as e:
             raise Exception(f"Erro ao renomear arquivo: {str(e)}")
@@ -80,7 +426,9 @@ class FileManager:
         
         try:
             os.remove(file_path)
-            self.folder_files.remove(file_name)
+            self.remove_files([file_name])
+            self.notify_change(file_path)
+            self.existing_names.discard(os.path.normcase(file_name))
             return True
         except Exception as e:
             raise Exception(f"Erro ao deletar arquivo: {str(e)}")
@@ -0,0 +1,109 @@
+import os
+import time
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+class FolderWatcher(QObject):
+    # Sinais
+    files_changed = pyqtSignal(list, list)  # Emite arquivos adicionados e removidos
+
+    def __init__(self, file_manager, debounce_ms=300, max_delay_ms=2000):
+        super().__init__()
+        self.file_manager = file_manager
+        self.max_delay = max_delay_ms / 1000
+        self._paused = False
+        self._pending_since = None
+        # Pastas alteradas desde a última sincronização; no modo recursivo só elas são
+        # relidas. Um pedido sem caminho relê a árvore toda
+        self._changed_paths = set()
+        self._full_sync = False
+        
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.schedule_sync)
+        
+        # Rajadas de eventos são agrupadas em uma única sincronização
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.sync)
+
+    def watch(self, folder_path):
+        """Passa a observar a pasta informada e, no modo recursivo, suas subpastas"""
+        paths = set()
+        if folder_path:
+            paths.add(folder_path)
+            paths.update(os.path.join(folder_path, directory)
+                         for directory in self.file_manager.folder_directories)
+        
+        # Só as diferenças são aplicadas ao observador
+        current = set(self.watcher.directories())
+        removed = list(current - paths)
+        added = list(paths - current)
+        if removed:
+            self.watcher.removePaths(removed)
+        if added:
+            self.watcher.addPaths(added)
+
+    def pause(self):
+        """Suspende a sincronização, por exemplo durante um lote de renomeação"""
+        self._paused = True
+        self.timer.stop()
+        self._pending_since = None
+
+    def resume(self):
+        """Retoma a sincronização e aplica as mudanças ocorridas durante a pausa"""
+        self._paused = False
+        # As pastas alteradas durante a pausa continuaram sendo anotadas
+        if self._changed_paths or self._full_sync:
+            self.start_timer()
+
+    def schedule_sync(self, path=None):
+        """Anota a pasta alterada e agenda uma sincronização"""
+        if path is None:
+            self._full_sync = True
+        else:
+            self._changed_paths.add(path)
+        if self._paused:
+            return
+        self.start_timer()
+
+    def start_timer(self):
+        """Agenda a sincronização, reiniciando a espera enquanto chegam novos eventos"""
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        # Sem um limite, uma pasta que nunca para de mudar nunca seria sincronizada
+        if now - self._pending_since < self.max_delay or not self.timer.isActive():
+            self.timer.start()
+
+    def sync(self):
+        """Aplica as diferenças da pasta à lista de arquivos"""
+        self._pending_since = None
+        if self._paused:
+            return
+        changed_paths = self._changed_paths
+        full_sync = self._full_sync
+        self._changed_paths = set()
+        self._full_sync = False
+        try:
+            folder_path = self.file_manager.folder_path
+            if self.file_manager.recursive and not full_sync:
+                # Só as pastas que mudaram são relidas; eventos de uma pasta aberta antes
+                # (fora da atual) são ignorados
+                relative_dirs = set()
+                for path in changed_paths:
+                    relative_dir = os.path.relpath(path, folder_path)
+                    if relative_dir == os.curdir:
+                        relative_dirs.add("")
+                    elif relative_dir != os.pardir and not relative_dir.startswith(os.pardir + os.sep):
+                        relative_dirs.add(relative_dir)
+                added, removed = self.file_manager.sync_directories(relative_dirs)
+            else:
+                added, removed = self.file_manager.sync_folder_files()
+        except Exception as e:
+            print(f"Erro ao sincronizar pasta: {str(e)}")
+            return
+        if self.file_manager.recursive:
+            # Subpastas criadas ou removidas também passam a ser observadas
+            self.watch(self.file_manager.folder_path)
+        if added or removed:
+            self.files_changed.emit(added, removed)
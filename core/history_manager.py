@@ -1,31 +1,178 @@
 import json
 import os
+import struct
 from datetime import datetime
 
+# Cabeçalho do índice: tamanho do diário já refletido no índice; depois vêm os
+# deslocamentos (8 bytes cada) das entradas ainda ativas, na ordem do histórico
+INDEX_RECORD = struct.Struct('<Q')
+
 class HistoryManager:
     def __init__(self, history_file):
+        # O arquivo JSON antigo só é lido para migração; o histórico passa a ser um
+        # diário JSON Lines em que as operações são apenas acrescentadas ao final
         self.history_file = history_file
-        self.rename_history = []
+        self.journal_file = os.path.splitext(history_file)[0] + ".jsonl"
+        self.index_file = self.journal_file + ".idx"
+        self._last_operation = None
         self.load_rename_history()
 
     def load_rename_history(self):
-        """Carrega o histórico de renomeações do arquivo"""
+        """Abre o diário de renomeações e garante que o índice está em dia"""
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.rename_history = json.load(f)
+            if not os.path.exists(self.journal_file):
+                try:
+                    self.import_legacy_history()
+                except Exception as e:
+                    # O JSON antigo corrompido fica como está; o diário novo e o cabeçalho
+                    # do índice são criados mesmo assim, senão a primeira operação
+                    # gravada ocuparia o lugar do cabeçalho e sumiria do índice
+                    print(f"Erro ao importar histórico antigo: {str(e)}")
+                    self.write_journal([])
+            self.recover_index()
         except Exception as e:
             print(f"Erro ao carregar histórico: {str(e)}")
-            self.rename_history = []
+        self._last_operation = None
+
+    def import_legacy_history(self):
+        """Converte o rename_history.json antigo para o diário (executado uma única vez)"""
+        entries = []
+        if os.path.exists(self.history_file):
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        self.write_journal(entries)
+
+    def write_journal(self, entries):
+        """Grava um diário novo com as entradas informadas, substituindo o atual"""
+        offsets = []
+        temp_journal = self.journal_file + ".tmp"
+        temp_index = self.index_file + ".tmp"
+        with open(temp_journal, 'wb') as f:
+            for entry in entries:
+                offsets.append(f.tell())
+                f.write(self.encode_record(entry))
+            journal_length = f.tell()
+        with open(temp_index, 'wb') as f:
+            f.write(INDEX_RECORD.pack(journal_length))
+            for offset in offsets:
+                f.write(INDEX_RECORD.pack(offset))
+        os.replace(temp_journal, self.journal_file)
+        os.replace(temp_index, self.index_file)
+
+    def encode_record(self, record):
+        """Serializa um registro do diário em uma linha"""
+        return json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+
+    def decode_entry(self, line):
+        """Lê uma operação do diário sem as marcas internas de substituição"""
+        entry = json.loads(line)
+        entry.pop("replaces", None)
+        return entry
+
+    def recover_index(self):
+        """Reaplica ao índice os registros do diário que ainda não estão nele"""
+        journal_length = os.path.getsize(self.journal_file)
+        index_valid = (
+            os.path.exists(self.index_file) and
+            os.path.getsize(self.index_file) >= INDEX_RECORD.size and
+            os.path.getsize(self.index_file) % INDEX_RECORD.size == 0
+        )
+        indexed_length = self.read_indexed_length() if index_valid else None
+        if indexed_length == journal_length:
+            return
+
+        # Após uma queda só o trecho final é relido; sem um índice confiável, o diário todo
+        if indexed_length is None or indexed_length > journal_length:
+            with open(self.index_file, 'wb') as f:
+                f.write(INDEX_RECORD.pack(0))
+            indexed_length = 0
+
+        with open(self.journal_file, 'r+b') as journal:
+            journal.seek(indexed_length)
+            offset = indexed_length
+            for line in journal:
+                if not line.endswith(b'\n'):
+                    # Linha incompleta de uma gravação interrompida é descartada
+                    journal.truncate(offset)
+                    break
+                self.apply_record(offset, json.loads(line))
+                offset += len(line)
+        self.write_indexed_length(offset)
+
+    def apply_record(self, offset, record):
+        """Aplica um registro do diário ao índice, ignorando o que já foi aplicado"""
+        # A gravação pode ter parado entre o índice e o cabeçalho, então cada registro
+        # confere a última entrada do índice antes de alterá-lo
+        last_offset = self.read_last_offset()
+        if record.get("undo"):
+            if last_offset == record.get("offset"):
+                self.truncate_index(1)
+            return
+        if "replaces" in record and last_offset == record["replaces"]:
+            # Entrada que substitui a última operação (desfazer parcial)
+            self.truncate_index(1)
+            last_offset = self.read_last_offset()
+        if last_offset is None or offset > last_offset:
+            with open(self.index_file, 'ab') as f:
+                f.write(INDEX_RECORD.pack(offset))
+
+    def read_last_offset(self):
+        """Retorna o deslocamento da última operação ativa ou None"""
+        if self.get_operation_count() <= 0:
+            return None
+        with open(self.index_file, 'rb') as f:
+            f.seek(-INDEX_RECORD.size, os.SEEK_END)
+            return INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))[0]
+
+    def read_indexed_length(self):
+        """Lê do cabeçalho do índice o tamanho do diário já indexado"""
+        with open(self.index_file, 'rb') as f:
+            return INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))[0]
+
+    def write_indexed_length(self, journal_length):
+        """Atualiza o cabeçalho do índice"""
+        with open(self.index_file, 'r+b') as f:
+            f.write(INDEX_RECORD.pack(journal_length))
+
+    def truncate_index(self, count):
+        """Remove as últimas entradas do índice"""
+        count = min(count, self.get_operation_count())
+        if count:
+            index_size = os.path.getsize(self.index_file)
+            with open(self.index_file, 'r+b') as f:
+                f.truncate(index_size - count * INDEX_RECORD.size)
+
+    def append_record(self, record):
+        """Acrescenta um registro ao final do diário e retorna seu deslocamento"""
+        with open(self.journal_file, 'ab') as f:
+            offset = f.tell()
+            f.write(self.encode_record(record))
+            return offset, f.tell()
+
+    def get_operation_count(self):
+        """Retorna o número de operações ativas no histórico"""
+        try:
+            return max(0, os.path.getsize(self.index_file) // INDEX_RECORD.size - 1)
+        except OSError:
+            return 0
 
-    def save_rename_history(self):
-        """Salva o histórico de renomeações no arquivo"""
+    def compact(self):
+        """Reescreve o diário sem as operações desfeitas ou limpas"""
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.rename_history, f, ensure_ascii=False, indent=2)
+            self.write_journal(self.get_operations())
         except Exception as e:
             print(f"Erro ao salvar histórico: {str(e)}")
 
+    def get_operations(self):
+        """Retorna todas as operações ativas, da mais antiga para a mais recente"""
+        entries = []
+        with open(self.index_file, 'rb') as index, open(self.journal_file, 'rb') as journal:
+            index.seek(INDEX_RECORD.size)
+            for (offset,) in INDEX_RECORD.iter_unpack(index.read()):
+                journal.seek(offset)
+                entries.append(self.decode_entry(journal.readline()))
+        return entries
+
     def add_operation(self, folder_path, operations):
         """Adiciona uma nova operação ao histórico"""
         operation = {
@@ -33,24 +180,71 @@ class HistoryManager:
             "folder_path": folder_path,
             "operations": operations
         }
-        self.rename_history.append(operation)
-        self.save_rename_history()
+        try:
+            offset, journal_length = self.append_record(operation)
+            with open(self.index_file, 'ab') as f:
+                f.write(INDEX_RECORD.pack(offset))
+            self.write_indexed_length(journal_length)
+            self._last_operation = operation
+        except Exception as e:
+            print(f"Erro ao salvar histórico: {str(e)}")
 
     def get_last_operation(self):
         """Retorna a última operação do histórico"""
-        if self.rename_history:
-            return self.rename_history[-1]
-        return None
+        if self._last_operation is not None:
+            return self._last_operation
+        try:
+            # Só a última entrada do índice e a linha correspondente são lidas
+            offset = self.read_last_offset()
+            if offset is None:
+                return None
+            with open(self.journal_file, 'rb') as journal:
+                journal.seek(offset)
+                self._last_operation = self.decode_entry(journal.readline())
+            return self._last_operation
+        except Exception as e:
+            print(f"Erro ao carregar histórico: {str(e)}")
+            return None
 
     def remove_last_operation(self):
         """Remove a última operação do histórico"""
-        if self.rename_history:
-            self.rename_history.pop()
-            self.save_rename_history()
+        offset = self.read_last_offset()
+        if offset is not None:
+            try:
+                _, journal_length = self.append_record({"undo": True, "offset": offset})
+                self.truncate_index(1)
+                self.write_indexed_length(journal_length)
+            except Exception as e:
+                print(f"Erro ao salvar histórico: {str(e)}")
+                return False
+            self._last_operation = None
             return True
         return False
 
+    def replace_last_operation(self, operations):
+        """Substitui as operações da última entrada, mantendo data e pasta"""
+        last_operation = self.get_last_operation()
+        offset = self.read_last_offset()
+        if last_operation is None or offset is None:
+            return False
+        operation = dict(last_operation, operations=operations)
+        try:
+            # Um único registro troca a entrada, então uma queda no meio não duplica o lote
+            record = dict(operation, replaces=offset)
+            new_offset, journal_length = self.append_record(record)
+            self.apply_record(new_offset, record)
+            self.write_indexed_length(journal_length)
+        except Exception as e:
+            print(f"Erro ao salvar histórico: {str(e)}")
+            self._last_operation = None
+            return False
+        self._last_operation = operation
+        return True
+
     def clear_history(self):
         """Limpa todo o histórico"""
-        self.rename_history = []
-        self.save_rename_history() 
\ No newline at end of file
+        try:
+            self.write_journal([])
+        except Exception as e:
+            print(f"Erro ao salvar histórico: {str(e)}")
+        self._last_operation = None
@@ -11,6 +11,7 @@ class LanguageManager(QObject):
                 "file_menu": "File",
                 "open_csv": "Open CSV",
                 "open_folder": "Open Folder",
+                "compact_history": "Compact History",
                 "exit": "Exit",
                 "language_menu": "Language",
                 "english": "English",
@@ -19,10 +20,20 @@ class LanguageManager(QObject):
                 "about_menu": "About",
                 "about": "About",
                 "reload_files": "Reload Files",
+                "include_subfolders": "Include subfolders",
+                "max_depth": "Max depth (0 = unlimited)",
+                "match_mode": "Match files",
+                "match_by_position": "By row position",
+                "match_by_name": "By old name (old_name,new_name)",
+                "match_by_key": "By key (name without extension)",
+                "key_column": "Key column",
+                "new_name_column": "New name column",
                 "rename_files": "Rename Files",
                 "undo_rename": "Undo Rename",
                 "extensions": "Extensions (comma separated)",
                 "search": "Search...",
+                "fuzzy_search": "Fuzzy search (ignores accents and typos)",
+                "thumbnail_view": "Show thumbnails",
                 "preview": "Preview",
                 "no_file_selected": "No file selected",
                 "preview_not_available": "Preview not available for this file type",
@@ -45,6 +56,7 @@ class LanguageManager(QObject):
                 "file_menu": "Arquivo",
                 "open_csv": "Abrir CSV",
                 "open_folder": "Abrir Pasta",
+                "compact_history": "Compactar Histórico",
                 "exit": "Sair",
                 "language_menu": "Idioma",
                 "english": "Inglês",
@@ -53,10 +65,20 @@ class LanguageManager(QObject):
                 "about_menu": "Sobre",
                 "about": "Sobre",
                 "reload_files": "Recarregar Arquivos",
+                "include_subfolders": "Incluir subpastas",
+                "max_depth": "Profundidade máxima (0 = sem limite)",
+                "match_mode": "Correspondência dos arquivos",
+                "match_by_position": "Pela posição da linha",
+                "match_by_name": "Pelo nome antigo (old_name,new_name)",
+                "match_by_key": "Pela chave (nome sem extensão)",
+                "key_column": "Coluna da chave",
+                "new_name_column": "Coluna do novo nome",
                 "rename_files": "Renomear Arquivos",
                 "undo_rename": "Desfazer Renomeação",
                 "extensions": "Extensões (separadas por vírgula)",
                 "search": "Buscar...",
+                "fuzzy_search": "Busca aproximada (ignora acentos e erros de digitação)",
+                "thumbnail_view": "Exibir miniaturas",
                 "preview": "Visualização",
                 "no_file_selected": "Nenhum arquivo selecionado",
                 "preview_not_available": "Visualização não disponível para este tipo de arquivo",
@@ -79,6 +101,7 @@ class LanguageManager(QObject):
                 "file_menu": "Archivo",
                 "open_csv": "Abrir CSV",
                 "open_folder": "Abrir Carpeta",
+                "compact_history": "Compactar Historial",
                 "exit": "Salir",
                 "language_menu": "Idioma",
                 "english": "Inglés",
@@ -87,10 +110,20 @@ class LanguageManager(QObject):
                 "about_menu": "Acerca de",
                 "about": "Acerca de",
                 "reload_files": "Recargar Archivos",
+                "include_subfolders": "Incluir subcarpetas",
+                "max_depth": "Profundidad máxima (0 = sin límite)",
+                "match_mode": "Correspondencia de archivos",
+                "match_by_position": "Por posición de la fila",
+                "match_by_name": "Por nombre antiguo (old_name,new_name)",
+                "match_by_key": "Por clave (nombre sin extensión)",
+                "key_column": "Columna de la clave",
+                "new_name_column": "Columna del nuevo nombre",
                 "rename_files": "Renombrar Archivos",
                 "undo_rename": "Deshacer Renombrado",
                 "extensions": "Extensiones (separadas por coma)",
                 "search": "Buscar...",
+                "fuzzy_search": "Búsqueda aproximada (ignora acentos y errores de escritura)",
+                "thumbnail_view": "Mostrar miniaturas",
                 "preview": "Vista Previa",
                 "no_file_selected": "Ningún archivo seleccionado",
                 "preview_not_available": "Vista previa no disponible para este tipo de archivo",
@@ -0,0 +1,82 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from PyQt5.QtGui import QImage
+
+class PreviewCache:
+    """Cache LRU de visualizações limitado por um orçamento de bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        # chave -> (conteúdo, mensagem, custo em bytes), da menos para a mais usada
+        self._entries = OrderedDict()
+        # caminho normalizado -> chaves do caminho, para invalidar sem percorrer o cache
+        self._keys_by_path = {}
+        # Usado pelas threads de visualização e pelas renomeações em segundo plano;
+        # guarda QImage, que (ao contrário de QPixmap) pode circular entre threads
+        self._lock = threading.Lock()
+
+    def make_key(self, file_path, stat, max_width, max_height):
+        """Monta a chave: o arquivo alterado (tamanho ou mtime) gera outra chave"""
+        return (os.path.normcase(file_path), stat.st_size, stat.st_mtime_ns, max_width, max_height)
+
+    def entry_cost(self, content, message):
+        """Estima a memória ocupada por uma visualização"""
+        cost = sys.getsizeof(message) if message else 0
+        if isinstance(content, QImage):
+            return cost + content.width() * content.height() * max(content.depth(), 8) // 8
+        return cost + sys.getsizeof(content)
+
+    def get(self, key):
+        """Retorna (conteúdo, mensagem) ou None, marcando a entrada como a mais recente"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def contains(self, key):
+        """Indica se há uma entrada para a chave, sem alterar a ordem de uso"""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, content, message):
+        """Guarda uma visualização, descartando as menos usadas até caber no orçamento"""
+        cost = self.entry_cost(content, message)
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            self.discard(key)
+            self._entries[key] = (content, message, cost)
+            self._keys_by_path.setdefault(key[0], set()).add(key)
+            self.current_bytes += cost
+            while self.current_bytes > self.max_bytes:
+                self.discard(next(iter(self._entries)))
+
+    def discard(self, key):
+        """Remove uma entrada (chamado com a trava)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.current_bytes -= entry[2]
+        keys = self._keys_by_path.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_path[key[0]]
+
+    def invalidate(self, file_path):
+        """Descarta todas as visualizações de um caminho"""
+        with self._lock:
+            for key in list(self._keys_by_path.get(os.path.normcase(file_path), ())):
+                self.discard(key)
+
+    def clear(self):
+        """Esvazia o cache"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self.current_bytes = 0
@@ -1,76 +1,411 @@
 import os
+import threading
+from collections import OrderedDict
 import fitz  # PyMuPDF
-from PyQt5.QtGui import QPixmap, QImage
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QImage, QImageReader, QImageIOHandler
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThread, QThreadPool, pyqtSignal
 
-class PreviewManager:
-    def __init__(self):
+from core.preview_cache import PreviewCache
+from core.exif_thumbnail import load_exif_thumbnail
+from core.thumbnail_store import ThumbnailStore
+from core.text_preview import read_text_preview
+
+# Tipos cujas visualizações são imagens e podem ser guardadas como miniaturas em disco
+THUMBNAIL_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.pdf')
+
+# Lado maior das miniaturas EXIF comuns (160x120); visualizações maiores nem as consultam
+EXIF_THUMBNAIL_SIZE = 160
+
+class PDFDocumentPool:
+    """Documentos PDF abertos recentemente, reaproveitados entre visualizações"""
+
+    def __init__(self, max_documents=4, max_bytes=128 * 1024 * 1024):
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        # caminho normalizado -> (mtime, tamanho, documento), do menos para o mais usado
+        self._documents = OrderedDict()
+
+    def open(self, file_path):
+        """Retorna o documento aberto do arquivo, ou None se ele não couber no pool"""
+        stat = os.stat(file_path)
+        key = os.path.normcase(file_path)
+        entry = self._documents.get(key)
+        if entry is not None:
+            if entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._documents.move_to_end(key)
+                return entry[2]
+            self.close_document(key)
+        if stat.st_size > self.max_bytes:
+            return None
+        # O documento é aberto a partir da memória para não manter o arquivo aberto,
+        # o que impediria renomeá-lo ou deletá-lo no Windows
+        with open(file_path, 'rb') as f:
+            document = fitz.open(stream=f.read(), filetype="pdf")
+        self._documents[key] = (stat.st_mtime_ns, stat.st_size, document)
+        self.current_bytes += stat.st_size
+        while len(self._documents) > self.max_documents or self.current_bytes > self.max_bytes:
+            self.close_document(next(iter(self._documents)))
+        return document
+
+    def close_document(self, key):
+        """Fecha e retira um documento do pool"""
+        entry = self._documents.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+            entry[2].close()
+
+    def invalidate(self, file_path):
+        """Fecha o documento de um arquivo renomeado ou deletado"""
+        self.close_document(os.path.normcase(file_path))
+
+class PreviewTask(QRunnable):
+    """Gera uma visualização no pool de threads, se ela ainda for a pedida"""
+
+    def __init__(self, manager, generation, file_path, max_width, max_height):
+        super().__init__()
+        self.manager = manager
+        self.generation = generation
+        self.file_path = file_path
+        self.max_width = max_width
+        self.max_height = max_height
+
+    def run(self):
+        # O usuário já passou para outro arquivo: a decodificação nem começa
+        if self.generation != self.manager.generation:
+            return
+        content, message = self.manager.load_preview(self.file_path, self.max_width, self.max_height)
+        if self.generation == self.manager.generation:
+            self.manager.preview_ready.emit(self.generation, self.file_path, content, message)
+            self.manager.foreground_finished(self.generation)
+
+class PrefetchTask(QRunnable):
+    """Gera antecipadamente, com baixa prioridade, a visualização de um arquivo vizinho"""
+
+    def __init__(self, manager, generation, file_path, max_width, max_height):
+        super().__init__()
+        self.manager = manager
+        self.generation = generation
+        self.file_path = file_path
+        self.max_width = max_width
+        self.max_height = max_height
+
+    def is_current(self):
+        """Indica se a seleção que originou a antecipação ainda é a atual"""
+        return self.generation == self.manager.prefetch_generation
+
+    def run(self):
+        QThread.currentThread().setPriority(QThread.LowPriority)
+        if self.is_current():
+            self.manager.prefetch_preview(self.file_path, self.max_width, self.max_height)
+
+class PreviewManager(QObject):
+    # Sinais
+    preview_ready = pyqtSignal(int, str, object, str)  # Geração, caminho, QImage ou texto e mensagem
+
+    def __init__(self, cache_bytes=64 * 1024 * 1024, max_threads=2, prefetch_bytes=16 * 1024 * 1024,
+                 thumbnail_dir=None):
+        super().__init__()
         self.current_file_path = None
+        # Visualizações já geradas, para rever um arquivo sem decodificá-lo de novo
+        self.cache = PreviewCache(cache_bytes)
+        # Cada pedido recebe uma geração; resultados de gerações antigas são descartados
+        self.generation = 0
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        # Visualizações antecipadas dos vizinhos ficam à parte, para não expulsar do
+        # cache as já exibidas; uma única thread as gera
+        self.prefetch_cache = PreviewCache(prefetch_bytes)
+        self.prefetch_generation = 0
+        self.prefetch_pool = QThreadPool(self)
+        self.prefetch_pool.setMaxThreadCount(1)
+        # As antecipações só entram na fila depois que a visualização pedida fica pronta,
+        # para não disputar o disco e a CPU com ela. _idle_generation é a geração do
+        # último pedido já atendido e _pending_prefetch, a antecipação à espera dele
+        self._prefetch_lock = threading.Lock()
+        self._idle_generation = 0
+        self._pending_prefetch = None
+        # O PyMuPDF não pode ser usado por duas threads ao mesmo tempo
+        self._pdf_lock = threading.Lock()
+        self.pdf_pool = PDFDocumentPool()
+        # Miniaturas em disco, aproveitadas entre sessões (desativadas sem pasta)
+        self.thumbnail_store = ThumbnailStore(thumbnail_dir) if thumbnail_dir else None
 
     def set_current_file(self, file_path):
         """Define o arquivo atual para visualização"""
         self.current_file_path = file_path
 
+    def invalidate(self, file_path, new_path=None, info=None):
+        """Descarta as visualizações guardadas de um arquivo renomeado ou deletado"""
+        for path in (file_path, new_path):
+            if path is not None:
+                self.cache.invalidate(path)
+                self.prefetch_cache.invalidate(path)
+        if file_path.lower().endswith('.pdf'):
+            with self._pdf_lock:
+                self.pdf_pool.invalidate(file_path)
+        # Renomear não muda o conteúdo: as miniaturas em disco passam para o nome novo.
+        # Só tipos com miniatura são tocados, e o tamanho e o mtime vêm do FileInfo da
+        # renomeação, sem outro stat; sem ele a miniatura é gerada de novo quando pedida
+        if (new_path is not None and info is not None and self.thumbnail_store is not None and
+                os.path.splitext(file_path)[1].lower() in THUMBNAIL_EXTENSIONS):
+            self.thumbnail_store.rename(file_path, new_path, info.size, info.mtime)
+
+    def request_preview(self, file_path, max_width=800, max_height=600):
+        """Pede a visualização em segundo plano e retorna a geração do pedido
+
+        Se ela estiver no cache, preview_ready é emitido antes do retorno."""
+        self.current_file_path = file_path
+        self.generation += 1
+        # Pedidos anteriores que ainda não começaram saem da fila
+        self.thread_pool.clear()
+        cached = self.get_cached(file_path, max_width, max_height)
+        if cached is not None:
+            self.preview_ready.emit(self.generation, file_path, cached[0], cached[1] or "")
+            self.foreground_finished(self.generation)
+        else:
+            self.thread_pool.start(PreviewTask(self, self.generation, file_path, max_width, max_height))
+        return self.generation
+
+    def prefetch(self, file_paths, max_width=800, max_height=600):
+        """Antecipa em segundo plano as visualizações dos arquivos, na ordem informada,
+        assim que a visualização pedida por último estiver pronta"""
+        with self._prefetch_lock:
+            self.prefetch_generation += 1
+            self.prefetch_pool.clear()
+            self._pending_prefetch = (self.prefetch_generation, list(file_paths), max_width, max_height)
+            if self._idle_generation == self.generation:
+                self.start_prefetch()
+
+    def foreground_finished(self, generation):
+        """Libera as antecipações quando o pedido mais recente termina (chamado de qualquer thread)"""
+        with self._prefetch_lock:
+            if generation == self.generation:
+                self._idle_generation = generation
+                self.start_prefetch()
+
+    def start_prefetch(self):
+        """Coloca na fila a antecipação à espera (deve ser chamado com _prefetch_lock)"""
+        if self._pending_prefetch is None:
+            return
+        prefetch_generation, file_paths, max_width, max_height = self._pending_prefetch
+        self._pending_prefetch = None
+        if prefetch_generation != self.prefetch_generation:
+            return
+        for file_path in file_paths:
+            self.prefetch_pool.start(PrefetchTask(self, prefetch_generation, file_path, max_width, max_height))
+
+    def prefetch_preview(self, file_path, max_width, max_height):
+        """Gera e guarda a visualização antecipada, se ela ainda não estiver guardada"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        key = self.cache.make_key(file_path, stat, max_width, max_height)
+        if self.cache.contains(key) or self.prefetch_cache.contains(key):
+            return
+        content, message = self.render_stored_preview(file_path, stat, max_width, max_height)
+        if content is not None:
+            self.prefetch_cache.put(key, content, message)
+
+    def cancel_pending(self):
+        """Descarta os pedidos em andamento"""
+        self.generation += 1
+        with self._prefetch_lock:
+            self.prefetch_generation += 1
+            self._pending_prefetch = None
+            self.prefetch_pool.clear()
+        self.thread_pool.clear()
+
+    def lookup(self, key):
+        """Procura a visualização no cache e, depois, entre as antecipadas"""
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self.prefetch_cache.get(key)
+            if cached is not None:
+                # Uma visualização antecipada que foi exibida passa para o cache principal
+                self.cache.put(key, *cached)
+        return cached
+
+    def get_cached(self, file_path, max_width, max_height):
+        """Retorna (conteúdo, mensagem) do cache ou None"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return self.lookup(self.cache.make_key(file_path, stat, max_width, max_height))
+
+    def load_preview(self, file_path, max_width=800, max_height=600):
+        """Retorna a visualização de um arquivo (QImage ou texto), do cache quando possível
+
+        Pode ser chamado fora da thread da interface."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None, "Arquivo não encontrado"
+
+        key = self.cache.make_key(file_path, stat, max_width, max_height)
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+        content, message = self.render_stored_preview(file_path, stat, max_width, max_height)
+        # Falhas não são guardadas: podem ser passageiras (arquivo ainda sendo gravado)
+        if content is not None:
+            self.cache.put(key, content, message)
+        return content, message
+
+    def render_stored_preview(self, file_path, stat, max_width, max_height):
+        """Gera a visualização a partir da miniatura em disco, criando-a se não existir"""
+        size = None
+        if self.thumbnail_store is not None and os.path.splitext(file_path)[1].lower() in THUMBNAIL_EXTENSIONS:
+            size = self.thumbnail_store.thumbnail_size(max_width, max_height)
+        if size is None:
+            return self.render_preview(file_path, max_width, max_height, stat)
+
+        # A miniatura EXIF (em geral 160 px) nunca cobre os tamanhos fixos do disco; ela é
+        # consultada antes, só para as visualizações pequenas como as da grade (uma
+        # visualização que cabe em EXIF_THUMBNAIL_SIZE tem um dos lados dentro desse limite)
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext in ('.jpg', '.jpeg') and min(max_width, max_height) <= EXIF_THUMBNAIL_SIZE:
+            reader = QImageReader(file_path)
+            reader.setAutoTransform(True)
+            if reader.size().isValid():
+                rotated, display_size, target = self.display_geometry(reader, max_width, max_height)
+                image = self.exif_preview(file_path, display_size, target)
+                if image is not None:
+                    return image, None
+
+        stored = self.thumbnail_store.load(file_path, stat, size)
+        if stored is not None:
+            image, message = stored
+        else:
+            # A miniatura é gerada no tamanho fixo e reduzida para a visualização
+            image, message = self.render_preview(file_path, size, size, stat)
+            if not isinstance(image, QImage):
+                return image, message
+            self.thumbnail_store.save(file_path, stat, size, image, message)
+        if image.width() > max_width or image.height() > max_height:
+            image = image.scaled(max_width, max_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return image, message
+
     def get_preview(self, max_width=800, max_height=600):
-        """Retorna uma visualização do arquivo atual"""
-        if not self.current_file_path or not os.path.exists(self.current_file_path):
+        """Retorna uma visualização do arquivo atual, gerada na thread de quem chama"""
+        if not self.current_file_path:
             return None, "Arquivo não encontrado"
+        content, message = self.load_preview(self.current_file_path, max_width, max_height)
+        if isinstance(content, QImage):
+            content = QPixmap.fromImage(content)
+        return content, message
+
+    def display_geometry(self, reader, max_width, max_height):
+        """Retorna (rotação de 90°, tamanho exibido, tamanho da visualização) pelo cabeçalho"""
+        # Com rotação de 90° na orientação EXIF, largura e altura exibidas se invertem
+        rotated = bool(reader.transformation() & QImageIOHandler.TransformationRotate90)
+        size = reader.size()
+        display_size = size.transposed() if rotated else size
+        return rotated, display_size, display_size.scaled(max_width, max_height, Qt.KeepAspectRatio)
+
+    def exif_preview(self, file_path, display_size, target):
+        """Retorna a miniatura EXIF no tamanho da visualização ou None se ela não servir"""
+        # Visualizações maiores que uma miniatura EXIF não precisam ler o cabeçalho
+        if max(target.width(), target.height()) > EXIF_THUMBNAIL_SIZE:
+            return None
+        thumbnail = load_exif_thumbnail(file_path)
+        # A miniatura embutida só serve se tiver a mesma proporção e resolução suficiente
+        if (thumbnail is not None and thumbnail.width() >= target.width() and
+                thumbnail.height() >= target.height() and
+                abs(thumbnail.width() * display_size.height() - thumbnail.height() * display_size.width())
+                <= 0.02 * thumbnail.height() * display_size.width()):
+            return thumbnail.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return None
+
+    def render_image(self, file_path, file_ext, max_width, max_height):
+        """Decodifica uma imagem já no tamanho da visualização e na orientação correta"""
+        reader = QImageReader(file_path)
+        reader.setAutoTransform(True)
+        # O tamanho vem do cabeçalho, sem decodificar a imagem
+        size = reader.size()
+        if not size.isValid():
+            image = reader.read()
+            if image.isNull():
+                return None
+            return image.scaled(max_width, max_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+        rotated, display_size, target = self.display_geometry(reader, max_width, max_height)
+
+        if file_ext in ('.jpg', '.jpeg'):
+            thumbnail = self.exif_preview(file_path, display_size, target)
+            if thumbnail is not None:
+                return thumbnail
+
+        if target.width() < display_size.width():
+            # O decodificador reduz durante a leitura (no JPEG, direto no domínio da DCT);
+            # o tamanho pedido é o anterior à rotação
+            reader.setScaledSize(target.transposed() if rotated else target)
+            return reader.read()
+        image = reader.read()
+        if image.isNull():
+            return None
+        return image.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    def render_preview(self, file_path, max_width, max_height, stat=None):
+        """Gera a visualização de um arquivo; imagens saem como QImage, que pode ser
+        criado fora da thread da interface (ao contrário de QPixmap)"""
+        file_ext = os.path.splitext(file_path)[1].lower()
 
-        file_ext = os.path.splitext(self.current_file_path)[1].lower()
-        
         # Visualização de imagens
         image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp']
         if file_ext in image_extensions:
             try:
-                pixmap = QPixmap(self.current_file_path)
-                if pixmap.isNull():
+                image = self.render_image(file_path, file_ext, max_width, max_height)
+                if image is None or image.isNull():
                     return None, "Falha ao carregar imagem"
-                
-                scaled_pixmap = pixmap.scaled(
-                    max_width, 
-                    max_height,
-                    Qt.KeepAspectRatio, 
-                    Qt.SmoothTransformation
-                )
-                return scaled_pixmap, None
+                return image, None
             except Exception as e:
                 return None, f"Erro ao carregar imagem: {str(e)}"
 
         # Visualização de PDF
         if file_ext == '.pdf':
             try:
-                pdf_document = fitz.open(self.current_file_path)
-                if pdf_document.page_count > 0:
-                    page = pdf_document[0]
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                    img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
-                    pixmap = QPixmap.fromImage(img)
-                    
-                    scaled_pixmap = pixmap.scaled(
-                        max_width, 
-                        max_height,
-                        Qt.KeepAspectRatio, 
-                        Qt.SmoothTransformation
-                    )
-                    
-                    pdf_document.close()
-                    return scaled_pixmap, f"PDF: Página 1 de {pdf_document.page_count}"
-                else:
-                    return None, "PDF vazio"
+                with self._pdf_lock:
+                    pdf_document = self.pdf_pool.open(file_path)
+                    # Documentos grandes demais para o pool são abertos só para esta visualização
+                    owned = pdf_document is None
+                    if owned:
+                        pdf_document = fitz.open(file_path)
+                    try:
+                        page_count = pdf_document.page_count
+                        if page_count == 0:
+                            return None, "PDF vazio"
+                        page = pdf_document[0]
+                        # A página é rasterizada uma única vez, já no tamanho final
+                        rect = page.rect
+                        zoom = min(max_width / rect.width, max_height / rect.height)
+                        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                    finally:
+                        if owned:
+                            pdf_document.close()
+
+                # samples_mv expõe a memória do pixmap sem copiá-la (samples seria uma cópia);
+                # o QImage aponta para essa memória, então o pixmap vive junto com ele
+                img = QImage(pix.samples_mv, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
+                img.pixmap = pix
+                return img, f"PDF: Página 1 de {page_count}"
             except Exception as e:
                 return None, f"Erro ao carregar PDF: {str(e)}"
 
         # Visualização de texto
+        # Extensões conhecidas e, nas demais, arquivos cuja amostra inicial parece texto
         text_extensions = ['.txt', '.csv', '.json', '.xml', '.html', '.md', '.py', '.js', '.css', '.log', '.ini', '.cfg']
-        if file_ext in text_extensions:
-            try:
-                with open(self.current_file_path, 'r', encoding='utf-8', errors='replace') as f:
-                    content = f.read(2000)
-                    file_size = os.path.getsize(self.current_file_path)
-                    if file_size > 2000:
-                        content += f"\n\n[...] Arquivo truncado. Mostrando os primeiros 2000 de {file_size} caracteres."
+        try:
+            # Reaproveita o stat de quem chamou, se houver
+            file_size = stat.st_size if stat is not None else os.stat(file_path).st_size
+            # Nos logs o que interessa costuma estar no fim
+            content = read_text_preview(file_path, file_size, include_tail=file_ext == '.log')
+            if content is not None:
                 return content, None
-            except Exception as e:
+        except Exception as e:
+            if file_ext in text_extensions:
                 return None, f"Erro ao carregar arquivo de texto: {str(e)}"
 
-        return None, f"Visualização não disponível para arquivos {file_ext}" 
\ No newline at end of file
+        return None, f"Visualização não disponível para arquivos {file_ext}"
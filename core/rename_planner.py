@@ -0,0 +1,233 @@
+import os
+import re
+import uuid
+from collections import namedtuple
+
+# Caracteres e nomes que o Windows não aceita em nomes de arquivo
+INVALID_NAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+RESERVED_NAMES = frozenset(
+    ["CON", "PRN", "AUX", "NUL"] +
+    [f"COM{i}" for i in range(1, 10)] +
+    [f"LPT{i}" for i in range(1, 10)]
+)
+MAX_NAME_LENGTH = 255
+MAX_PATH_LENGTH = 260 if os.name == 'nt' else 4096
+
+# Um passo de renomeação. original_name/new_name só são preenchidos no passo que
+# conclui uma operação pedida pelo usuário; passos intermediários (nomes temporários)
+# ficam com None e não entram no histórico.
+RenameStep = namedtuple("RenameStep", ["source", "target", "original_name", "new_name"])
+
+class RenamePlan:
+    def __init__(self, operations=None, chains=None):
+        self.operations = operations or []
+        self.chains = chains or []
+        self.errors = []
+        self.warnings = []
+
+    def is_valid(self):
+        """Indica se o plano pode ser executado sem tocar em arquivos inválidos"""
+        return not self.errors
+
+    def count_steps(self):
+        """Retorna o número total de renomeações do plano"""
+        return sum(len(chain) for chain in self.chains)
+
+class RenamePlanner:
+    def __init__(self, temp_prefix=".batchrenamer-"):
+        self.temp_prefix = temp_prefix
+
+    def make_temp_name(self, file_name):
+        """Gera um nome temporário único na mesma pasta do arquivo"""
+        directory = os.path.dirname(file_name)
+        return os.path.join(directory, f"{self.temp_prefix}{uuid.uuid4().hex}.tmp")
+
+    def plan(self, operations):
+        """Ordena as operações (antigo, novo) em cadeias que resolvem dependências e ciclos"""
+        # Cada cadeia precisa ser executada em ordem; cadeias diferentes são independentes.
+        # Um caminho A->B->C gasta uma renomeação por operação e um ciclo de k arquivos
+        # gasta k+1 (um nome temporário), o mínimo possível de chamadas a os.rename.
+        # As chaves são os nomes normalizados (os.path.normcase), como na validação: em
+        # sistemas que ignoram maiúsculas "A.txt" e "a.txt" são o mesmo arquivo
+        targets = {}
+        # Índice reverso: destino -> origem. Em destinos duplicados o primeiro vence e
+        # os demais seguem como cadeias isoladas para falhar na própria renomeação
+        sources_by_target = {}
+        for old_name, new_name in operations:
+            if old_name == new_name:
+                continue
+            key = os.path.normcase(old_name)
+            targets[key] = (old_name, new_name)
+            sources_by_target.setdefault(os.path.normcase(new_name), key)
+
+        chains = []
+        visited = set()
+
+        # Caminhos: começam pelo fim (destino livre) e andam para trás
+        for key, (old_name, new_name) in targets.items():
+            target_key = os.path.normcase(new_name)
+            if target_key in targets and sources_by_target.get(target_key) == key:
+                continue
+            chain = []
+            source = key
+            while source is not None and source not in visited:
+                visited.add(source)
+                chain.append(self.make_step(*targets[source]))
+                previous = sources_by_target.get(source)
+                source = previous if previous in targets else None
+            chains.append(chain)
+
+        # O que sobrou são ciclos puros: o primeiro arquivo vai para um nome temporário.
+        # Uma troca só de maiúsculas é um ciclo de um arquivo e também passa pelo
+        # temporário, já que alguns sistemas ignoram a renomeação direta
+        for key, (old_name, new_name) in targets.items():
+            if key in visited:
+                continue
+            temp_name = self.make_temp_name(old_name)
+            chain = [RenameStep(old_name, temp_name, None, None)]
+            visited.add(key)
+            source = sources_by_target[key]
+            while source != key:
+                visited.add(source)
+                chain.append(self.make_step(*targets[source]))
+                source = sources_by_target[source]
+            chain.append(RenameStep(temp_name, new_name, old_name, new_name))
+            chains.append(chain)
+
+        return chains
+
+    def make_step(self, old_name, new_name):
+        """Passo que conclui uma operação pedida pelo usuário"""
+        return RenameStep(old_name, new_name, old_name, new_name)
+
+    def check_name(self, file_name):
+        """Retorna o problema de um nome de arquivo ou None se ele for válido"""
+        # rpartition, ao contrário de splitext, trata ".jpg" como extensão sem nome
+        stem, dot, _ = file_name.rpartition('.')
+        if not dot:
+            stem = file_name
+        if not stem.strip():
+            return "nome vazio"
+        if INVALID_NAME_CHARS.search(file_name):
+            return "caracteres inválidos"
+        if stem.split('.')[0].upper() in RESERVED_NAMES:
+            return "nome reservado do sistema"
+        if file_name[-1] in ' .':
+            return "termina com espaço ou ponto"
+        if len(file_name) > MAX_NAME_LENGTH:
+            return f"nome com mais de {MAX_NAME_LENGTH} caracteres"
+        return None
+
+    def build_positional_plan(self, folder_path, folder_files, names, existing_names=()):
+        """Monta e valida o plano que pareia arquivos e nomes do CSV pela posição"""
+        operations = []
+        name_errors = []
+        for file_name, name in zip(folder_files, names):
+            name = f"{name}{os.path.splitext(file_name)[1]}"
+            # O nome vem do CSV: é validado antes de ser juntado à subpasta, senão
+            # separadores e ".." levariam o arquivo para fora da pasta
+            problem = self.check_name(name)
+            if problem:
+                name_errors.append(f"'{file_name}' -> '{name}': {problem}")
+                continue
+            # No modo recursivo o arquivo continua na sua subpasta
+            operations.append((file_name, os.path.join(os.path.dirname(file_name), name)))
+        
+        plan = self.build_plan(folder_path, operations, existing_names)
+        plan.errors[:0] = name_errors
+        if len(names) < len(folder_files):
+            plan.warnings.append(
+                f"O número de nomes no CSV ({len(names)}) é menor que o número de arquivos ({len(folder_files)})."
+            )
+        return plan
+
+    def build_keyed_plan(self, folder_path, folder_files, mapping, match_stem=False, existing_names=(), duplicates=(),
+                         incomplete_rows=()):
+        """Monta e valida o plano que pareia arquivos e linhas do CSV pela chave"""
+        # Junção por hash: cada arquivo consulta o índice do CSV uma única vez
+        operations = []
+        name_errors = []
+        unmatched_files = []
+        used_keys = set()
+        for file_name in folder_files:
+            base_name = os.path.basename(file_name)
+            stem, extension = os.path.splitext(base_name)
+            key = os.path.normcase(stem if match_stem else base_name)
+            match = mapping.get(key)
+            if match is None:
+                unmatched_files.append(file_name)
+                continue
+            used_keys.add(key)
+            new_name = match[1]
+            # O novo nome pode vir com ou sem a extensão do arquivo
+            if extension and not os.path.normcase(new_name).endswith(os.path.normcase(extension)):
+                new_name += extension
+            # Validado antes da junção com a subpasta, como no modo posicional
+            problem = self.check_name(new_name)
+            if problem:
+                name_errors.append(f"'{file_name}' -> '{new_name}': {problem}")
+                continue
+            operations.append((file_name, os.path.join(os.path.dirname(file_name), new_name)))
+        
+        plan = self.build_plan(folder_path, operations, existing_names)
+        plan.errors[:0] = name_errors
+        # Uma chave repetida deixaria a correspondência ambígua
+        for line, key in duplicates:
+            plan.errors.append(f"Linha {line} do CSV: a chave '{key}' já apareceu em outra linha")
+        unused_rows = sorted(line for key, (line, _) in mapping.items() if key not in used_keys)
+        if unmatched_files:
+            plan.warnings.append(
+                f"{len(unmatched_files)} arquivo(s) sem linha correspondente no CSV: " +
+                self.summarize(unmatched_files)
+            )
+        if unused_rows:
+            plan.warnings.append(
+                f"{len(unused_rows)} linha(s) do CSV sem arquivo correspondente: " +
+                self.summarize([str(line) for line in unused_rows])
+            )
+        if incomplete_rows:
+            plan.warnings.append(
+                f"{len(incomplete_rows)} linha(s) do CSV sem a coluna da chave ou do novo nome: " +
+                self.summarize([str(line) for line in incomplete_rows])
+            )
+        return plan
+
+    def summarize(self, items, limit=20):
+        """Junta os primeiros itens de uma lista longa em uma única linha"""
+        text = ", ".join(items[:limit])
+        if len(items) > limit:
+            text += f" e mais {len(items) - limit}"
+        return text
+
+    def build_plan(self, folder_path, operations, existing_names=()):
+        """Valida todas as operações em uma única passada e monta o plano de execução"""
+        # Tudo é verificado em memória contra os nomes da listagem, sem stat por arquivo
+        sources = {os.path.normcase(old_name) for old_name, new_name in operations if old_name != new_name}
+        targets = {}
+        errors = []
+        
+        for old_name, new_name in operations:
+            problem = self.check_name(os.path.basename(new_name))
+            # Uma renomeação nunca muda o arquivo de pasta
+            if not problem and os.path.dirname(new_name) != os.path.dirname(old_name):
+                problem = "o novo nome não pode mudar o arquivo de pasta"
+            if problem:
+                errors.append(f"'{old_name}' -> '{new_name}': {problem}")
+                continue
+            if len(os.path.join(folder_path, new_name)) > MAX_PATH_LENGTH:
+                errors.append(f"'{old_name}' -> '{new_name}': caminho com mais de {MAX_PATH_LENGTH} caracteres")
+                continue
+            
+            key = os.path.normcase(new_name)
+            if key in targets:
+                errors.append(f"'{old_name}' e '{targets[key]}' teriam o mesmo nome: '{new_name}'")
+                continue
+            targets[key] = old_name
+            
+            # O destino só pode existir se o arquivo que o ocupa também for renomeado
+            if old_name != new_name and key in existing_names and key not in sources:
+                errors.append(f"'{old_name}' -> '{new_name}': já existe um arquivo com esse nome")
+        
+        plan = RenamePlan(operations, self.plan(operations))
+        plan.errors = errors
+        return plan
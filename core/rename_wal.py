@@ -0,0 +1,205 @@
+import json
+import os
+import time
+from datetime import datetime
+
+from core.rename_planner import RenameStep
+
+# Políticas de fsync: "always" sincroniza a cada gravação, "batch" a cada descarga
+# de um lote de registros e "never" deixa a gravação em disco a cargo do sistema
+FSYNC_POLICIES = ("always", "batch", "never")
+
+class RenameWAL:
+    def __init__(self, wal_file, fsync_policy="batch", flush_every=1000, flush_seconds=1.0):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise Exception(f"Política de fsync inválida: {fsync_policy}")
+        self.wal_file = wal_file
+        self.fsync_policy = fsync_policy
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._file = None
+        self._pending = []
+        self._last_flush = 0.0
+
+    def begin(self, folder_path, plan, file_info=None):
+        """Registra a intenção do lote inteiro antes da primeira renomeação"""
+        file_info = file_info or {}
+        lines = [json.dumps({
+            "type": "begin",
+            "folder_path": folder_path,
+            "timestamp": datetime.now().isoformat()
+        }, ensure_ascii=False)]
+        for chain_index, chain in enumerate(plan.chains):
+            for step in chain:
+                record = {"type": "step", "chain": chain_index, "step": list(step)}
+                # Em um ciclo, o arquivo que passa pelo nome temporário é identificado
+                # pela sua impressão digital (tamanho, mtime, inode) para a recuperação
+                if step is chain[0] and step.original_name is None and step.source in file_info:
+                    record["fingerprint"] = list(file_info[step.source])
+                lines.append(json.dumps(record, ensure_ascii=False))
+
+        self._file = open(self.wal_file, 'w', encoding='utf-8')
+        self._file.write("\n".join(lines) + "\n")
+        # A intenção sempre é sincronizada: sem ela não há como recuperar o lote
+        self.sync(force=self.fsync_policy != "never")
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def record_done(self, step_index):
+        """Registra um passo concluído; a gravação é feita em lotes"""
+        self._pending.append(step_index)
+        if (self.fsync_policy == "always" or len(self._pending) >= self.flush_every or
+                time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        """Grava os passos concluídos pendentes"""
+        if self._file is None or not self._pending:
+            return
+        self._file.write(json.dumps({"type": "done", "steps": self._pending}) + "\n")
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self.sync(force=self.fsync_policy != "never")
+
+    def sync(self, force):
+        """Descarrega o buffer e, conforme a política, força a gravação em disco"""
+        self._file.flush()
+        if force:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Grava o que estiver pendente e fecha o log sem encerrar o lote"""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def commit(self):
+        """Encerra o lote; depois disso não há nada a recuperar"""
+        self.close()
+        if os.path.exists(self.wal_file):
+            os.remove(self.wal_file)
+
+    def load_pending(self):
+        """Retorna o lote interrompido registrado no log ou None"""
+        if not os.path.exists(self.wal_file):
+            return None
+        batch = None
+        try:
+            with open(self.wal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A última linha pode ter ficado pela metade na queda
+                        break
+                    if record["type"] == "begin":
+                        batch = {
+                            "folder_path": record["folder_path"],
+                            "timestamp": record["timestamp"],
+                            "steps": [],
+                            "chains": [],
+                            "fingerprints": {},
+                            "done": set()
+                        }
+                    elif batch is None:
+                        break
+                    elif record["type"] == "step":
+                        if record["chain"] == len(batch["chains"]):
+                            batch["chains"].append([])
+                        batch["chains"][-1].append(len(batch["steps"]))
+                        if "fingerprint" in record:
+                            batch["fingerprints"][len(batch["chains"]) - 1] = record["fingerprint"]
+                        batch["steps"].append(RenameStep(*record["step"]))
+                    elif record["type"] == "done":
+                        batch["done"].update(record["steps"])
+        except Exception as e:
+            print(f"Erro ao ler log de renomeação: {str(e)}")
+            return None
+        return batch
+
+    def resolve_done(self, batch):
+        """Determina os passos concluídos, consultando o disco só para os não registrados"""
+        done = set()
+        for chain_index, chain in enumerate(batch["chains"]):
+            # Os passos de uma cadeia rodam em ordem, então o concluído é sempre um prefixo
+            last_recorded = -1
+            for position, index in enumerate(chain):
+                if index in batch["done"]:
+                    last_recorded = position
+            last_done = last_recorded
+            # Andando do fim para o começo: se o passo seguinte não foi feito, ninguém
+            # ocupou de novo a origem deste, então origem livre e destino presente indicam
+            # que ele foi concluído depois da última descarga do log
+            for position in range(len(chain) - 1, last_recorded, -1):
+                if self.is_step_done(batch, chain_index, position):
+                    last_done = position
+                    break
+            done.update(chain[:last_done + 1])
+        return done
+
+    def is_step_done(self, batch, chain_index, position):
+        """Verifica no disco se um passo não registrado foi executado"""
+        chain = batch["chains"][chain_index]
+        step = batch["steps"][chain[position]]
+        source = os.path.join(batch["folder_path"], step.source)
+        target = os.path.join(batch["folder_path"], step.target)
+        if not os.path.exists(target) or os.path.exists(source):
+            return False
+        is_cycle = batch["steps"][chain[0]].original_name is None
+        if not is_cycle or position != len(chain) - 1:
+            return True
+        # O último passo de um ciclo sai do nome temporário, que também não existe antes
+        # do ciclo começar; só a impressão digital do arquivo diferencia os dois casos
+        fingerprint = batch["fingerprints"].get(chain_index)
+        if fingerprint is None:
+            return False
+        stat = os.stat(target)
+        size, mtime, inode = fingerprint
+        return stat.st_size == size and stat.st_mtime_ns == mtime and (not inode or stat.st_ino == inode)
+
+    def roll_forward(self, batch):
+        """Conclui os passos que faltavam e retorna as operações e os erros"""
+        operations = []
+        errors = []
+        folder_path = batch["folder_path"]
+        done = self.resolve_done(batch)
+        for chain in batch["chains"]:
+            for index in chain:
+                step = batch["steps"][index]
+                if index not in done:
+                    source = os.path.join(folder_path, step.source)
+                    target = os.path.join(folder_path, step.target)
+                    try:
+                        if os.path.exists(target):
+                            raise Exception(f"Já existe um arquivo com o nome: {step.target}")
+                        os.rename(source, target)
+                    except Exception as e:
+                        errors.append(f"Erro ao renomear '{step.source}' para '{step.target}': {str(e)}")
+                        break
+                if step.original_name is not None:
+                    operations.append({"original_name": step.original_name, "new_name": step.new_name})
+        return operations, errors
+
+    def rollback(self, batch):
+        """Desfaz os passos concluídos, do último para o primeiro, e retorna os erros"""
+        restored = 0
+        errors = []
+        folder_path = batch["folder_path"]
+        done = self.resolve_done(batch)
+        for chain in batch["chains"]:
+            for index in reversed(chain):
+                if index not in done:
+                    continue
+                step = batch["steps"][index]
+                source = os.path.join(folder_path, step.source)
+                target = os.path.join(folder_path, step.target)
+                try:
+                    if os.path.exists(source):
+                        raise Exception(f"Já existe um arquivo com o nome: {step.source}")
+                    os.rename(target, source)
+                    restored += 1
+                except Exception as e:
+                    errors.append(f"Erro ao desfazer '{step.target}' para '{step.source}': {str(e)}")
+                    break
+        return restored, errors
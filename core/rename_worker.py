@@ -0,0 +1,135 @@
+import time
+from PyQt5.QtCore import QObject, pyqtSignal
+
+class RenameWorker(QObject):
+    # Sinais
+    progress = pyqtSignal(int, int, float, float)  # Concluídos, total, arquivos/s e ETA em segundos
+    finished = pyqtSignal(dict)  # Emite o resultado do lote
+
+    def __init__(self, file_manager, plan, wal=None, progress_interval=0.1):
+        super().__init__()
+        self.file_manager = file_manager
+        self.plan = plan
+        self.wal = wal
+        self.progress_interval = progress_interval
+        self._cancel_requested = False
+
+    def cancel(self):
+        """Solicita o cancelamento cooperativo do lote"""
+        self._cancel_requested = True
+
+    def is_cancelled(self):
+        """Indica se o cancelamento foi solicitado"""
+        return self._cancel_requested
+
+    def run(self):
+        """Executa as cadeias do plano de renomeação fora da thread da interface"""
+        total = self.plan.count_steps()
+        completed = []
+        error_details = []
+        processed = 0
+        start_time = time.monotonic()
+        last_emit = start_time
+        chain_start = 0
+
+        # A intenção do lote vai para o log antes de qualquer arquivo ser tocado
+        if self.wal is not None:
+            # Os arquivos que passam por um nome temporário são identificados pela impressão
+            # digital na recuperação; ela é relida porque podem ter mudado desde a listagem
+            for chain in self.plan.chains:
+                if chain[0].original_name is None:
+                    self.file_manager.refresh_file_info(chain[0].source)
+            try:
+                self.wal.begin(self.file_manager.folder_path, self.plan, self.file_manager.file_info)
+            except Exception as e:
+                error_details.append(f"Erro ao gravar o log de renomeação: {str(e)}")
+                self._cancel_requested = True
+
+        for chain in self.plan.chains:
+            if self._cancel_requested:
+                break
+            # Ciclos começam por um nome temporário e só podem parar depois de completos
+            is_cycle = chain[0].original_name is None
+
+            for index, step in enumerate(chain):
+                if self._cancel_requested and not is_cycle:
+                    break
+                try:
+                    self.file_manager.rename_file(step.source, step.target)
+                    if self.wal is not None:
+                        self.wal.record_done(chain_start + index)
+                        # Um ciclo concluído é registrado na hora, pois o disco sozinho não
+                        # distingue um ciclo completo de um que nem começou
+                        if is_cycle and index == len(chain) - 1:
+                            self.wal.flush()
+                    if step.original_name is not None:
+                        completed.append(self.make_history_entry(step))
+                    processed += 1
+                except Exception as e:
+                    original_name = step.original_name or step.source
+                    new_name = step.new_name or step.target
+                    error_details.append(f"Erro ao renomear '{original_name}' para '{new_name}': {str(e)}")
+                    if is_cycle:
+                        # As operações desfeitas saem do histórico do lote
+                        rolled_back = self.rollback_cycle(chain, index, error_details)
+                        if rolled_back:
+                            del completed[-rolled_back:]
+                    processed += len(chain) - index
+                    break
+
+                # Emite o progresso em lotes para não inundar a fila de eventos da interface
+                now = time.monotonic()
+                if now - last_emit >= self.progress_interval:
+                    last_emit = now
+                    self.emit_progress(processed, total, now - start_time)
+            chain_start += len(chain)
+
+        if self.wal is not None:
+            self.wal.close()
+
+        elapsed = time.monotonic() - start_time
+        self.emit_progress(processed, total, elapsed)
+        self.finished.emit({
+            "operations": completed,
+            "errors": error_details,
+            "processed": processed,
+            "total": total,
+            "cancelled": self._cancel_requested,
+            "elapsed": elapsed
+        })
+
+    def make_history_entry(self, step):
+        """Monta o registro de histórico de uma operação concluída"""
+        entry = {
+            "original_name": step.original_name,
+            "new_name": step.new_name
+        }
+        # A impressão digital é a lida logo após a renomeação (não a da listagem) e
+        # permite ao desfazer detectar arquivos alterados depois dela
+        info = self.file_manager.get_file_info(step.new_name)
+        if info is not None:
+            entry["fingerprint"] = list(info)
+        return entry
+
+    def rollback_cycle(self, chain, failed_index, error_details):
+        """Desfaz, do último para o primeiro, os passos já concluídos de um ciclo interrompido
+        e retorna quantas operações do usuário foram desfeitas"""
+        # O nome original do primeiro arquivo foi ocupado pelo passo seguinte: só volta a
+        # ficar livre depois que os passos posteriores são desfeitos, como no rollback do log
+        for index in range(failed_index - 1, -1, -1):
+            step = chain[index]
+            try:
+                self.file_manager.rename_file(step.target, step.source)
+            except Exception as e:
+                error_details.append(
+                    f"Erro ao desfazer o ciclo interrompido; o arquivo '{chain[0].source}' ficou com o "
+                    f"nome temporário '{chain[0].target}': {str(e)}"
+                )
+                return failed_index - 1 - index
+        return max(failed_index - 1, 0)
+
+    def emit_progress(self, processed, total, elapsed):
+        """Calcula a vazão e o tempo restante e emite o progresso"""
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        eta = (total - processed) / rate if rate > 0 else 0.0
+        self.progress.emit(processed, total, rate, eta)
@@ -0,0 +1,110 @@
+import unicodedata
+
+# Quantidade de nomes cujas chaves são calculadas de cada vez
+KEY_CHUNK_SIZE = 4096
+
+class AccentFoldTable(dict):
+    """Tabela para str.translate que remove acentos, calculada caractere a caractere"""
+
+    def __missing__(self, code):
+        decomposed = unicodedata.normalize('NFKD', chr(code))
+        base = ''.join(c for c in decomposed if not unicodedata.combining(c))
+        self[code] = base
+        return base
+
+ACCENT_FOLD_TABLE = AccentFoldTable()
+
+def fold_name(name):
+    """Normaliza um nome para busca: sem diferença de caixa nem de acentos"""
+    name = name.casefold()
+    if name.isascii():
+        return name
+    return name.translate(ACCENT_FOLD_TABLE)
+
+class SearchIndex:
+    """Índice de busca por trecho sobre uma sequência de nomes"""
+
+    def __init__(self):
+        self._names = []
+        # Chaves sem caixa nem acentos, em blocos de KEY_CHUNK_SIZE nomes calculados só
+        # quando uma busca passa por eles e mantidos nas alterações
+        self._chunks = {}
+        # Última busca: uma consulta que contém a anterior só precisa filtrar o resultado dela
+        self._last_query = None
+        self._last_results = None
+
+    def set_names(self, names):
+        """Troca a sequência indexada"""
+        self._names = names
+        self.invalidate()
+
+    def invalidate(self):
+        """Descarta as chaves; elas serão recalculadas na próxima busca"""
+        self._chunks = {}
+        self.reset_results()
+
+    def reset_results(self):
+        """Descarta o resultado guardado da última busca"""
+        self._last_query = None
+        self._last_results = None
+
+    def chunk_keys(self, chunk):
+        """Retorna as chaves de um bloco de nomes, calculando-as na primeira vez"""
+        keys = self._chunks.get(chunk)
+        if keys is None:
+            start = chunk * KEY_CHUNK_SIZE
+            keys = [fold_name(name) for name in self._names[start:start + KEY_CHUNK_SIZE]]
+            self._chunks[chunk] = keys
+        return keys
+
+    def discard_chunks_from(self, index):
+        """Descarta os blocos a partir do que contém index (as posições deles mudaram)"""
+        first_chunk = index // KEY_CHUNK_SIZE
+        for chunk in [chunk for chunk in self._chunks if chunk >= first_chunk]:
+            del self._chunks[chunk]
+
+    def update(self, index, name):
+        """Atualiza a chave de um nome alterado"""
+        keys = self._chunks.get(index // KEY_CHUNK_SIZE)
+        if keys is not None:
+            keys[index % KEY_CHUNK_SIZE] = fold_name(name)
+        self.reset_results()
+
+    def remove(self, index):
+        """Remove a chave de um nome removido"""
+        # Os nomes seguintes sobem uma posição; seus blocos são recalculados quando preciso
+        self.discard_chunks_from(index)
+        self.reset_results()
+
+    def swap(self, first_index, second_index):
+        """Troca as chaves de dois nomes"""
+        first_keys = self._chunks.get(first_index // KEY_CHUNK_SIZE)
+        second_keys = self._chunks.get(second_index // KEY_CHUNK_SIZE)
+        if first_keys is not None and second_keys is not None:
+            first_offset = first_index % KEY_CHUNK_SIZE
+            second_offset = second_index % KEY_CHUNK_SIZE
+            first_keys[first_offset], second_keys[second_offset] = second_keys[second_offset], first_keys[first_offset]
+        else:
+            self._chunks.pop(first_index // KEY_CHUNK_SIZE, None)
+            self._chunks.pop(second_index // KEY_CHUNK_SIZE, None)
+        self.reset_results()
+
+    def search(self, query):
+        """Retorna as posições dos nomes que contêm a consulta, ou None se ela for vazia"""
+        query = fold_name(query)
+        if not query:
+            self.reset_results()
+            return None
+        if self._last_query is not None and self._last_query in query:
+            # A consulta estende a anterior: só os resultados anteriores podem casar
+            results = [i for i in self._last_results
+                       if query in self.chunk_keys(i // KEY_CHUNK_SIZE)[i % KEY_CHUNK_SIZE]]
+        else:
+            results = []
+            for chunk in range((len(self._names) + KEY_CHUNK_SIZE - 1) // KEY_CHUNK_SIZE):
+                start = chunk * KEY_CHUNK_SIZE
+                results.extend(start + i for i, key in enumerate(self.chunk_keys(chunk)) if query in key)
+        self._last_query = query
+        self._last_results = results
+        # A visão recebe uma cópia, que pode ser alterada sem afetar o refinamento
+        return list(results)
@@ -0,0 +1,199 @@
+import os
+import sqlite3
+from datetime import datetime
+
+from core.history_manager import HistoryManager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    folder_path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS operations (
+    id INTEGER PRIMARY KEY,
+    batch_id INTEGER NOT NULL REFERENCES batches(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    original_name TEXT NOT NULL,
+    new_name TEXT NOT NULL,
+    size INTEGER,
+    mtime INTEGER,
+    inode INTEGER
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_batches_folder ON batches(folder_path, id);
+CREATE INDEX IF NOT EXISTS idx_batches_timestamp ON batches(timestamp);
+CREATE INDEX IF NOT EXISTS idx_operations_batch ON operations(batch_id, position);
+CREATE INDEX IF NOT EXISTS idx_operations_new_name ON operations(new_name);
+CREATE INDEX IF NOT EXISTS idx_operations_original_name ON operations(original_name);
+"""
+
+class SQLiteHistoryManager:
+    def __init__(self, database_file, legacy_history_file=None):
+        self.database_file = database_file
+        self.connection = sqlite3.connect(database_file)
+        self.connection.row_factory = sqlite3.Row
+        # WAL permite leituras enquanto um lote é gravado e reduz o custo de cada commit
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+
+        if legacy_history_file and not self.get_meta("imported_history"):
+            self.import_json_history(legacy_history_file)
+
+    def get_meta(self, key):
+        """Lê um valor da tabela de metadados"""
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def import_json_history(self, history_file):
+        """Importa o histórico em JSON (ou o diário JSON Lines) para o banco, uma única vez"""
+        try:
+            entries = []
+            if os.path.exists(history_file) or os.path.exists(os.path.splitext(history_file)[0] + ".jsonl"):
+                entries = HistoryManager(history_file).get_operations()
+            with self.connection:
+                for entry in entries:
+                    self.insert_batch(entry.get("timestamp", ""), entry["folder_path"], entry["operations"])
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('imported_history', ?)",
+                    (history_file,)
+                )
+            return len(entries)
+        except Exception as e:
+            print(f"Erro ao importar histórico: {str(e)}")
+            return 0
+
+    def insert_batch(self, timestamp, folder_path, operations):
+        """Insere um lote e suas operações (deve ser chamado dentro de uma transação)"""
+        cursor = self.connection.execute(
+            "INSERT INTO batches (timestamp, folder_path) VALUES (?, ?)",
+            (timestamp, folder_path)
+        )
+        batch_id = cursor.lastrowid
+        self.insert_operations(batch_id, operations)
+        return batch_id
+
+    def insert_operations(self, batch_id, operations):
+        """Insere as operações de um lote (deve ser chamado dentro de uma transação)"""
+        self.connection.executemany(
+            "INSERT INTO operations (batch_id, position, original_name, new_name, size, mtime, inode) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((batch_id, position, op["original_name"], op["new_name"], *(op.get("fingerprint") or (None,) * 3))
+             for position, op in enumerate(operations))
+        )
+
+    def load_batch(self, batch_row):
+        """Monta a operação no mesmo formato do histórico em JSON"""
+        if batch_row is None:
+            return None
+        rows = self.connection.execute(
+            "SELECT original_name, new_name, size, mtime, inode FROM operations "
+            "WHERE batch_id = ? ORDER BY position",
+            (batch_row["id"],)
+        )
+        operations = []
+        for row in rows:
+            operation = {"original_name": row["original_name"], "new_name": row["new_name"]}
+            if row["size"] is not None:
+                operation["fingerprint"] = [row["size"], row["mtime"], row["inode"]]
+            operations.append(operation)
+        return {
+            "timestamp": batch_row["timestamp"],
+            "folder_path": batch_row["folder_path"],
+            "operations": operations
+        }
+
+    def add_operation(self, folder_path, operations):
+        """Adiciona uma nova operação ao histórico"""
+        try:
+            with self.connection:
+                self.insert_batch(datetime.now().isoformat(), folder_path, operations)
+        except Exception as e:
+            print(f"Erro ao salvar histórico: {str(e)}")
+
+    def get_last_operation(self):
+        """Retorna a última operação do histórico"""
+        row = self.connection.execute(
+            "SELECT id, timestamp, folder_path FROM batches ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        return self.load_batch(row)
+
+    def get_last_batch(self, folder_path):
+        """Retorna o último lote executado na pasta"""
+        row = self.connection.execute(
+            "SELECT id, timestamp, folder_path FROM batches WHERE folder_path = ? ORDER BY id DESC LIMIT 1",
+            (folder_path,)
+        ).fetchone()
+        return self.load_batch(row)
+
+    def get_previous_name(self, folder_path, file_name):
+        """Retorna o nome que o arquivo tinha antes da última renomeação na pasta"""
+        row = self.connection.execute(
+            "SELECT o.original_name FROM operations o JOIN batches b ON b.id = o.batch_id "
+            "WHERE o.new_name = ? AND b.folder_path = ? ORDER BY b.id DESC LIMIT 1",
+            (file_name, folder_path)
+        ).fetchone()
+        return row["original_name"] if row else None
+
+    def get_batches_between(self, start_timestamp, end_timestamp):
+        """Retorna os lotes (sem as operações) executados no intervalo de datas"""
+        rows = self.connection.execute(
+            "SELECT id, timestamp, folder_path FROM batches "
+            "WHERE timestamp BETWEEN ? AND ? ORDER BY timestamp",
+            (start_timestamp, end_timestamp)
+        )
+        return [dict(row) for row in rows]
+
+    def get_operation_count(self):
+        """Retorna o número de lotes no histórico"""
+        return self.connection.execute("SELECT COUNT(*) FROM batches").fetchone()[0]
+
+    def remove_last_operation(self):
+        """Remove a última operação do histórico"""
+        try:
+            with self.connection:
+                cursor = self.connection.execute(
+                    "DELETE FROM batches WHERE id = (SELECT MAX(id) FROM batches)"
+                )
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Erro ao salvar histórico: {str(e)}")
+            return False
+
+    def replace_last_operation(self, operations):
+        """Substitui as operações do último lote, mantendo data e pasta"""
+        try:
+            with self.connection:
+                row = self.connection.execute("SELECT MAX(id) FROM batches").fetchone()
+                if row[0] is None:
+                    return False
+                self.connection.execute("DELETE FROM operations WHERE batch_id = ?", (row[0],))
+                self.insert_operations(row[0], operations)
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar histórico: {str(e)}")
+            return False
+
+    def clear_history(self):
+        """Limpa todo o histórico"""
+        try:
+            with self.connection:
+                self.connection.execute("DELETE FROM batches")
+        except Exception as e:
+            print(f"Erro ao salvar histórico: {str(e)}")
+
+    def compact(self):
+        """Devolve ao sistema o espaço de registros removidos"""
+        try:
+            self.connection.execute("VACUUM")
+        except Exception as e:
+            print(f"Erro ao compactar histórico: {str(e)}")
+
+    def close(self):
+        """Fecha a conexão com o banco"""
+        self.connection.close()
@@ -0,0 +1,100 @@
+import codecs
+import mmap
+
+# Bytes lidos do início (e do fim, nos logs) para a visualização e a detecção
+HEAD_BYTES = 8192
+TAIL_BYTES = 8192
+MAX_CHARS = 2000
+
+# BOMs conhecidos; os de UTF-32 vêm antes porque começam como os de UTF-16
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+# Caracteres de controle comuns em texto
+TEXT_CONTROL_BYTES = frozenset(b'\t\n\r\f\b\x1b')
+
+def sniff_encoding(sample):
+    """Retorna (codificação, tamanho do BOM) de uma amostra do início do arquivo, ou
+    (None, 0) se o conteúdo parecer binário"""
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    if not sample:
+        return 'utf-8', 0
+
+    zeros = sample.count(0)
+    if zeros:
+        # UTF-16 sem BOM: texto latino tem um byte nulo em cada par, sempre do mesmo lado
+        even_zeros = sample[0::2].count(0)
+        odd_zeros = zeros - even_zeros
+        pairs = len(sample) // 2
+        if pairs and odd_zeros > pairs * 0.3 and even_zeros < pairs * 0.05:
+            return 'utf-16-le', 0
+        if pairs and even_zeros > pairs * 0.3 and odd_zeros < pairs * 0.05:
+            return 'utf-16-be', 0
+        return None, 0
+
+    control = sum(1 for byte in sample if byte < 32 and byte not in TEXT_CONTROL_BYTES)
+    if control > len(sample) * 0.1:
+        return None, 0
+
+    # A amostra pode terminar no meio de um caractere: o decodificador incremental
+    # só reclama de sequências inválidas, não de incompletas
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8', 0
+    except UnicodeDecodeError:
+        # Arquivos gerados no Windows costumam estar em cp1252
+        return 'cp1252', 0
+
+def char_width(encoding):
+    """Tamanho da unidade de código da codificação, para alinhar leituras no meio do arquivo"""
+    if encoding.startswith('utf-32'):
+        return 4
+    if encoding.startswith('utf-16'):
+        return 2
+    return 1
+
+def decode_sample(data, encoding):
+    """Decodifica uma amostra que pode ter um caractere cortado no fim"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    return decoder.decode(data, final=False)
+
+def read_text_preview(file_path, file_size, include_tail=False):
+    """Retorna o início do arquivo e, se pedido, o fim; ou None se o conteúdo for binário
+
+    O arquivo é mapeado em memória e só as amostras são lidas, então o custo não
+    depende do tamanho do arquivo."""
+    if file_size == 0:
+        return ""
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            head = data[:HEAD_BYTES]
+            encoding, bom_size = sniff_encoding(head)
+            if encoding is None:
+                return None
+            content = decode_sample(head[bom_size:], encoding)[:MAX_CHARS]
+            if file_size <= len(head) and len(content) < MAX_CHARS:
+                return content
+
+            tail = ""
+            # O tamanho mapeado vale mais que o do stat se o arquivo mudou desde então
+            if include_tail and len(data) > HEAD_BYTES + TAIL_BYTES:
+                width = char_width(encoding)
+                # O início da amostra do fim é alinhado à unidade de código depois do BOM
+                start = len(data) - TAIL_BYTES
+                start -= (start - bom_size) % width
+                tail = decode_sample(data[start:], encoding)[-MAX_CHARS:]
+                # A primeira linha da amostra costuma estar cortada
+                newline = tail.find("\n")
+                if newline != -1:
+                    tail = tail[newline + 1:]
+
+    if tail:
+        return f"{content}\n\n[...] Arquivo truncado ({file_size} bytes). Final do arquivo:\n\n{tail}"
+    return f"{content}\n\n[...] Arquivo truncado. Mostrando os primeiros {len(content)} caracteres de {file_size} bytes."
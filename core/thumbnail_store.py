@@ -0,0 +1,143 @@
+import hashlib
+import os
+import threading
+from PyQt5.QtCore import QUrl
+from PyQt5.QtGui import QImage
+
+# Tamanhos fixos das miniaturas (lado maior), como nas pastas da especificação freedesktop
+THUMBNAIL_SIZES = ((256, "large"), (1024, "xx-large"))
+
+class ThumbnailStore:
+    """Miniaturas em PNG gravadas em disco e reaproveitadas entre sessões"""
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # Total ocupado em disco; calculado na primeira gravação
+        self.current_bytes = None
+        # Caminhos das miniaturas gravadas, listados uma vez; as renomeações consultam este
+        # conjunto e só tocam o disco quando o arquivo tem miniatura
+        self._stored_paths = None
+        self._lock = threading.Lock()
+
+    def thumbnail_size(self, max_width, max_height):
+        """Retorna o menor tamanho fixo que cobre a visualização pedida, ou None"""
+        for size, directory in THUMBNAIL_SIZES:
+            if size >= max(max_width, max_height):
+                return size
+        return None
+
+    def thumbnail_path(self, file_path, stat, size):
+        """Caminho da miniatura: hash do URI do arquivo, do tamanho e do mtime"""
+        return self.make_thumbnail_path(file_path, stat.st_size, stat.st_mtime_ns, size)
+
+    def make_thumbnail_path(self, file_path, file_size, mtime_ns, size):
+        """Caminho da miniatura a partir do tamanho e do mtime (em ns) do arquivo"""
+        uri = QUrl.fromLocalFile(os.path.abspath(file_path)).toString()
+        key = f"{uri}\0{file_size}\0{mtime_ns}"
+        directory = dict(THUMBNAIL_SIZES)[size]
+        return os.path.join(self.cache_dir, directory, hashlib.md5(key.encode('utf-8')).hexdigest() + ".png")
+
+    def load(self, file_path, stat, size):
+        """Retorna (miniatura, mensagem) gravada para o arquivo ou None"""
+        thumbnail_path = self.thumbnail_path(file_path, stat, size)
+        image = QImage(thumbnail_path)
+        if image.isNull():
+            return None
+        try:
+            # O mtime da miniatura marca o último uso para a coleta de lixo
+            os.utime(thumbnail_path)
+        except OSError:
+            pass
+        return image, image.text("Description") or None
+
+    def save(self, file_path, stat, size, image, message=None):
+        """Grava a miniatura de forma atômica (arquivo temporário + os.replace)"""
+        thumbnail_path = self.thumbnail_path(file_path, stat, size)
+        temp_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+            # Metadados da especificação, para identificar a origem da miniatura
+            image = QImage(image)
+            image.setText("Thumb::URI", QUrl.fromLocalFile(os.path.abspath(file_path)).toString())
+            image.setText("Thumb::MTime", str(int(stat.st_mtime)))
+            image.setText("Thumb::Size", str(stat.st_size))
+            if message:
+                image.setText("Description", message)
+            if not image.save(temp_path, "PNG"):
+                raise Exception("falha ao codificar PNG")
+            os.replace(temp_path, thumbnail_path)
+            with self._lock:
+                self.stored_paths().add(thumbnail_path)
+            self.account(os.path.getsize(thumbnail_path))
+        except Exception as e:
+            print(f"Erro ao gravar miniatura: {str(e)}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def stored_paths(self):
+        """Retorna o conjunto de miniaturas gravadas (deve ser chamado com a trava)"""
+        if self._stored_paths is None:
+            self._stored_paths = {path for path, size, mtime in self.list_thumbnails()}
+        return self._stored_paths
+
+    def rename(self, old_path, new_path, file_size, mtime_ns):
+        """Transfere as miniaturas de um arquivo renomeado, cujo conteúdo não mudou"""
+        for size, directory in THUMBNAIL_SIZES:
+            old_thumbnail = self.make_thumbnail_path(old_path, file_size, mtime_ns, size)
+            with self._lock:
+                stored = self.stored_paths()
+                # A maioria dos arquivos renomeados nunca foi visualizada
+                if old_thumbnail not in stored:
+                    continue
+                stored.discard(old_thumbnail)
+            new_thumbnail = self.make_thumbnail_path(new_path, file_size, mtime_ns, size)
+            try:
+                os.replace(old_thumbnail, new_thumbnail)
+            except OSError:
+                # A miniatura foi apagada por fora
+                continue
+            with self._lock:
+                stored.add(new_thumbnail)
+
+    def account(self, added_bytes):
+        """Soma uma gravação ao total e coleta o lixo se o limite foi ultrapassado"""
+        with self._lock:
+            if self.current_bytes is None:
+                self.current_bytes = sum(size for path, size, mtime in self.list_thumbnails())
+            else:
+                self.current_bytes += added_bytes
+            if self.current_bytes > self.max_bytes:
+                self.collect_garbage()
+
+    def list_thumbnails(self):
+        """Retorna (caminho, tamanho, mtime) de todas as miniaturas gravadas"""
+        thumbnails = []
+        for size, directory in THUMBNAIL_SIZES:
+            try:
+                with os.scandir(os.path.join(self.cache_dir, directory)) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".png"):
+                            stat = entry.stat()
+                            thumbnails.append((entry.path, stat.st_size, stat.st_mtime))
+            except OSError:
+                continue
+        return thumbnails
+
+    def collect_garbage(self):
+        """Apaga as miniaturas menos usadas até ocupar 80% do limite (chamado com a trava)"""
+        thumbnails = sorted(self.list_thumbnails(), key=lambda thumbnail: thumbnail[2])
+        total = sum(thumbnail[1] for thumbnail in thumbnails)
+        target = self.max_bytes * 0.8
+        for path, size, mtime in thumbnails:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+            self.stored_paths().discard(path)
+        self.current_bytes = total
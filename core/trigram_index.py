@@ -0,0 +1,236 @@
+import re
+import threading
+from collections import Counter
+
+from core.search_index import fold_name
+
+# Palavras dos nomes: letras e dígitos; "_", "-", "." e espaços separam as palavras
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+def word_trigrams(word):
+    """Retorna os trigramas de uma palavra, com espaços marcando início e fim"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """Índice de busca aproximada por trigramas das palavras dos nomes"""
+
+    def __init__(self, min_similarity=0.4):
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._generation = 0
+        # O índice só existe depois da primeira reconstrução; desligado, as atualizações
+        # incrementais são ignoradas e a busca retorna None
+        self._enabled = False
+        self._ready = False
+        # Operações recebidas durante uma reconstrução, reaplicadas ao final dela
+        self._pending = []
+        self.reset_structures()
+
+    def reset_structures(self):
+        """Cria estruturas vazias"""
+        # chave -> palavras do nome; é a referência para descartar entradas antigas
+        self._words_by_key = {}
+        # palavra -> chaves dos nomes que a contêm (entradas removidas ficam até a compactação)
+        self._keys_by_word = {}
+        # trigrama -> palavras que o contêm (só palavras com letras)
+        self._words_by_trigram = {}
+        self._stale = 0
+
+    def rebuild(self, items, background=True):
+        """Reconstrói o índice a partir de pares (chave, nome)"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._enabled = True
+            self._ready = False
+            self._pending = []
+        if background:
+            # A montagem não bloqueia a interface; até terminar, search retorna None
+            threading.Thread(target=self.build, args=(items, generation), daemon=True).start()
+        else:
+            self.build(items, generation)
+
+    def clear(self):
+        """Descarta o índice e desliga as atualizações até a próxima reconstrução"""
+        with self._lock:
+            # Uma montagem em andamento não é mais instalada
+            self._generation += 1
+            self._enabled = False
+            self._ready = False
+            self._pending = []
+            self.reset_structures()
+
+    def build(self, items, generation):
+        """Monta as estruturas novas e as instala se nenhuma reconstrução mais nova começou"""
+        words_by_key = {}
+        keys_by_word = {}
+        try:
+            for key, name in items:
+                words = tuple(set(WORD_PATTERN.findall(fold_name(name))))
+                words_by_key[key] = words
+                for word in words:
+                    keys = keys_by_word.get(word)
+                    if keys is None:
+                        keys_by_word[word] = [key]
+                    else:
+                        keys.append(key)
+        except Exception as e:
+            print(f"Erro ao montar índice de busca: {str(e)}")
+            return
+        words_by_trigram = {}
+        for word in keys_by_word:
+            self.index_word(word, words_by_trigram)
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._words_by_key = words_by_key
+            self._keys_by_word = keys_by_word
+            self._words_by_trigram = words_by_trigram
+            self._stale = 0
+            for operation, key, name in self._pending:
+                if operation == "add":
+                    self.apply_add(key, name)
+                else:
+                    self.apply_remove(key)
+            self._pending = []
+            self._ready = True
+
+    def index_word(self, word, words_by_trigram):
+        """Acrescenta uma palavra nova ao índice de trigramas"""
+        # Números não têm erro de digitação provável e são buscados por trecho
+        if word.isdigit():
+            return
+        for trigram in word_trigrams(word):
+            words = words_by_trigram.get(trigram)
+            if words is None:
+                words_by_trigram[trigram] = [word]
+            else:
+                words.append(word)
+
+    def is_enabled(self):
+        """Indica se o índice está ligado (montado ou em montagem)"""
+        return self._enabled
+
+    def is_ready(self):
+        """Indica se o índice está montado"""
+        return self._ready
+
+    def add(self, key, name):
+        """Indexa (ou reindexa) o nome de uma chave"""
+        with self._lock:
+            if not self._enabled:
+                return
+            if self._ready:
+                self.apply_add(key, name)
+            else:
+                self._pending.append(("add", key, name))
+
+    def remove(self, key):
+        """Retira uma chave do índice"""
+        with self._lock:
+            if not self._enabled:
+                return
+            if self._ready:
+                self.apply_remove(key)
+            else:
+                self._pending.append(("remove", key, None))
+
+    def rename(self, old_key, new_key, name):
+        """Atualiza o índice após uma renomeação"""
+        self.remove(old_key)
+        self.add(new_key, name)
+
+    def apply_add(self, key, name):
+        """Indexa uma chave (chamado com a trava)"""
+        if key in self._words_by_key:
+            self.apply_remove(key)
+        words = tuple(set(WORD_PATTERN.findall(fold_name(name))))
+        self._words_by_key[key] = words
+        for word in words:
+            keys = self._keys_by_word.get(word)
+            if keys is None:
+                self._keys_by_word[word] = [key]
+                self.index_word(word, self._words_by_trigram)
+            else:
+                keys.append(key)
+
+    def apply_remove(self, key):
+        """Retira uma chave (chamado com a trava)"""
+        words = self._words_by_key.pop(key, None)
+        if words is None:
+            return
+        # As listas de chaves não são percorridas: a entrada fica e é ignorada na busca
+        self._stale += len(words)
+        if self._stale > len(self._words_by_key) * 2 + 1000:
+            self.compact()
+
+    def compact(self):
+        """Reconstrói as listas de chaves sem as entradas removidas"""
+        keys_by_word = {}
+        for key, words in self._words_by_key.items():
+            for word in words:
+                keys = keys_by_word.get(word)
+                if keys is None:
+                    keys_by_word[word] = [key]
+                else:
+                    keys.append(key)
+        words_by_trigram = {}
+        for word in keys_by_word:
+            self.index_word(word, words_by_trigram)
+        self._keys_by_word = keys_by_word
+        self._words_by_trigram = words_by_trigram
+        self._stale = 0
+
+    def match_word(self, query_word):
+        """Retorna as palavras do índice parecidas com a palavra buscada e a similaridade"""
+        if len(query_word) < 3 or query_word.isdigit():
+            # Palavras curtas e números não formam trigramas úteis: vale o trecho
+            return {
+                word: 1.0 if word == query_word else 0.9 if word.startswith(query_word) else 0.8
+                for word in self._keys_by_word if query_word in word
+            }
+        query_trigrams = word_trigrams(query_word)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._words_by_trigram.get(trigram, ()))
+        matches = {}
+        for word, count in shared.items():
+            # Jaccard entre os conjuntos de trigramas (uma palavra de n letras tem n+1)
+            similarity = count / (len(query_trigrams) + len(word) + 1 - count)
+            if query_word in word:
+                # Quem ainda está digitando deve achar a palavra completa
+                similarity = max(similarity, 0.9 if word.startswith(query_word) else 0.8)
+            if similarity >= self.min_similarity:
+                matches[word] = similarity
+        return matches
+
+    def search(self, query, limit=None):
+        """Retorna as chaves ordenadas pela semelhança com a busca ou None"""
+        query_words = WORD_PATTERN.findall(fold_name(query))
+        if not query_words:
+            return None
+        with self._lock:
+            if not self._ready:
+                return None
+            words_by_key = self._words_by_key
+            word_matches = [self.match_word(word) for word in query_words]
+            # Começa pela palavra com menos ocorrências; as demais só pontuam os candidatos
+            word_matches.sort(key=lambda matches: sum(
+                len(self._keys_by_word[word]) for word in matches
+            ))
+            scores = {}
+            for word, similarity in word_matches[0].items():
+                for key in self._keys_by_word[word]:
+                    if scores.get(key, 0) < similarity and word in words_by_key.get(key, ()):
+                        scores[key] = similarity
+            for matches in word_matches[1:]:
+                next_scores = {}
+                for key, score in scores.items():
+                    best = max((matches.get(word, 0) for word in words_by_key[key]), default=0)
+                    if best:
+                        next_scores[key] = score + best
+                scores = next_scores
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        return ranked[:limit] if limit else ranked
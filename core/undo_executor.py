@@ -0,0 +1,111 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from core.rename_planner import RenamePlanner
+from core.rename_worker import RenameWorker
+
+class UndoWorker(RenameWorker):
+    """Desfaz um lote do histórico verificando os arquivos e renomeando cadeias em paralelo"""
+
+    def __init__(self, file_manager, operations, max_workers=8, progress_interval=0.1):
+        super().__init__(file_manager, None, None, progress_interval)
+        self.operations = operations
+        self.max_workers = max_workers
+        self.planner = RenamePlanner()
+
+    def verify_operation(self, operation):
+        """Confere com um único stat se o arquivo ainda é o que foi renomeado"""
+        new_name = operation["new_name"]
+        try:
+            stat = os.stat(os.path.join(self.file_manager.folder_path, new_name))
+        except OSError:
+            return f"'{new_name}' não foi encontrado"
+        fingerprint = operation.get("fingerprint")
+        if fingerprint:
+            size, mtime, inode = fingerprint
+            if stat.st_size != size or stat.st_mtime_ns != mtime or (inode and stat.st_ino != inode):
+                return f"'{new_name}' foi alterado depois da renomeação"
+        return None
+
+    def run_chain(self, chain):
+        """Executa uma cadeia inversa e retorna (nomes restaurados, passos, erros)"""
+        restored = []
+        error_details = []
+        for index, step in enumerate(chain):
+            try:
+                # As origens já foram conferidas pelo stat da verificação (ou são o nome
+                # temporário criado pela própria cadeia) e os.rename falha se sumirem
+                self.file_manager.rename_file(step.source, step.target, check_source=False)
+                if step.original_name is not None:
+                    restored.append(step.original_name)
+            except Exception as e:
+                source = step.original_name or step.source
+                target = step.new_name or step.target
+                error_details.append(f"Erro ao desfazer renomeação de '{source}' para '{target}': {str(e)}")
+                if chain[0].original_name is None:
+                    rolled_back = self.rollback_cycle(chain, index, error_details)
+                    if rolled_back:
+                        del restored[-rolled_back:]
+                return restored, len(chain), error_details
+        return restored, len(chain), error_details
+
+    def run(self):
+        """Verifica e desfaz as operações fora da thread da interface"""
+        start_time = time.monotonic()
+        restored = set()
+        processed = 0
+        error_details = []
+        skipped = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Verificação: um stat por arquivo, todos em paralelo
+            reasons = executor.map(self.verify_operation, self.operations, chunksize=256)
+            reverse_operations = []
+            for operation, reason in zip(self.operations, reasons):
+                if reason is None:
+                    reverse_operations.append((operation["new_name"], operation["original_name"]))
+                else:
+                    skipped.append(reason)
+
+            # Cadeias diferentes não compartilham nomes e podem rodar ao mesmo tempo; a
+            # ordem dentro de cada cadeia (e o nome temporário dos ciclos) é preservada
+            chains = self.planner.plan(reverse_operations)
+            total = sum(len(chain) for chain in chains)
+            pending = set()
+            next_chain = 0
+            last_emit = start_time
+            # Só um número limitado de cadeias fica na fila para o cancelamento ter efeito
+            max_pending = self.max_workers * 4
+            while next_chain < len(chains) or pending:
+                while next_chain < len(chains) and len(pending) < max_pending and not self._cancel_requested:
+                    pending.add(executor.submit(self.run_chain, chains[next_chain]))
+                    next_chain += 1
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chain_restored, chain_steps, chain_errors = future.result()
+                    restored.update(chain_restored)
+                    processed += chain_steps
+                    error_details.extend(chain_errors)
+
+                now = time.monotonic()
+                if now - last_emit >= self.progress_interval:
+                    last_emit = now
+                    self.emit_progress(processed, total, now - start_time)
+
+        elapsed = time.monotonic() - start_time
+        self.emit_progress(processed, total, elapsed)
+        # O que foi pulado, falhou ou não chegou a rodar (cancelamento) continua no histórico
+        remaining = [operation for operation in self.operations if operation["new_name"] not in restored]
+        self.finished.emit({
+            "restored": len(restored),
+            "remaining": remaining,
+            "errors": error_details,
+            "skipped": skipped,
+            "processed": processed,
+            "total": total,
+            "cancelled": self._cancel_requested,
+            "elapsed": elapsed
+        })
@@ -0,0 +1,126 @@
+import os
+
+import pytest
+
+from core.csv_index import CSVRowIndex
+
+@pytest.fixture
+def write_csv(tmp_path):
+    def write(data, name="nomes.csv"):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return str(path)
+    return write
+
+def load(path):
+    index = CSVRowIndex(path)
+    try:
+        return list(index)
+    finally:
+        index.close()
+
+def save_and_reopen(index, tmp_path):
+    """Grava o índice em um arquivo novo e retorna os nomes relidos dele"""
+    target = str(tmp_path / "gravado.csv")
+    starts = index.save(target)
+    reopened = CSVRowIndex(target)
+    try:
+        assert list(reopened._starts) == list(starts)
+        return list(reopened)
+    finally:
+        reopened.close()
+
+def test_simple_lines(write_csv):
+    assert load(write_csv(b"ana\nbruno\ncarla\n")) == ["ana", "bruno", "carla"]
+
+def test_last_line_without_newline(write_csv):
+    assert load(write_csv(b"ana\r\nbruno")) == ["ana", "bruno"]
+
+def test_empty_file(write_csv):
+    index = CSVRowIndex(write_csv(b""))
+    assert len(index) == 0
+    assert list(index) == []
+
+def test_utf8_bom_is_not_part_of_first_name(write_csv):
+    assert load(write_csv("﻿José\nMaria\n".encode('utf-8'))) == ["José", "Maria"]
+
+def test_only_first_column_is_read(write_csv):
+    assert load(write_csv(b"ana,1\nbruno,2\n")) == ["ana", "bruno"]
+
+def test_quoted_fields_with_commas_and_newlines(write_csv):
+    data = b'"silva, ana",x\n"linha\nquebrada"\n"aspas ""duplas"""\n'
+    assert load(write_csv(data)) == ["silva, ana", "linha\nquebrada", 'aspas "duplas"']
+
+def test_blank_lines_are_skipped(write_csv):
+    assert load(write_csv(b"\nana\n\n\r\nbruno\n\n")) == ["ana", "bruno"]
+
+def test_cr_only_lines(write_csv):
+    index = CSVRowIndex(write_csv(b"ana\rbruno\r\"c,d\"\r"))
+    assert list(index) == ["ana", "bruno", "c,d"]
+    assert index.line_terminator == '\r'
+
+def test_cp1252_file_falls_back_from_utf8(write_csv):
+    index = CSVRowIndex(write_csv("José\nConceição\n".encode('cp1252')))
+    assert index.encoding == 'cp1252'
+    assert list(index) == ["José", "Conceição"]
+
+def test_invalid_bytes_never_raise(write_csv):
+    # 0x81 não tem caractere no cp1252: a leitura troca o byte em vez de falhar
+    assert load(write_csv(b"a\x81b\n")) == ["a�b"]
+
+def test_edits_moves_and_removals(write_csv):
+    index = CSVRowIndex(write_csv(b"a\nb\nc\nd\n"))
+    index.move(0, 3)
+    index.swap(0, 1)
+    index[1] = "novo"
+    index.insert(0, "primeiro")
+    assert index.pop(-1) == "a"
+    assert list(index) == ["primeiro", "c", "novo", "d"]
+    assert index[-1] == "d"
+    with pytest.raises(IndexError):
+        index[4]
+
+def test_save_without_changes_copies_file(write_csv, tmp_path):
+    data = b"ana\r\n\"silva, bruno\"\r\ncarla\r\n"
+    index = CSVRowIndex(write_csv(data))
+    assert save_and_reopen(index, tmp_path) == ["ana", "silva, bruno", "carla"]
+    assert (tmp_path / "gravado.csv").read_bytes() == data
+
+def test_save_with_changes(write_csv, tmp_path):
+    index = CSVRowIndex(write_csv("﻿ana\nbruno\ncarla".encode('utf-8')))
+    index.move(2, 0)
+    index[1] = "nome, com vírgula"
+    assert save_and_reopen(index, tmp_path) == ["carla", "nome, com vírgula", "bruno"]
+
+def test_save_keeps_other_columns_of_edited_rows(write_csv, tmp_path):
+    # Modo por chave: editar o nome antigo não pode apagar o novo nome
+    index = CSVRowIndex(write_csv(b'old_name,new_name\nA.jpg,B\nC.jpg,"D, E"\n'))
+    index[1] = "A2.jpg"
+    index[1] = "A3.jpg"
+    index[2] = "C2.jpg"
+    index.insert(3, "F.jpg")
+    save_and_reopen(index, tmp_path)
+    assert (tmp_path / "gravado.csv").read_bytes() == b'old_name,new_name\nA3.jpg,B\nC2.jpg,"D, E"\nF.jpg\n'
+
+def test_save_keeps_encoding_and_line_terminator(write_csv, tmp_path):
+    index = CSVRowIndex(write_csv("José\rMaria\r".encode('cp1252')))
+    index[1] = "Conceição"
+    save_and_reopen(index, tmp_path)
+    assert (tmp_path / "gravado.csv").read_bytes() == "José\rConceição\r".encode('cp1252')
+
+def test_save_rejects_name_outside_file_encoding(write_csv, tmp_path):
+    index = CSVRowIndex(write_csv("José\n".encode('cp1252')))
+    index[0] = "日本"
+    with pytest.raises(Exception, match="não pode ser gravado"):
+        index.save(str(tmp_path / "gravado.csv"))
+
+def test_replace_file_reuses_saved_index(write_csv, tmp_path):
+    path = write_csv(b"a\nb\n")
+    index = CSVRowIndex(path)
+    index.insert(1, "meio")
+    temp_path = path + ".tmp"
+    index.replace_file(temp_path, index.save(temp_path))
+    assert list(index) == ["a", "meio", "b"]
+    assert not os.path.exists(temp_path)
+    index.close()
+    assert load(path) == ["a", "meio", "b"]
@@ -0,0 +1,111 @@
+import os
+import shutil
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+
+from core.file_manager import FileManager
+from core.folder_watcher import FolderWatcher
+
+def touch(folder, *names):
+    for name in names:
+        path = os.path.join(folder, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(name)
+
+def path(*parts):
+    return os.path.join(*parts)
+
+def load_tree(folder, max_depth=None):
+    file_manager = FileManager()
+    file_manager.set_recursive(True, max_depth)
+    file_manager.open_folder(str(folder))
+    return file_manager
+
+def assert_matches_full_load(folder, file_manager):
+    """O estado após a sincronização parcial é o mesmo de uma leitura completa"""
+    reference = load_tree(folder, file_manager.max_depth)
+    assert sorted(file_manager.folder_files) == sorted(reference.folder_files)
+    assert sorted(file_manager.folder_directories) == sorted(reference.folder_directories)
+    assert file_manager.existing_names == reference.existing_names
+
+@pytest.fixture
+def tree(tmp_path):
+    touch(tmp_path, "r.txt", path("a", "x.txt"), path("a", "b", "y.txt"), path("c", "z.txt"))
+    return tmp_path
+
+def test_recursive_load_is_in_preorder(tree):
+    file_manager = load_tree(tree)
+    assert file_manager.folder_files == ["r.txt", path("a", "x.txt"), path("a", "b", "y.txt"), path("c", "z.txt")]
+    assert sorted(file_manager.folder_directories) == ["a", path("a", "b"), "c"]
+
+def test_recursive_load_respects_max_depth(tree):
+    file_manager = load_tree(tree, max_depth=1)
+    assert file_manager.folder_files == ["r.txt", path("a", "x.txt"), path("c", "z.txt")]
+    assert path("a", "b") not in file_manager.folder_directories
+
+def test_sync_directories_lists_only_changed_folder(tree):
+    file_manager = load_tree(tree)
+    touch(tree, path("a", "novo.txt"), path("c", "fora.txt"))
+
+    added, removed = file_manager.sync_directories({"a"})
+
+    # "c" não foi relida: o arquivo novo dela só entra na sincronização dela
+    assert (added, removed) == ([path("a", "novo.txt")], [])
+    assert path("c", "fora.txt") not in file_manager.folder_files
+
+def test_sync_directories_removes_deleted_files(tree):
+    file_manager = load_tree(tree)
+    os.remove(os.path.join(tree, "a", "b", "y.txt"))
+    assert file_manager.sync_directories({path("a", "b")}) == ([], [path("a", "b", "y.txt")])
+    assert_matches_full_load(tree, file_manager)
+
+def test_sync_directories_walks_new_subtrees(tree):
+    file_manager = load_tree(tree)
+    touch(tree, path("d", "e", "q.txt"))
+    shutil.move(os.path.join(tree, "c"), os.path.join(tree, "a", "c2"))
+
+    added, removed = file_manager.sync_directories({"", "a"})
+
+    assert sorted(added) == [path("a", "c2", "z.txt"), path("d", "e", "q.txt")]
+    assert removed == [path("c", "z.txt")]
+    assert_matches_full_load(tree, file_manager)
+
+def test_sync_directories_drops_deleted_subtree(tree):
+    file_manager = load_tree(tree)
+    shutil.rmtree(os.path.join(tree, "a"))
+
+    # O evento da própria pasta apagada chega junto com o da pasta de cima
+    added, removed = file_manager.sync_directories({"", "a"})
+
+    assert added == []
+    assert sorted(removed) == [path("a", "b", "y.txt"), path("a", "x.txt")]
+    assert_matches_full_load(tree, file_manager)
+
+def test_sync_directories_respects_max_depth(tree):
+    file_manager = load_tree(tree, max_depth=1)
+    touch(tree, path("c", "d", "fundo.txt"))
+    assert file_manager.sync_directories({"c"}) == ([], [])
+    assert_matches_full_load(tree, file_manager)
+
+def test_watcher_syncs_changed_paths_in_recursive_mode(tree):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    file_manager = load_tree(tree)
+    watcher = FolderWatcher(file_manager)
+    watcher.watch(file_manager.folder_path)
+    assert len(watcher.watcher.directories()) == 4
+    changes = []
+    watcher.files_changed.connect(lambda added, removed: changes.append((added, removed)))
+
+    touch(tree, path("a", "b", "novo.txt"), path("f", "g.txt"))
+    watcher.schedule_sync(os.path.join(str(tree), "a", "b"))
+    watcher.schedule_sync(str(tree))
+    # Eventos de fora da pasta aberta (de uma pasta anterior) são ignorados
+    watcher.schedule_sync(os.path.dirname(str(tree)))
+    watcher.sync()
+
+    assert changes == [([path("a", "b", "novo.txt"), path("f", "g.txt")], [])]
+    # A subpasta nova passa a ser observada
+    assert os.path.join(str(tree), "f") in watcher.watcher.directories()
+    app.processEvents()
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+
+from core.file_manager import FileManager
+from core.folder_watcher import FolderWatcher
+
+@pytest.fixture(scope="module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+def touch(folder, *names):
+    for name in names:
+        with open(os.path.join(folder, name), 'w', encoding='utf-8') as f:
+            f.write(name)
+
+@pytest.fixture
+def file_manager(tmp_path):
+    touch(tmp_path, "a.jpg", "b.jpg", "c.txt")
+    file_manager = FileManager()
+    file_manager.open_folder(str(tmp_path))
+    return file_manager
+
+@pytest.fixture
+def watcher(app, file_manager):
+    watcher = FolderWatcher(file_manager)
+    watcher.watch(file_manager.folder_path)
+    watcher.changes = []
+    watcher.files_changed.connect(lambda added, removed: watcher.changes.append((added, removed)))
+    return watcher
+
+def test_sync_folder_files_applies_only_differences(tmp_path, file_manager):
+    info = file_manager.get_file_info("a.jpg")
+    os.remove(os.path.join(tmp_path, "b.jpg"))
+    touch(tmp_path, "d.jpg")
+
+    added, removed = file_manager.sync_folder_files()
+
+    assert (added, removed) == (["d.jpg"], ["b.jpg"])
+    assert file_manager.folder_files == ["a.jpg", "c.txt", "d.jpg"]
+    # Os arquivos já carregados mantêm seus registros; os novos ganham o seu
+    assert file_manager.get_file_info("a.jpg") is info
+    assert file_manager.get_file_info("d.jpg").size == len("d.jpg")
+    assert os.path.normcase("d.jpg") in file_manager.existing_names
+    assert os.path.normcase("b.jpg") not in file_manager.existing_names
+
+def test_sync_folder_files_respects_extension_filter(tmp_path, file_manager):
+    file_manager.load_folder_files("jpg")
+    touch(tmp_path, "e.txt", "f.JPG")
+    assert file_manager.sync_folder_files() == (["f.JPG"], [])
+
+def test_watcher_sync_emits_changes(tmp_path, file_manager, watcher):
+    touch(tmp_path, "novo.jpg")
+    watcher.schedule_sync(str(tmp_path))
+    assert watcher.timer.isActive()
+
+    watcher.sync()
+
+    assert watcher.changes == [(["novo.jpg"], [])]
+    assert "novo.jpg" in file_manager.folder_files
+
+def test_watcher_without_changes_emits_nothing(tmp_path, watcher):
+    watcher.schedule_sync(str(tmp_path))
+    watcher.sync()
+    assert watcher.changes == []
+
+def test_paused_watcher_keeps_changes_for_resume(tmp_path, file_manager, watcher):
+    watcher.pause()
+    os.remove(os.path.join(tmp_path, "a.jpg"))
+    watcher.schedule_sync(str(tmp_path))
+    assert not watcher.timer.isActive()
+
+    watcher.resume()
+    assert watcher.timer.isActive()
+    watcher.sync()
+
+    assert watcher.changes == [([], ["a.jpg"])]
+
+def test_watch_applies_only_path_differences(tmp_path, watcher):
+    assert watcher.watcher.directories() == [str(tmp_path)]
+    watcher.watch("")
+    assert watcher.watcher.directories() == []
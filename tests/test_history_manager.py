@@ -0,0 +1,152 @@
+import json
+import os
+
+import pytest
+
+from core.history_manager import HistoryManager, INDEX_RECORD
+
+def operations(*names):
+    return [{"original_name": name, "new_name": name + ".new"} for name in names]
+
+@pytest.fixture
+def history_file(tmp_path):
+    return str(tmp_path / "rename_history.json")
+
+def test_operations_survive_reopening(history_file):
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+    history.add_operation("pasta", operations("b", "c"))
+
+    reopened = HistoryManager(history_file)
+    assert reopened.get_operation_count() == 2
+    assert reopened.get_last_operation()["operations"] == operations("b", "c")
+    assert [entry["operations"] for entry in reopened.get_operations()] == [operations("a"), operations("b", "c")]
+
+def test_remove_last_operation_is_journaled(history_file):
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+    history.add_operation("pasta", operations("b"))
+    assert history.remove_last_operation()
+
+    reopened = HistoryManager(history_file)
+    assert reopened.get_operation_count() == 1
+    assert reopened.get_last_operation()["operations"] == operations("a")
+
+def test_empty_history(history_file):
+    history = HistoryManager(history_file)
+    assert history.get_operation_count() == 0
+    assert history.get_last_operation() is None
+    assert not history.remove_last_operation()
+
+def test_replay_records_missing_from_index(history_file):
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+    # Queda entre a gravação no diário e a atualização do índice
+    history.append_record({"timestamp": "t", "folder_path": "pasta", "operations": operations("b")})
+
+    reopened = HistoryManager(history_file)
+    assert reopened.get_operation_count() == 2
+    assert reopened.get_last_operation()["operations"] == operations("b")
+
+def test_replay_undo_missing_from_index(history_file):
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+    history.add_operation("pasta", operations("b"))
+    # O registro de desfazer chegou ao diário, mas o índice não foi truncado
+    history.append_record({"undo": True, "offset": history.read_last_offset()})
+
+    reopened = HistoryManager(history_file)
+    assert reopened.get_operation_count() == 1
+    assert reopened.get_last_operation()["operations"] == operations("a")
+
+def test_replace_last_operation_keeps_entry(history_file):
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+    history.add_operation("pasta", operations("b", "c"))
+    timestamp = history.get_last_operation()["timestamp"]
+    assert history.replace_last_operation(operations("c"))
+
+    reopened = HistoryManager(history_file)
+    assert reopened.get_operation_count() == 2
+    last_operation = reopened.get_last_operation()
+    assert last_operation == {"timestamp": timestamp, "folder_path": "pasta", "operations": operations("c")}
+    assert [entry["operations"] for entry in reopened.get_operations()] == [operations("a"), operations("c")]
+
+def test_replay_replacement_missing_from_index(history_file):
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+    history.add_operation("pasta", operations("b", "c"))
+    # A entrada substituta chegou ao diário, mas o índice ainda aponta para a antiga
+    history.append_record({"timestamp": "t", "folder_path": "pasta", "operations": operations("c"),
+                           "replaces": history.read_last_offset()})
+
+    reopened = HistoryManager(history_file)
+    assert [entry["operations"] for entry in reopened.get_operations()] == [operations("a"), operations("c")]
+    assert "replaces" not in reopened.get_last_operation()
+
+def test_torn_last_line_is_discarded(history_file):
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+    journal_size = os.path.getsize(history.journal_file)
+    with open(history.journal_file, 'ab') as f:
+        f.write(b'{"timestamp": "t", "folder_pa')
+
+    reopened = HistoryManager(history_file)
+    assert reopened.get_operation_count() == 1
+    assert os.path.getsize(history.journal_file) == journal_size
+
+def test_corrupted_index_is_rebuilt_from_journal(history_file):
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+    history.add_operation("pasta", operations("b"))
+    history.add_operation("pasta", operations("c"))
+    history.remove_last_operation()
+    with open(history.index_file, 'wb') as f:
+        f.write(b'\x00' * (INDEX_RECORD.size + 3))
+
+    reopened = HistoryManager(history_file)
+    assert [entry["operations"] for entry in reopened.get_operations()] == [operations("a"), operations("b")]
+
+def test_compact_drops_undone_operations(history_file):
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+    history.add_operation("pasta", operations("b"))
+    history.remove_last_operation()
+    history.add_operation("pasta", operations("c"))
+
+    history.compact()
+
+    with open(history.journal_file, 'rb') as f:
+        records = [json.loads(line) for line in f]
+    assert [record["operations"] for record in records] == [operations("a"), operations("c")]
+    reopened = HistoryManager(history_file)
+    assert [entry["operations"] for entry in reopened.get_operations()] == [operations("a"), operations("c")]
+
+def test_clear_history(history_file):
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+    history.clear_history()
+    assert HistoryManager(history_file).get_operation_count() == 0
+
+def test_legacy_history_is_imported(history_file):
+    legacy = [
+        {"timestamp": "t1", "folder_path": "pasta", "operations": operations("a")},
+        {"timestamp": "t2", "folder_path": "pasta", "operations": operations("b")},
+    ]
+    with open(history_file, 'w', encoding='utf-8') as f:
+        json.dump(legacy, f)
+
+    history = HistoryManager(history_file)
+    assert history.get_operations() == legacy
+
+def test_corrupted_legacy_history_still_creates_index(history_file):
+    with open(history_file, 'w', encoding='utf-8') as f:
+        f.write('{corrompido')
+
+    history = HistoryManager(history_file)
+    history.add_operation("pasta", operations("a"))
+
+    assert history.get_operation_count() == 1
+    reopened = HistoryManager(history_file)
+    assert reopened.get_operation_count() == 1
+    assert reopened.get_last_operation()["operations"] == operations("a")
@@ -0,0 +1,177 @@
+import os
+import random
+
+import pytest
+
+from core.rename_planner import RenamePlanner
+
+def run_chains(folder, chains):
+    """Executa as cadeias do plano na pasta, como o worker de renomeação"""
+    for chain in chains:
+        for step in chain:
+            target = os.path.join(folder, step.target)
+            assert not os.path.exists(target), f"o passo {step} sobrescreveria um arquivo"
+            os.rename(os.path.join(folder, step.source), target)
+
+def make_files(folder, names):
+    """Cria arquivos cujo conteúdo é o próprio nome"""
+    for name in names:
+        with open(os.path.join(folder, name), 'w', encoding='utf-8') as f:
+            f.write(name)
+
+def read_file(folder, name):
+    with open(os.path.join(folder, name), encoding='utf-8') as f:
+        return f.read()
+
+@pytest.fixture
+def planner():
+    return RenamePlanner()
+
+def test_plan_orders_path_from_free_target(planner):
+    chains = planner.plan([("a", "b"), ("b", "c")])
+    assert [[(step.source, step.target) for step in chain] for chain in chains] == [[("b", "c"), ("a", "b")]]
+
+def test_plan_skips_unchanged_names(planner):
+    assert planner.plan([("a", "a")]) == []
+
+def test_plan_swap_uses_single_temp_name(planner):
+    chains = planner.plan([("a", "b"), ("b", "a")])
+    assert len(chains) == 1
+    chain = chains[0]
+    # Um ciclo de k arquivos gasta k+1 renomeações
+    assert len(chain) == 3
+    assert chain[0].source == "a" and chain[0].original_name is None
+    assert chain[0].target.startswith(planner.temp_prefix)
+    assert chain[-1].source == chain[0].target
+    assert (chain[-1].original_name, chain[-1].new_name) == ("a", "b")
+
+def test_plan_keeps_temp_name_in_subfolder(planner):
+    chains = planner.plan([(os.path.join("sub", "a"), os.path.join("sub", "b")),
+                           (os.path.join("sub", "b"), os.path.join("sub", "a"))])
+    assert os.path.dirname(chains[0][0].target) == "sub"
+
+@pytest.mark.parametrize("seed", range(5))
+def test_plan_applies_random_permutation(tmp_path, planner, seed):
+    names = [f"file{i:02}.txt" for i in range(30)]
+    make_files(tmp_path, names)
+    shuffled = names[:]
+    random.Random(seed).shuffle(shuffled)
+    operations = list(zip(names, shuffled))
+
+    run_chains(tmp_path, planner.plan(operations))
+
+    assert sorted(os.listdir(tmp_path)) == sorted(names)
+    for old_name, new_name in operations:
+        assert read_file(tmp_path, new_name) == old_name
+
+def test_plan_applies_paths_and_cycles_together(tmp_path, planner):
+    make_files(tmp_path, ["a", "b", "c", "d"])
+    operations = [("a", "b"), ("b", "a"), ("c", "e"), ("d", "c")]
+
+    run_chains(tmp_path, planner.plan(operations))
+
+    assert sorted(os.listdir(tmp_path)) == ["a", "b", "c", "e"]
+    for old_name, new_name in operations:
+        assert read_file(tmp_path, new_name) == old_name
+
+def test_plan_uses_normalized_names(monkeypatch, planner):
+    # Simula um sistema que ignora maiúsculas
+    monkeypatch.setattr(os.path, "normcase", str.lower)
+    chains = planner.plan([("A.txt", "b.txt"), ("b.TXT", "a.txt")])
+    assert len(chains) == 1
+    assert chains[0][0].original_name is None
+    assert [step.new_name for step in chains[0][1:]] == ["a.txt", "b.txt"]
+
+def test_plan_routes_case_only_rename_through_temp_name(monkeypatch, planner):
+    monkeypatch.setattr(os.path, "normcase", str.lower)
+    chains = planner.plan([("a.txt", "A.txt")])
+    assert len(chains) == 1
+    chain = chains[0]
+    assert len(chain) == 2
+    assert chain[0].target.startswith(planner.temp_prefix)
+    assert (chain[1].source, chain[1].target) == (chain[0].target, "A.txt")
+
+@pytest.mark.parametrize("name, problem", [
+    ("", "nome vazio"),
+    ("   .txt", "nome vazio"),
+    (".jpg", "nome vazio"),
+    ("a?b.txt", "caracteres inválidos"),
+    ("a/b.txt", "caracteres inválidos"),
+    ("CON.txt", "nome reservado do sistema"),
+    ("lpt1.tar.gz", "nome reservado do sistema"),
+    ("nome.", "termina com espaço ou ponto"),
+    ("..", "termina com espaço ou ponto"),
+    ("a" * 256, "nome com mais de 255 caracteres"),
+])
+def test_check_name_rejects_invalid_names(planner, name, problem):
+    assert planner.check_name(name) == problem
+
+def test_check_name_accepts_valid_names(planner):
+    assert planner.check_name("relatório final (2).pdf") is None
+    assert planner.check_name("foto.2024.jpg") is None
+
+def test_build_plan_accepts_permutation_of_existing_names(planner):
+    plan = planner.build_plan("pasta", [("a", "b"), ("b", "a")], existing_names={"a", "b"})
+    assert plan.is_valid()
+    assert plan.count_steps() == 3
+
+def test_build_plan_rejects_duplicate_targets(planner):
+    plan = planner.build_plan("pasta", [("a", "c"), ("b", "c")])
+    assert len(plan.errors) == 1
+    assert "teriam o mesmo nome" in plan.errors[0]
+
+def test_build_plan_rejects_existing_target_that_is_not_renamed(planner):
+    plan = planner.build_plan("pasta", [("a", "b")], existing_names={"a", "b"})
+    assert not plan.is_valid()
+    assert "já existe" in plan.errors[0]
+
+def test_build_plan_rejects_moving_file_to_another_folder(planner):
+    plan = planner.build_plan("pasta", [(os.path.join("sub", "a"), os.path.join("sub", "..", "..", "a"))])
+    assert not plan.is_valid()
+
+def test_build_plan_rejects_long_paths(planner):
+    plan = planner.build_plan("p" * 5000, [("a", "b")])
+    assert "caminho com mais de" in plan.errors[0]
+
+def test_positional_plan_keeps_subfolder_and_extension(planner):
+    files = ["a.jpg", os.path.join("sub", "b.png")]
+    plan = planner.build_positional_plan("pasta", files, ["x", "y"])
+    assert plan.is_valid()
+    assert plan.operations == [("a.jpg", "x.jpg"), (os.path.join("sub", "b.png"), os.path.join("sub", "y.png"))]
+
+def test_positional_plan_rejects_path_traversal(planner):
+    files = [os.path.join("sub", "a.txt")]
+    plan = planner.build_positional_plan("pasta", files, [os.path.join("..", "..", "etc", "evil")])
+    assert not plan.is_valid()
+    assert plan.operations == []
+
+def test_positional_plan_warns_about_missing_names(planner):
+    plan = planner.build_positional_plan("pasta", ["a.txt", "b.txt"], ["x"])
+    assert plan.is_valid()
+    assert len(plan.warnings) == 1
+
+def test_keyed_plan_matches_by_name_and_stem(planner):
+    mapping = {"a.txt": (2, "x"), "b.txt": (3, "y.txt")}
+    plan = planner.build_keyed_plan("pasta", ["a.txt", "b.txt"], mapping)
+    assert plan.is_valid()
+    assert plan.operations == [("a.txt", "x.txt"), ("b.txt", "y.txt")]
+
+    plan = planner.build_keyed_plan("pasta", ["a.txt"], {"a": (2, "x")}, match_stem=True)
+    assert plan.operations == [("a.txt", "x.txt")]
+
+def test_keyed_plan_reports_unmatched_rows_and_duplicates(planner):
+    mapping = {"a.txt": (2, "x"), "z.txt": (3, "w")}
+    plan = planner.build_keyed_plan("pasta", ["a.txt", "b.txt"], mapping, duplicates=[(4, "a.txt")])
+    assert len(plan.warnings) == 2
+    assert plan.errors == ["Linha 4 do CSV: a chave 'a.txt' já apareceu em outra linha"]
+
+def test_keyed_plan_warns_about_incomplete_rows(planner):
+    plan = planner.build_keyed_plan("pasta", ["a.txt"], {"a.txt": (1, "x")}, incomplete_rows=[2, 5])
+    assert plan.is_valid()
+    assert plan.warnings == ["2 linha(s) do CSV sem a coluna da chave ou do novo nome: 2, 5"]
+
+def test_keyed_plan_rejects_path_traversal(planner):
+    mapping = {"a.txt": (2, os.path.join("..", "evil"))}
+    plan = planner.build_keyed_plan("pasta", [os.path.join("sub", "a.txt")], mapping)
+    assert not plan.is_valid()
+    assert plan.operations == []
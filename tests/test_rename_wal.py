@@ -0,0 +1,150 @@
+import os
+
+import pytest
+
+from core.rename_planner import RenamePlanner
+from core.rename_wal import RenameWAL
+
+def make_files(folder, names):
+    """Cria arquivos cujo conteúdo é o próprio nome"""
+    for name in names:
+        with open(os.path.join(folder, name), 'w', encoding='utf-8') as f:
+            f.write(name)
+
+def read_file(folder, name):
+    with open(os.path.join(folder, name), encoding='utf-8') as f:
+        return f.read()
+
+def file_info(folder, names):
+    """Impressões digitais (tamanho, mtime, inode), como as da listagem da pasta"""
+    info = {}
+    for name in names:
+        stat = os.stat(os.path.join(folder, name))
+        info[name] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    return info
+
+def steps(plan):
+    """Passos do plano na numeração do log"""
+    return [step for chain in plan.chains for step in chain]
+
+def execute(folder, plan, wal, count, record=True):
+    """Executa os primeiros passos do plano, registrando-os no log se pedido"""
+    for index, step in enumerate(steps(plan)[:count]):
+        os.rename(os.path.join(folder, step.source), os.path.join(folder, step.target))
+        if record:
+            wal.record_done(index)
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "pasta"
+    folder.mkdir()
+    return str(folder)
+
+@pytest.fixture
+def wal_file(tmp_path):
+    return str(tmp_path / "rename_batch.wal")
+
+def begin(folder, wal_file, operations):
+    """Abre um lote no log, com flush só no fechamento (simula uma queda entre descargas)"""
+    plan = RenamePlanner().build_plan(folder, operations)
+    names = [old_name for old_name, _ in operations]
+    wal = RenameWAL(wal_file, fsync_policy="never", flush_every=10 ** 6, flush_seconds=10 ** 6)
+    wal.begin(folder, plan, file_info(folder, names))
+    return plan, wal
+
+def test_load_pending_without_log_returns_none(wal_file):
+    assert RenameWAL(wal_file).load_pending() is None
+
+def test_commit_removes_log(folder, wal_file):
+    make_files(folder, ["a"])
+    plan, wal = begin(folder, wal_file, [("a", "b")])
+    execute(folder, plan, wal, 1)
+    wal.commit()
+    assert not os.path.exists(wal_file)
+
+def test_resolve_done_uses_recorded_steps(folder, wal_file):
+    make_files(folder, ["a", "b"])
+    plan, wal = begin(folder, wal_file, [("a", "b"), ("b", "c")])
+    execute(folder, plan, wal, 1)
+    wal.close()
+
+    batch = RenameWAL(wal_file).load_pending()
+    assert batch["done"] == {0}
+    assert RenameWAL(wal_file).resolve_done(batch) == {0}
+
+def test_resolve_done_finds_unrecorded_steps_on_disk(folder, wal_file):
+    make_files(folder, ["a", "b"])
+    plan, wal = begin(folder, wal_file, [("a", "b"), ("b", "c")])
+    # A queda aconteceu antes da descarga do log
+    execute(folder, plan, wal, 2, record=False)
+    wal.close()
+
+    batch = RenameWAL(wal_file).load_pending()
+    assert batch["done"] == set()
+    assert RenameWAL(wal_file).resolve_done(batch) == {0, 1}
+
+def test_resolve_done_uses_fingerprint_for_cycle_end(folder, wal_file):
+    make_files(folder, ["a", "bb"])
+    plan, wal = begin(folder, wal_file, [("a", "bb"), ("bb", "a")])
+    wal.close()
+    wal_reader = RenameWAL(wal_file)
+
+    # Antes do ciclo começar os nomes são os mesmos do fim do ciclo: só a impressão
+    # digital do arquivo diferencia os dois casos
+    batch = wal_reader.load_pending()
+    assert wal_reader.resolve_done(batch) == set()
+
+    execute(folder, plan, wal, 3, record=False)
+    assert wal_reader.resolve_done(batch) == {0, 1, 2}
+
+def test_load_pending_ignores_torn_last_line(folder, wal_file):
+    make_files(folder, ["a", "b"])
+    plan, wal = begin(folder, wal_file, [("a", "b"), ("b", "c")])
+    execute(folder, plan, wal, 1)
+    wal.close()
+    with open(wal_file, 'a', encoding='utf-8') as f:
+        f.write('{"type": "done", "ste')
+
+    batch = RenameWAL(wal_file).load_pending()
+    assert batch["done"] == {0}
+    assert len(batch["steps"]) == 2
+
+def test_roll_forward_completes_batch(folder, wal_file):
+    names = ["a", "b", "c", "d"]
+    make_files(folder, names)
+    operations = [("a", "b"), ("b", "a"), ("c", "e"), ("d", "c")]
+    plan, wal = begin(folder, wal_file, operations)
+    execute(folder, plan, wal, 2)
+    wal.close()
+
+    wal_reader = RenameWAL(wal_file)
+    operations_done, errors = wal_reader.roll_forward(wal_reader.load_pending())
+
+    assert errors == []
+    assert sorted((op["original_name"], op["new_name"]) for op in operations_done) == sorted(operations)
+    for old_name, new_name in operations:
+        assert read_file(folder, new_name) == old_name
+
+def test_rollback_restores_original_names(folder, wal_file):
+    names = ["a", "b", "c", "d"]
+    make_files(folder, names)
+    operations = [("a", "b"), ("b", "a"), ("c", "e"), ("d", "c")]
+    plan, wal = begin(folder, wal_file, operations)
+    execute(folder, plan, wal, 2)
+    # Um passo a mais foi executado, mas não chegou ao log
+    step = steps(plan)[2]
+    os.rename(os.path.join(folder, step.source), os.path.join(folder, step.target))
+    wal.close()
+
+    wal_reader = RenameWAL(wal_file)
+    restored, errors = wal_reader.rollback(wal_reader.load_pending())
+
+    assert errors == []
+    assert restored == 3
+    assert sorted(os.listdir(folder)) == names
+    for name in names:
+        assert read_file(folder, name) == name
+
+def test_invalid_fsync_policy_is_rejected(wal_file):
+    with pytest.raises(Exception):
+        RenameWAL(wal_file, fsync_policy="sometimes")
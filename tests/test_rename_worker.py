@@ -0,0 +1,64 @@
+import os
+
+from core.file_manager import FileManager
+from core.rename_planner import RenamePlanner
+from core.rename_worker import RenameWorker
+
+def make_files(folder, names):
+    """Cria arquivos cujo conteúdo é o próprio nome"""
+    for name in names:
+        with open(os.path.join(folder, name), 'w', encoding='utf-8') as f:
+            f.write(name)
+
+def read_file(folder, name):
+    with open(os.path.join(folder, name), encoding='utf-8') as f:
+        return f.read()
+
+def run_batch(folder, operations, before_run=None):
+    """Carrega a pasta, executa o lote no worker (na thread atual) e retorna o resultado"""
+    file_manager = FileManager()
+    file_manager.open_folder(str(folder))
+    plan = RenamePlanner().build_plan(str(folder), operations, file_manager.existing_names)
+    assert plan.is_valid()
+    if before_run:
+        before_run()
+    worker = RenameWorker(file_manager, plan)
+    results = []
+    worker.finished.connect(results.append)
+    worker.run()
+    return results[0], file_manager
+
+def test_worker_renames_cycle(tmp_path):
+    make_files(tmp_path, ["a", "b", "c"])
+    result, _ = run_batch(tmp_path, [("a", "b"), ("b", "c"), ("c", "a")])
+    assert result["errors"] == []
+    assert len(result["operations"]) == 3
+    assert [read_file(tmp_path, name) for name in ["a", "b", "c"]] == ["c", "a", "b"]
+
+def test_failed_cycle_rolls_back_completed_steps(tmp_path):
+    make_files(tmp_path, ["a", "b", "c"])
+    # Ciclo a->b->c->a: "b" some antes do lote e o passo b->c falha no meio do ciclo,
+    # depois de "c" já ter ocupado o nome original de "a"
+    result, file_manager = run_batch(tmp_path, [("a", "b"), ("b", "c"), ("c", "a")],
+                                     lambda: os.remove(os.path.join(tmp_path, "b")))
+
+    assert len(result["errors"]) == 1
+    assert result["operations"] == []
+    assert sorted(os.listdir(tmp_path)) == ["a", "c"]
+    assert read_file(tmp_path, "a") == "a"
+    assert read_file(tmp_path, "c") == "c"
+    assert not any(name.startswith(".batchrenamer-") for name in file_manager.folder_files)
+
+def test_cancel_between_chains(tmp_path):
+    make_files(tmp_path, ["a", "b"])
+    file_manager = FileManager()
+    file_manager.open_folder(str(tmp_path))
+    plan = RenamePlanner().build_plan(str(tmp_path), [("a", "x"), ("b", "y")], file_manager.existing_names)
+    worker = RenameWorker(file_manager, plan)
+    results = []
+    worker.finished.connect(results.append)
+    worker.cancel()
+    worker.run()
+    assert results[0]["cancelled"]
+    assert results[0]["operations"] == []
+    assert sorted(os.listdir(tmp_path)) == ["a", "b"]
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from core import search_index
+from core.search_index import SearchIndex, fold_name
+
+class CountingNames(list):
+    """Lista de nomes que conta quantos nomes foram lidos por fatias"""
+
+    def __init__(self, names):
+        super().__init__(names)
+        self.read = 0
+
+    def __getitem__(self, index):
+        items = super().__getitem__(index)
+        if isinstance(index, slice):
+            self.read += len(items)
+        return items
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(search_index, "KEY_CHUNK_SIZE", 3)
+
+def brute_force(names, query):
+    return [i for i, name in enumerate(names) if fold_name(query) in fold_name(name)]
+
+def test_fold_name_ignores_case_and_accents():
+    assert fold_name("Relatório ANUAL") == "relatorio anual"
+    assert fold_name("Straße") == "strasse"
+
+def test_search_matches_substrings():
+    index = SearchIndex()
+    index.set_names(["Relatório.pdf", "foto.jpg", "RELATORIO-2.pdf", "nota.txt"])
+    assert index.search("relato") == [0, 2]
+    assert index.search("") is None
+
+def test_refined_query_filters_previous_results():
+    names = ["abc", "abd", "xab", "zzz", "abcd"]
+    index = SearchIndex()
+    index.set_names(names)
+    assert index.search("ab") == [0, 1, 2, 4]
+    assert index.search("abc") == [0, 4]
+    # O resultado devolvido é uma cópia
+    index.search("abcd").append(99)
+    assert index.search("abcd") == [4]
+
+def test_keys_are_computed_only_on_search():
+    names = CountingNames(f"nome{i}" for i in range(10))
+    index = SearchIndex()
+    index.set_names(names)
+    assert names.read == 0
+    index.search("nome")
+    assert names.read == 10
+    index.search("outro")
+    assert names.read == 10
+
+def test_remove_recomputes_only_following_chunks():
+    names = CountingNames(f"nome{i}" for i in range(10))
+    index = SearchIndex()
+    index.set_names(names)
+    index.search("nome")
+    del names[7]
+    index.remove(7)
+    assert index.search("nome") == list(range(9))
+    # Só os blocos a partir do nome removido (posições 6 em diante) foram relidos
+    assert names.read == 10 + 3
+
+@pytest.mark.parametrize("seed", range(3))
+def test_changes_keep_results_consistent(seed):
+    rng = random.Random(seed)
+    names = [rng.choice(["ana", "bia", "ção", "Ané"]) + str(i) for i in range(20)]
+    index = SearchIndex()
+    index.set_names(names)
+    for _ in range(40):
+        action = rng.choice(["update", "remove", "swap", "search"])
+        if action == "update":
+            i = rng.randrange(len(names))
+            names[i] = rng.choice(["ANA", "cao", "bia"]) + "x"
+            index.update(i, names[i])
+        elif action == "remove" and len(names) > 1:
+            i = rng.randrange(len(names))
+            del names[i]
+            index.remove(i)
+        elif action == "swap":
+            i, j = rng.randrange(len(names)), rng.randrange(len(names))
+            names[i], names[j] = names[j], names[i]
+            index.swap(i, j)
+        query = rng.choice(["an", "ana", "cao", "bi", "x"])
+        assert index.search(query) == brute_force(names, query)
@@ -0,0 +1,49 @@
+import codecs
+
+import pytest
+
+from core.text_preview import HEAD_BYTES, MAX_CHARS, read_text_preview, sniff_encoding
+
+def write_file(tmp_path, data, name="arquivo.txt"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path), len(data)
+
+@pytest.mark.parametrize("sample, expected", [
+    (codecs.BOM_UTF8 + b"ola", ('utf-8', 3)),
+    (codecs.BOM_UTF16_LE + "ola".encode('utf-16-le'), ('utf-16-le', 2)),
+    (codecs.BOM_UTF32_LE + "ola".encode('utf-32-le'), ('utf-32-le', 4)),
+    ("relatório anual".encode('utf-16-le'), ('utf-16-le', 0)),
+    ("relatório anual".encode('utf-16-be'), ('utf-16-be', 0)),
+    ("ação".encode('utf-8'), ('utf-8', 0)),
+    ("ação".encode('cp1252'), ('cp1252', 0)),
+    # Caractere de vários bytes cortado no fim da amostra
+    ("ação".encode('utf-8')[:-2], ('utf-8', 0)),
+    (b"\x00\x01\x02\x03\xff\xd8\xff\xe0", (None, 0)),
+    (bytes(range(1, 32)) * 4, (None, 0)),
+])
+def test_sniff_encoding(sample, expected):
+    assert sniff_encoding(sample) == expected
+
+def test_small_file_is_returned_whole(tmp_path):
+    path, size = write_file(tmp_path, codecs.BOM_UTF8 + "linha 1\nção\n".encode('utf-8'))
+    assert read_text_preview(path, size) == "linha 1\nção\n"
+
+def test_empty_and_binary_files(tmp_path):
+    assert read_text_preview(*write_file(tmp_path, b"")) == ""
+    assert read_text_preview(*write_file(tmp_path, b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR")) is None
+
+def test_large_file_shows_only_the_beginning(tmp_path):
+    path, size = write_file(tmp_path, b"a" * (HEAD_BYTES * 4))
+    content = read_text_preview(path, size)
+    assert content.startswith("a" * MAX_CHARS + "\n\n[...] Arquivo truncado.")
+    assert str(size) in content
+
+def test_log_tail_starts_at_a_full_line(tmp_path):
+    lines = [f"registro {i:06}" for i in range(5000)]
+    path, size = write_file(tmp_path, "\n".join(lines).encode('utf-16-le'), "app.log")
+    content = read_text_preview(path, size, include_tail=True)
+    head, tail = content.split("Final do arquivo:\n\n")
+    assert head.startswith("registro 000000\n")
+    assert tail.endswith(lines[-1])
+    assert tail.split("\n")[0] in lines
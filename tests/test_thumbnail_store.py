@@ -0,0 +1,36 @@
+import os
+
+from PyQt5.QtGui import QColor, QImage
+
+from core.thumbnail_store import ThumbnailStore
+
+def make_image():
+    image = QImage(32, 16, QImage.Format_RGB32)
+    image.fill(QColor(10, 20, 30))
+    return image
+
+def test_rename_moves_stored_thumbnail(tmp_path):
+    photo = tmp_path / "foto.jpg"
+    photo.write_bytes(b"jpeg")
+    stat = os.stat(photo)
+    store = ThumbnailStore(str(tmp_path / "miniaturas"))
+    store.save(str(photo), stat, 256, make_image(), "legenda")
+
+    renamed = tmp_path / "praia.jpg"
+    os.rename(photo, renamed)
+    store.rename(str(photo), str(renamed), stat.st_size, stat.st_mtime_ns)
+
+    image, message = store.load(str(renamed), os.stat(renamed), 256)
+    assert (image.width(), message) == (32, "legenda")
+    assert store.load(str(renamed), os.stat(renamed), 1024) is None
+
+def test_rename_without_thumbnail_does_not_touch_disk(tmp_path, monkeypatch):
+    store = ThumbnailStore(str(tmp_path / "miniaturas"))
+    # Primeira consulta: lista a pasta de miniaturas (ainda inexistente) uma vez
+    store.rename(str(tmp_path / "a.jpg"), str(tmp_path / "b.jpg"), 4, 1)
+
+    calls = []
+    monkeypatch.setattr(os, "replace", lambda *args: calls.append(args))
+    monkeypatch.setattr(os, "scandir", lambda *args: calls.append(args))
+    store.rename(str(tmp_path / "b.jpg"), str(tmp_path / "c.jpg"), 4, 1)
+    assert calls == []
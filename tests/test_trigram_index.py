@@ -0,0 +1,91 @@
+import pytest
+
+from core.search_index import fold_name
+from core.trigram_index import TrigramIndex
+
+NAMES = [
+    "fotografia_praia.jpg",
+    "Relatório Anual 2023.pdf",
+    "relatorio-mensal-2024.pdf",
+    "contrato assinado.docx",
+    "foto 001.png",
+]
+
+@pytest.fixture
+def index():
+    index = TrigramIndex()
+    index.rebuild(enumerate(NAMES), background=False)
+    return index
+
+def names(keys):
+    return [NAMES[key] for key in keys]
+
+def test_fold_name_ignores_case_and_accents():
+    assert fold_name("Relatório ÇÃO") == "relatorio cao"
+
+def test_search_tolerates_typos(index):
+    assert names(index.search("fotgrafia")) == ["fotografia_praia.jpg"]
+
+def test_search_ignores_accents(index):
+    assert set(names(index.search("relatorio"))) == {"Relatório Anual 2023.pdf", "relatorio-mensal-2024.pdf"}
+
+def test_search_ranks_best_match_first(index):
+    assert names(index.search("relatorio anual"))[0] == "Relatório Anual 2023.pdf"
+
+def test_all_query_words_must_match(index):
+    assert names(index.search("relatorio 2024")) == ["relatorio-mensal-2024.pdf"]
+    assert index.search("contrato praia") == []
+
+def test_short_words_and_numbers_match_by_substring(index):
+    assert names(index.search("001")) == ["foto 001.png"]
+    assert set(names(index.search("fo"))) == {"fotografia_praia.jpg", "foto 001.png"}
+
+def test_search_prefix_while_typing(index):
+    assert "contrato assinado.docx" in names(index.search("contr"))
+
+def test_query_without_words_returns_none(index):
+    assert index.search("  -_. ") is None
+
+def test_search_with_limit(index):
+    assert len(index.search("pdf", limit=1)) == 1
+
+def test_add_remove_and_rename(index):
+    index.add(10, "planilha orçamento.xlsx")
+    assert index.search("orcamento") == [10]
+
+    index.rename(10, 11, "planilha custos.xlsx")
+    assert index.search("orcamento") == []
+    assert index.search("custos") == [11]
+
+    index.remove(11)
+    assert index.search("planilha") == []
+
+def test_compaction_keeps_results(index):
+    for key in range(100, 2200):
+        index.add(key, f"temporario {key}")
+    for key in range(100, 2200):
+        index.remove(key)
+    assert index.search("temporario") == []
+    assert names(index.search("fotografia")) == ["fotografia_praia.jpg"]
+
+def test_updates_during_build_are_applied_after_it(index):
+    # Simula uma montagem em andamento
+    index._ready = False
+    index.add(20, "durante a montagem")
+    index.remove(0)
+    index.build(enumerate(NAMES), index._generation)
+    assert index.search("montagem") == [20]
+    assert index.search("fotografia") == []
+
+def test_disabled_index_ignores_updates():
+    index = TrigramIndex()
+    assert not index.is_enabled()
+    index.add(0, "foto")
+    assert index.search("foto") is None
+
+def test_clear_drops_index(index):
+    index.clear()
+    assert not index.is_enabled()
+    assert index.search("foto") is None
+    index.rebuild([(0, "foto")], background=False)
+    assert index.search("foto") == [0]
@@ -0,0 +1,68 @@
+import os
+
+from core.file_manager import FileManager
+from core.undo_executor import UndoWorker
+
+def make_files(folder, names):
+    """Cria arquivos cujo conteúdo é o próprio nome"""
+    for name in names:
+        with open(os.path.join(folder, name), 'w', encoding='utf-8') as f:
+            f.write(name)
+
+def read_file(folder, name):
+    with open(os.path.join(folder, name), encoding='utf-8') as f:
+        return f.read()
+
+def operation(original_name, new_name, fingerprint=None):
+    entry = {"original_name": original_name, "new_name": new_name}
+    if fingerprint:
+        entry["fingerprint"] = fingerprint
+    return entry
+
+def run_undo(folder, operations, cancel=False):
+    """Desfaz as operações na thread atual e retorna o resultado"""
+    file_manager = FileManager()
+    file_manager.open_folder(str(folder))
+    worker = UndoWorker(file_manager, operations)
+    results = []
+    worker.finished.connect(results.append)
+    if cancel:
+        worker.cancel()
+    worker.run()
+    return results[0]
+
+def test_undo_restores_every_operation(tmp_path):
+    make_files(tmp_path, ["x", "y"])
+    result = run_undo(tmp_path, [operation("a", "x"), operation("b", "y")])
+    assert result["restored"] == 2
+    assert result["remaining"] == []
+    assert sorted(os.listdir(tmp_path)) == ["a", "b"]
+
+def test_undo_restores_cycle(tmp_path):
+    make_files(tmp_path, ["a", "b"])
+    # Troca a<->b feita pelo lote: desfazer é outra troca, com nome temporário
+    result = run_undo(tmp_path, [operation("a", "b"), operation("b", "a")])
+    assert result["restored"] == 2
+    assert result["remaining"] == []
+    assert (read_file(tmp_path, "a"), read_file(tmp_path, "b")) == ("b", "a")
+
+def test_skipped_operations_remain(tmp_path):
+    make_files(tmp_path, ["x", "z"])
+    stat = os.stat(os.path.join(tmp_path, "z"))
+    changed = operation("c", "z", [stat.st_size + 1, stat.st_mtime_ns, stat.st_ino])
+    operations = [operation("a", "x"), operation("b", "y"), changed]
+
+    result = run_undo(tmp_path, operations)
+
+    assert result["restored"] == 1
+    assert len(result["skipped"]) == 2
+    assert result["remaining"] == operations[1:]
+    assert sorted(os.listdir(tmp_path)) == ["a", "z"]
+
+def test_cancelled_undo_keeps_operations_not_reached(tmp_path):
+    make_files(tmp_path, ["x", "y"])
+    operations = [operation("a", "x"), operation("b", "y")]
+    result = run_undo(tmp_path, operations, cancel=True)
+    assert result["cancelled"]
+    assert result["restored"] == 0
+    assert result["remaining"] == operations
@@ -1,13 +1,14 @@
-from PyQt5.QtWidgets import (QTableWidget, QTableWidgetItem, QMenu, QAction,
-                            QAbstractItemView)
+from PyQt5.QtWidgets import (QTableView, QMenu, QAction, QAbstractItemView,
+                            QHeaderView)
 from PyQt5.QtCore import Qt, pyqtSignal
 from core.language_manager import LanguageManager
+from ui.components.name_list_model import NameListModel
 
-class CSVTable(QTableWidget):
+class CSVTable(QTableView):
     # Sinais
     row_removed = pyqtSignal(int)  # Emite o índice da linha removida
     row_moved = pyqtSignal(int, int)  # Emite índice atual e novo
-    data_changed = pyqtSignal()  # Emite quando os dados são alterados
+    row_edited = pyqtSignal(int, str)  # Emite a linha editada e o novo nome
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -16,29 +17,39 @@ class CSVTable(QTableWidget):
 
     def setup_ui(self):
         """Configura a interface da tabela"""
-        self.setColumnCount(1)
-        self.setHorizontalHeaderLabels([self.language_manager.get_text("preview")])
+        # O modelo lê os nomes direto dos dados do CSV, só para as linhas visíveis
+        self.csv_model = NameListModel(self.language_manager.get_text("preview"), self)
+        self.setModel(self.csv_model)
         self.horizontalHeader().setStretchLastSection(True)
+        # Altura fixa evita que a visão meça cada linha
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.setSelectionMode(QAbstractItemView.SingleSelection)
         self.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
         
         # Conectar sinais
-        self.itemChanged.connect(self.handle_item_changed)
+        self.csv_model.name_edited.connect(self.handle_name_edited)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
 
-    def set_data(self, data):
-        """Define os dados na tabela"""
-        self.setRowCount(len(data))
-        for i, name in enumerate(data):
-            item = QTableWidgetItem(name)
-            self.setItem(i, 0, item)
+    def set_data(self, data, rows=None):
+        """Define os dados na tabela; rows seleciona e ordena as linhas exibidas"""
+        # Os dados não são copiados: quem recebe row_removed, row_moved e row_edited
+        # altera a mesma sequência (e a lista rows) antes de a tabela ser redesenhada
+        self.csv_model.set_names(data, rows)
 
-    def handle_item_changed(self, item):
-        """Lida com mudanças nos itens da tabela"""
-        if item.column() == 0:  # Apenas na coluna de nomes
-            self.data_changed.emit()
+    def rowCount(self):
+        """Retorna o número de linhas da tabela"""
+        return self.csv_model.rowCount()
+
+    def currentRow(self):
+        """Retorna a linha atual ou -1"""
+        return self.currentIndex().row()
+
+    def handle_name_edited(self, row, old_name, new_name):
+        """Lida com a edição de um nome na tabela"""
+        self.row_edited.emit(row, new_name)
+        self.csv_model.row_changed(row)
 
     def show_context_menu(self, position):
         """Mostra o menu de contexto"""
@@ -56,8 +67,11 @@ class CSVTable(QTableWidget):
         """Remove a linha selecionada"""
         current_row = self.currentRow()
         if current_row >= 0:
-            self.removeRow(current_row)
+            # A remoção nos dados é feita por quem recebe o sinal, entre o aviso
+            # de início e o de fim da remoção no modelo
+            self.csv_model.beginRemoveRows(self.rootIndex(), current_row, current_row)
             self.row_removed.emit(current_row)
+            self.csv_model.endRemoveRows()
 
     def move_row_up(self):
         """Move a linha selecionada para cima"""
@@ -68,34 +82,23 @@ class CSVTable(QTableWidget):
     def move_row_down(self):
         """Move a linha selecionada para baixo"""
         current_row = self.currentRow()
-        if current_row < self.rowCount() - 1:
+        if 0 <= current_row < self.rowCount() - 1:
             self.move_row(current_row, current_row + 1)
 
     def move_row(self, current_index, new_index):
         """Move uma linha para uma nova posição"""
         if 0 <= current_index < self.rowCount() and 0 <= new_index < self.rowCount():
-            # Salva os itens
-            current_item = self.takeItem(current_index, 0)
-            new_item = self.takeItem(new_index, 0)
-            
-            # Insere os itens nas novas posições
-            self.setItem(new_index, 0, current_item)
-            self.setItem(current_index, 0, new_item)
+            # Emite o sinal; quem recebe troca as linhas nos dados
+            self.row_moved.emit(current_index, new_index)
+            self.csv_model.row_changed(current_index)
+            self.csv_model.row_changed(new_index)
             
             # Atualiza a seleção
-            self.setCurrentCell(new_index, 0)
-            
-            # Emite o sinal
-            self.row_moved.emit(current_index, new_index)
+            self.setCurrentIndex(self.csv_model.index(new_index, 0))
             
             return True
         return False
 
     def get_data(self):
         """Retorna os dados da tabela"""
-        data = []
-        for row in range(self.rowCount()):
-            item = self.item(row, 0)
-            if item:
-                data.append(item.text())
-        return data 
\ No newline at end of file
+        return [self.csv_model.name(row) for row in range(self.csv_model.rowCount())]
@@ -1,57 +1,130 @@
-from PyQt5.QtWidgets import (QTableWidget, QTableWidgetItem, QMenu, QAction,
-                            QAbstractItemView)
+from PyQt5.QtWidgets import (QTableView, QMenu, QAction, QAbstractItemView,
+                            QHeaderView)
 from PyQt5.QtCore import Qt, pyqtSignal
 from core.language_manager import LanguageManager
+from core.search_index import SearchIndex
+from ui.components.name_list_model import NameListModel
 
-class FileTable(QTableWidget):
+class FileTable(QTableView):
     # Sinais
     file_selected = pyqtSignal(str)  # Emite o nome do arquivo selecionado
     file_renamed = pyqtSignal(str, str)  # Emite nome antigo e novo
     file_deleted = pyqtSignal(str)  # Emite o nome do arquivo deletado
     file_located = pyqtSignal(str)  # Emite o nome do arquivo para localizar
+    files_loaded = pyqtSignal()  # Emite quando a lista inteira é substituída
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.language_manager = LanguageManager()
+        # Índice de busca sobre a lista da tabela e o texto do filtro aplicado
+        self.search_index = SearchIndex()
+        self.filter_text = ""
+        # Busca aproximada opcional (nomes ordenados pela semelhança ou None) e as
+        # posições dos nomes na lista, calculadas sob demanda para mapear o resultado
+        self.fuzzy_search = None
+        self._positions = None
         self.setup_ui()
 
     def setup_ui(self):
         """Configura a interface da tabela"""
-        self.setColumnCount(1)
-        self.setHorizontalHeaderLabels([self.language_manager.get_text("preview")])
+        # O modelo guarda só a lista de nomes; a visão desenha apenas as linhas visíveis
+        self.file_model = NameListModel(self.language_manager.get_text("preview"), self)
+        self.setModel(self.file_model)
         self.horizontalHeader().setStretchLastSection(True)
+        # Altura fixa evita que a visão meça cada linha
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.setSelectionMode(QAbstractItemView.SingleSelection)
         self.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
         
         # Conectar sinais
-        self.itemChanged.connect(self.handle_item_changed)
-        self.itemSelectionChanged.connect(self.handle_selection_changed)
+        self.file_model.name_edited.connect(self.handle_name_edited)
+        self.selectionModel().currentRowChanged.connect(self.handle_current_changed)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
 
     def set_files(self, files):
         """Define os arquivos na tabela"""
-        self.setRowCount(len(files))
-        for i, file_name in enumerate(files):
-            item = QTableWidgetItem(file_name)
-            self.setItem(i, 0, item)
-
-    def handle_item_changed(self, item):
-        """Lida com mudanças nos itens da tabela"""
-        if item.column() == 0:  # Apenas na coluna de nomes
-            row = item.row()
-            old_name = self.item(row, 0).text()
-            new_name = item.text()
-            
-            if old_name != new_name:
-                self.file_renamed.emit(old_name, new_name)
+        # A tabela guarda uma cópia: a lista do gerenciador muda durante as renomeações
+        names = list(files)
+        self.search_index.set_names(names)
+        self._positions = None
+        self.file_model.set_names(names, self.find_rows(self.filter_text, names))
+        self.files_loaded.emit()
+
+    def filter_files(self, text, fuzzy_search=None):
+        """Exibe só os arquivos que casam com o texto, sem recriar a lista"""
+        self.filter_text = text
+        self.fuzzy_search = fuzzy_search
+        self.file_model.set_rows(self.find_rows(text, self.file_model.names()))
+
+    def find_rows(self, text, names):
+        """Retorna as posições exibidas para o texto: pela busca aproximada, se houver e
+        o índice dela estiver pronto, ou pela busca por trecho"""
+        if self.fuzzy_search is not None:
+            ranked = self.fuzzy_search(text)
+            if ranked is not None:
+                if self._positions is None:
+                    self._positions = {name: position for position, name in enumerate(names)}
+                positions = self._positions
+                return [positions[name] for name in ranked if name in positions]
+        return self.search_index.search(text)
+
+    def rowCount(self):
+        """Retorna o número de linhas da tabela"""
+        return self.file_model.rowCount()
+
+    def currentRow(self):
+        """Retorna a linha atual ou -1"""
+        return self.currentIndex().row()
+
+    def file_at(self, row):
+        """Retorna o nome do arquivo exibido na linha"""
+        return self.file_model.name(row)
+
+    def find_row(self, file_name):
+        """Retorna a linha do arquivo na tabela ou -1"""
+        for row in range(self.file_model.rowCount()):
+            if self.file_model.name(row) == file_name:
+                return row
+        return -1
 
-    def handle_selection_changed(self):
+    def add_files(self, files):
+        """Acrescenta arquivos ao final da tabela sem recriar as linhas existentes"""
+        self.file_model.append_names(list(files))
+        self.search_index.invalidate()
+        self._positions = None
+        if self.filter_text:
+            self.filter_files(self.filter_text, self.fuzzy_search)
+
+    def remove_files(self, files):
+        """Remove da tabela as linhas dos arquivos informados"""
+        files = set(files)
+        self.file_model.remove_rows_where(files.__contains__)
+        self.search_index.invalidate()
+        self._positions = None
+
+    def update_file(self, old_name, new_name):
+        """Atualiza o nome de um arquivo na tabela"""
+        row = self.find_row(old_name)
+        if row >= 0:
+            self.file_model.set_name(row, new_name)
+            self.search_index.update(self.file_model.source_row(row), new_name)
+            self._positions = None
+
+    def handle_name_edited(self, row, old_name, new_name):
+        """Repassa a edição do nome; a tabela só muda quando o arquivo for renomeado"""
+        self.file_renamed.emit(old_name, new_name)
+
+    def handle_current_changed(self, current, previous):
         """Lida com mudanças na seleção"""
-        selected_items = self.selectedItems()
-        if selected_items:
-            self.file_selected.emit(selected_items[0].text())
+        if current.isValid():
+            self.file_selected.emit(self.file_model.name(current.row()))
+
+    def selected_file(self):
+        """Retorna o arquivo da linha atual ou None"""
+        row = self.currentRow()
+        return self.file_model.name(row) if row >= 0 else None
 
     def show_context_menu(self, position):
         """Mostra o menu de contexto"""
@@ -72,21 +145,20 @@ class FileTable(QTableWidget):
 
     def trigger_locate(self):
         """Emite sinal para localizar arquivo"""
-        selected_items = self.selectedItems()
-        if selected_items:
-            self.file_located.emit(selected_items[0].text())
+        file_name = self.selected_file()
+        if file_name is not None:
+            self.file_located.emit(file_name)
 
     def trigger_delete(self):
         """Emite sinal para deletar arquivo"""
-        selected_items = self.selectedItems()
-        if selected_items:
-            self.file_deleted.emit(selected_items[0].text())
+        file_name = self.selected_file()
+        if file_name is not None:
+            self.file_deleted.emit(file_name)
 
     def trigger_rename(self):
         """Inicia edição do item selecionado"""
-        selected_items = self.selectedItems()
-        if selected_items:
-            self.editItem(selected_items[0])
+        if self.currentIndex().isValid():
+            self.edit(self.currentIndex())
 
     def move_row_up(self):
         """Move a linha selecionada para cima"""
@@ -97,22 +169,20 @@ class FileTable(QTableWidget):
     def move_row_down(self):
         """Move a linha selecionada para baixo"""
         current_row = self.currentRow()
-        if current_row < self.rowCount() - 1:
+        if 0 <= current_row < self.rowCount() - 1:
             self.move_row(current_row, current_row + 1)
 
     def move_row(self, current_index, new_index):
         """Move uma linha para uma nova posição"""
         if 0 <= current_index < self.rowCount() and 0 <= new_index < self.rowCount():
-            # Salva os itens
-            current_item = self.takeItem(current_index, 0)
-            new_item = self.takeItem(new_index, 0)
-            
-            # Insere os itens nas novas posições
-            self.setItem(new_index, 0, current_item)
-            self.setItem(current_index, 0, new_item)
+            self.file_model.swap_rows(current_index, new_index)
+            self.search_index.swap(
+                self.file_model.source_row(current_index), self.file_model.source_row(new_index)
+            )
+            self._positions = None
             
             # Atualiza a seleção
-            self.setCurrentCell(new_index, 0)
+            self.setCurrentIndex(self.file_model.index(new_index, 0))
             
             return True
-        return False 
\ No newline at end of file
+        return False
@@ -0,0 +1,141 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+class NameListModel(QAbstractTableModel):
+    """Modelo de uma coluna sobre uma sequência de nomes; só as linhas visíveis são lidas"""
+
+    # Emite a linha, o nome atual e o nome digitado; quem recebe decide se aceita a edição
+    name_edited = pyqtSignal(int, str, str)
+
+    def __init__(self, header="", parent=None):
+        super().__init__(parent)
+        self.header = header
+        # Sequência de nomes (lista ou índice de CSV) e, opcionalmente, as posições dela
+        # que são exibidas, na ordem de exibição
+        self._names = []
+        self._rows = None
+
+    def set_names(self, names, rows=None):
+        """Troca a sequência exibida sem copiar os nomes"""
+        self.beginResetModel()
+        self._names = names
+        self._rows = rows
+        self.endResetModel()
+
+    def set_header(self, header):
+        """Atualiza o título da coluna"""
+        self.header = header
+        self.headerDataChanged.emit(Qt.Horizontal, 0, 0)
+
+    def names(self):
+        """Retorna a sequência completa, sem a máscara do filtro"""
+        return self._names
+
+    def name(self, row):
+        """Retorna o nome exibido na linha"""
+        return self._names[self.source_row(row)]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows) if self._rows is not None else len(self._names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.EditRole, Qt.ToolTipRole):
+            return self.name(index.row())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.header
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        old_name = self.name(index.row())
+        if value == old_name:
+            return False
+        # O modelo não altera a sequência: o nome só muda quando quem recebe o sinal
+        # confirma a edição (por exemplo, depois de renomear o arquivo no disco)
+        self.name_edited.emit(index.row(), old_name, value)
+        return True
+
+    def row_changed(self, row):
+        """Avisa a visão que o nome de uma linha mudou"""
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index)
+
+    def set_rows(self, rows):
+        """Troca só as posições exibidas (máscara do filtro), mantendo a sequência"""
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def source_row(self, row):
+        """Converte a linha exibida na posição correspondente da sequência"""
+        return self._rows[row] if self._rows is not None else row
+
+    def set_name(self, row, name):
+        """Altera o nome de uma linha de uma lista própria do modelo"""
+        self._names[self.source_row(row)] = name
+        self.row_changed(row)
+
+    def append_names(self, names):
+        """Acrescenta nomes ao final de uma lista própria do modelo"""
+        if not names:
+            return
+        if self._rows is not None:
+            # Com um filtro ativo os nomes novos só aparecem se passarem pela busca
+            self._names.extend(names)
+            return
+        row = len(self._names)
+        self.beginInsertRows(QModelIndex(), row, row + len(names) - 1)
+        self._names.extend(names)
+        self.endInsertRows()
+
+    def remove_rows_where(self, predicate):
+        """Remove da lista própria do modelo as linhas cujos nomes satisfazem o predicado"""
+        if self._rows is not None:
+            # Com um filtro ativo as posições da máscara são renumeradas
+            self.beginResetModel()
+            new_positions = {}
+            kept = []
+            for position, name in enumerate(self._names):
+                if not predicate(name):
+                    new_positions[position] = len(kept)
+                    kept.append(name)
+            self._names[:] = kept
+            self._rows = [new_positions[row] for row in self._rows if row in new_positions]
+            self.endResetModel()
+            return
+        # Linhas removidas em sequência saem em um único bloco, do fim para o começo
+        row = len(self._names) - 1
+        while row >= 0:
+            if not predicate(self._names[row]):
+                row -= 1
+                continue
+            last = row
+            while row > 0 and predicate(self._names[row - 1]):
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row, last)
+            del self._names[row:last + 1]
+            self.endRemoveRows()
+            row -= 1
+
+    def swap_rows(self, first_row, second_row):
+        """Troca duas linhas de uma lista própria do modelo"""
+        names = self._names
+        first, second = self.source_row(first_row), self.source_row(second_row)
+        names[first], names[second] = names[second], names[first]
+        self.row_changed(first_row)
+        self.row_changed(second_row)
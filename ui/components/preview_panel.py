@@ -111,5 +111,5 @@ class PreviewPanel(QWidget):
         """Limpa a visualização"""
         self.current_file_path = None
         self.content_label.setText(self.language_manager.get_text("no_file_selected"))
-        self.content_label.setPixmap(None)
+        self.content_label.setPixmap(QPixmap())
         self.content_label.setToolTip("") 
\ No newline at end of file
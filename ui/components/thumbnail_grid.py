@@ -0,0 +1,175 @@
+import os
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PyQt5.QtCore import Qt, QSize, QRect, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from core.preview_cache import PreviewCache
+from core.preview_manager import THUMBNAIL_EXTENSIONS
+
+class ThumbnailTask(QRunnable):
+    """Gera a miniatura de uma célula no pool de threads, se ela ainda for pedida"""
+
+    def __init__(self, grid, generation, file_name, file_path):
+        super().__init__()
+        self.grid = grid
+        self.generation = generation
+        self.file_name = file_name
+        self.file_path = file_path
+
+    def run(self):
+        # A grade rolou para longe desta célula: a decodificação nem começa
+        if self.generation != self.grid.generation:
+            return
+        image = None
+        try:
+            stat = os.stat(self.file_path)
+            size = self.grid.thumbnail_size
+            content, message = self.grid.preview_manager.render_stored_preview(self.file_path, stat, size, size)
+            if isinstance(content, QImage):
+                image = content
+        except OSError:
+            pass
+        self.grid.thumbnail_loaded.emit(self.generation, self.file_name, image)
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Desenha a miniatura e o nome de cada célula, pedindo as miniaturas que faltam"""
+
+    def __init__(self, grid):
+        super().__init__(grid)
+        self.grid = grid
+
+    def sizeHint(self, option, index):
+        return self.grid.cell_size()
+
+    def paint(self, painter, option, index):
+        grid = self.grid
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        file_name = index.data(Qt.DisplayRole)
+        size = grid.thumbnail_size
+        image_rect = QRect(option.rect.x() + (option.rect.width() - size) // 2, option.rect.y() + 4, size, size)
+
+        image = grid.thumbnail(file_name)
+        if image is not None:
+            # Centraliza a miniatura mantendo a proporção
+            target = QRect(0, 0, image.width(), image.height())
+            target.moveCenter(image_rect.center())
+            painter.drawImage(target, image)
+        else:
+            icon = grid.style().standardIcon(QStyle.SP_FileIcon)
+            icon.paint(painter, image_rect.adjusted(size // 4, size // 4, -size // 4, -size // 4))
+
+        text_rect = QRect(option.rect.x() + 2, image_rect.bottom() + 4, option.rect.width() - 4, option.fontMetrics.height())
+        text = option.fontMetrics.elidedText(file_name, Qt.ElideMiddle, text_rect.width())
+        if option.state & QStyle.State_Selected:
+            painter.setPen(option.palette.highlightedText().color())
+        else:
+            painter.setPen(option.palette.text().color())
+        painter.drawText(text_rect, Qt.AlignCenter, text)
+
+class ThumbnailGrid(QListView):
+    """Grade de miniaturas dos arquivos sobre o mesmo modelo e seleção da FileTable"""
+
+    # Sinais
+    thumbnail_loaded = pyqtSignal(int, str, object)  # Geração, nome do arquivo e QImage (ou None)
+
+    def __init__(self, file_table, file_manager, preview_manager, thumbnail_size=128,
+                 cache_bytes=32 * 1024 * 1024, max_threads=2, parent=None):
+        super().__init__(parent)
+        self.file_table = file_table
+        self.file_manager = file_manager
+        self.preview_manager = preview_manager
+        self.thumbnail_size = thumbnail_size
+        # Miniaturas das células já vistas; o limite de bytes mantém a memória constante
+        # mesmo ao percorrer pastas enormes
+        self.cache = PreviewCache(cache_bytes)
+        # Nomes já pedidos e os que não têm miniatura (tipos sem imagem ou falhas)
+        self.requested = set()
+        self.no_thumbnail = set()
+        # Pedidos de uma geração antiga (antes da última rolagem) saem da fila; resultados
+        # anteriores à última recarga da lista são ignorados
+        self.generation = 0
+        self.valid_generation = 0
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Configura a grade"""
+        self.setViewMode(QListView.IconMode)
+        self.setMovement(QListView.Static)
+        self.setResizeMode(QListView.Adjust)
+        # Células de tamanho fixo: a visão não mede item por item e monta o layout em lotes
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(2000)
+        self.setSpacing(4)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setItemDelegate(ThumbnailDelegate(self))
+        # O modelo e a seleção são os da tabela: filtro, ordem e arquivo atual ficam iguais
+        self.setModel(self.file_table.file_model)
+        self.setSelectionModel(self.file_table.selectionModel())
+
+        self.thumbnail_loaded.connect(self.handle_thumbnail_loaded)
+        self.verticalScrollBar().valueChanged.connect(self.discard_pending)
+        self.file_table.file_model.modelReset.connect(self.discard_pending)
+        self.file_table.files_loaded.connect(self.clear_thumbnails)
+
+    def cell_size(self):
+        """Tamanho fixo de cada célula: miniatura e uma linha de texto"""
+        return QSize(self.thumbnail_size + 24, self.thumbnail_size + self.fontMetrics().height() + 12)
+
+    def cache_key(self, file_name):
+        """Chave do cache de miniaturas (o nome normalizado, como nas invalidações)"""
+        return (os.path.normcase(file_name),)
+
+    def thumbnail(self, file_name):
+        """Retorna a miniatura já carregada ou None, pedindo-a em segundo plano"""
+        cached = self.cache.get(self.cache_key(file_name))
+        if cached is not None:
+            return cached[0]
+        if file_name in self.no_thumbnail or file_name in self.requested:
+            return None
+        if os.path.splitext(file_name)[1].lower() not in THUMBNAIL_EXTENSIONS:
+            self.no_thumbnail.add(file_name)
+            return None
+        self.requested.add(file_name)
+        file_path = os.path.join(self.file_manager.folder_path, file_name)
+        self.thread_pool.start(ThumbnailTask(self, self.generation, file_name, file_path))
+        return None
+
+    def handle_thumbnail_loaded(self, generation, file_name, image):
+        """Guarda a miniatura carregada e redesenha as células visíveis"""
+        self.requested.discard(file_name)
+        # Um resultado de antes da rolagem ainda vale; de antes da recarga, não
+        if generation < self.valid_generation:
+            return
+        if image is None:
+            self.no_thumbnail.add(file_name)
+        else:
+            self.cache.put(self.cache_key(file_name), image, None)
+        self.viewport().update()
+
+    def discard_pending(self):
+        """Descarta os pedidos das células que saíram da tela; as visíveis pedem de novo ao serem desenhadas"""
+        self.generation += 1
+        self.thread_pool.clear()
+        self.requested.clear()
+
+    def clear_thumbnails(self):
+        """Esquece as miniaturas quando a lista de arquivos é recarregada"""
+        self.discard_pending()
+        self.valid_generation = self.generation
+        self.cache.clear()
+        self.no_thumbnail.clear()
+
+    def invalidate(self, file_path, new_path=None, info=None):
+        """Esquece as miniaturas de um arquivo renomeado ou deletado (pode vir de outra thread)"""
+        for path in (file_path, new_path):
+            if path is not None:
+                self.cache.invalidate(os.path.relpath(path, self.file_manager.folder_path))
+
+    def wait_for_tasks(self):
+        """Descarta os pedidos e espera os que já começaram (ao fechar a janela)"""
+        self.discard_pending()
+        self.thread_pool.waitForDone()
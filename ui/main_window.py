@@ -1,18 +1,28 @@
 import os
 from PyQt5.QtWidgets import (QMainWindow, QPushButton, QFileDialog, QLabel, 
                             QLineEdit, QVBoxLayout, QHBoxLayout, QWidget,
-                            QMessageBox, QMenuBar, QAction, QToolButton, QMenu)
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
+                            QMessageBox, QMenuBar, QAction, QToolButton, QMenu,
+                            QProgressDialog, QCheckBox, QSpinBox, QComboBox,
+                            QStackedWidget)
+from PyQt5.QtCore import Qt, QThread, QTimer
+from PyQt5.QtGui import QFont, QImage, QPixmap
 
 from ui.components.file_table import FileTable
 from ui.components.csv_table import CSVTable
 from ui.components.preview_panel import PreviewPanel
+from ui.components.thumbnail_grid import ThumbnailGrid
 from core.file_manager import FileManager
 from core.csv_manager import CSVManager
 from core.history_manager import HistoryManager
+from core.sqlite_history_manager import SQLiteHistoryManager
 from core.preview_manager import PreviewManager
 from core.language_manager import LanguageManager
+from core.rename_planner import RenamePlanner
+from core.rename_worker import RenameWorker
+from core.undo_executor import UndoWorker
+from core.rename_wal import RenameWAL
+from core.folder_watcher import FolderWatcher
+from core.search_index import SearchIndex
 
 class BatchRenamer(QMainWindow):
     def __init__(self):
@@ -21,11 +31,49 @@ class BatchRenamer(QMainWindow):
         # Inicializa os gerenciadores
         self.file_manager = FileManager()
         self.csv_manager = CSVManager()
-        self.history_manager = HistoryManager(
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rename_history.json")
+        history_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rename_history.json")
+        if os.environ.get("BATCH_RENAMER_HISTORY") == "sqlite":
+            # Backend opcional em SQLite; na primeira execução importa o histórico existente
+            self.history_manager = SQLiteHistoryManager(
+                os.path.splitext(history_file)[0] + ".db", history_file
+            )
+        else:
+            self.history_manager = HistoryManager(history_file)
+        # Log de escrita antecipada do lote em andamento, para recuperação após quedas
+        self.rename_wal = RenameWAL(os.path.join(os.path.dirname(history_file), "rename_batch.wal"))
+        self.preview_manager = PreviewManager(
+            thumbnail_dir=os.path.join(os.path.dirname(history_file), "thumbnails")
         )
-        self.preview_manager = PreviewManager()
+        self.file_manager.add_change_listener(self.preview_manager.invalidate)
         self.language_manager = LanguageManager()
+        self.rename_planner = RenamePlanner()
+        self.folder_watcher = FolderWatcher(self.file_manager)
+        
+        # Estado da renomeação em segundo plano
+        self.rename_thread = None
+        self.rename_worker = None
+        self.undo_folder_path = None
+        self.progress_dialog = None
+        
+        # Antecipação das visualizações: quantos arquivos à frente e a última linha vista
+        self.prefetch_count = 3
+        self.last_preview_row = -1
+        
+        # Linhas do CSV exibidas na tabela quando há filtro (None = todas)
+        self.csv_visible_rows = None
+        self.csv_search_index = SearchIndex()
+        # As buscas esperam uma pausa na digitação antes de filtrar
+        self.csv_search_timer = QTimer(self)
+        self.csv_search_timer.setSingleShot(True)
+        self.csv_search_timer.setInterval(150)
+        self.files_search_timer = QTimer(self)
+        self.files_search_timer.setSingleShot(True)
+        self.files_search_timer.setInterval(150)
+        # Gravação adiada do CSV: várias edições seguidas viram uma única gravação
+        self.csv_save_timer = QTimer(self)
+        self.csv_save_timer.setSingleShot(True)
+        self.csv_save_timer.setInterval(500)
+        self.csv_save_timer.timeout.connect(self.flush_csv_changes)
         
         # Conecta o sinal de mudança de idioma
         self.language_manager.language_changed.connect(self.update_ui_text)
@@ -33,6 +81,9 @@ class BatchRenamer(QMainWindow):
         self.init_ui()
         self.setup_connections()
         
+        # Verifica, depois que a janela abrir, se algum lote ficou pela metade
+        QTimer.singleShot(0, self.check_interrupted_batch)
+        
     def init_ui(self):
         """Inicializa a interface do usuário"""
         self.setWindowTitle("Renomeador em Lote")
@@ -81,6 +132,12 @@ class BatchRenamer(QMainWindow):
         
         self.file_menu.addSeparator()
         
+        self.compact_history_action = QAction(self.language_manager.get_text("compact_history"), self)
+        self.compact_history_action.triggered.connect(self.compact_history)
+        self.file_menu.addAction(self.compact_history_action)
+        
+        self.file_menu.addSeparator()
+        
         # Menu de idiomas
         self.language_menu = QMenu(self.language_manager.get_text("language_menu"), self)
         self.file_menu.addMenu(self.language_menu)
@@ -124,6 +181,33 @@ class BatchRenamer(QMainWindow):
         self.folder_button.setMinimumHeight(50)
         layout.addWidget(self.folder_button)
         
+        # Modo de correspondência entre arquivos e linhas do CSV
+        self.match_mode_label = QLabel("Correspondência dos arquivos")
+        self.match_mode_combo = QComboBox()
+        self.match_mode_combo.addItems([
+            "Pela posição da linha",
+            "Pelo nome antigo (old_name,new_name)",
+            "Pela chave (nome sem extensão)"
+        ])
+        layout.addWidget(self.match_mode_label)
+        layout.addWidget(self.match_mode_combo)
+        
+        columns_layout = QHBoxLayout()
+        self.key_column_label = QLabel("Coluna da chave")
+        self.key_column_spinbox = QSpinBox()
+        self.key_column_spinbox.setRange(1, 99)
+        self.key_column_spinbox.setValue(1)
+        self.new_name_column_label = QLabel("Coluna do novo nome")
+        self.new_name_column_spinbox = QSpinBox()
+        self.new_name_column_spinbox.setRange(1, 99)
+        self.new_name_column_spinbox.setValue(2)
+        columns_layout.addWidget(self.key_column_label)
+        columns_layout.addWidget(self.key_column_spinbox)
+        columns_layout.addWidget(self.new_name_column_label)
+        columns_layout.addWidget(self.new_name_column_spinbox)
+        layout.addLayout(columns_layout)
+        self.update_match_mode(0)
+        
         # Campo de extensões
         self.extensions_label = QLabel("Filtrar arquivos por extensão")
         self.extensions_field = QLineEdit()
@@ -131,6 +215,23 @@ class BatchRenamer(QMainWindow):
         layout.addWidget(self.extensions_label)
         layout.addWidget(self.extensions_field)
         
+        # Leitura de subpastas
+        self.recursive_checkbox = QCheckBox("Incluir subpastas")
+        layout.addWidget(self.recursive_checkbox)
+        
+        depth_layout = QHBoxLayout()
+        self.max_depth_label = QLabel("Profundidade máxima (0 = sem limite)")
+        self.max_depth_spinbox = QSpinBox()
+        self.max_depth_spinbox.setRange(0, 99)
+        self.max_depth_spinbox.setEnabled(False)
+        depth_layout.addWidget(self.max_depth_label)
+        depth_layout.addWidget(self.max_depth_spinbox)
+        layout.addLayout(depth_layout)
+        
+        # Busca aproximada nos campos de busca
+        self.fuzzy_search_checkbox = QCheckBox("Busca aproximada (ignora acentos e erros de digitação)")
+        layout.addWidget(self.fuzzy_search_checkbox)
+        
         # Botão de recarregar
         self.reload_button = QPushButton("Recarregar Arquivos")
         layout.addWidget(self.reload_button)
@@ -223,12 +324,21 @@ class BatchRenamer(QMainWindow):
         self.files_search_field.setPlaceholderText("Buscar arquivos...")
         layout.addWidget(self.files_search_field)
         
+        # Alterna entre a tabela de nomes e a grade de miniaturas
+        self.thumbnail_view_checkbox = QCheckBox("Exibir miniaturas")
+        layout.addWidget(self.thumbnail_view_checkbox)
+        
         # Layout para tabela e botões
         table_layout = QHBoxLayout()
         
-        # Tabela de arquivos
+        # Tabela de arquivos e grade de miniaturas (mesmo modelo e mesma seleção)
         self.files_table = FileTable()
-        table_layout.addWidget(self.files_table)
+        self.thumbnail_grid = ThumbnailGrid(self.files_table, self.file_manager, self.preview_manager)
+        self.files_stack = QStackedWidget()
+        self.files_stack.addWidget(self.files_table)
+        self.files_stack.addWidget(self.thumbnail_grid)
+        self.file_manager.add_change_listener(self.thumbnail_grid.invalidate)
+        table_layout.addWidget(self.files_stack)
         
         # Botões de seta
         arrows_layout = QVBoxLayout()
@@ -266,12 +376,18 @@ class BatchRenamer(QMainWindow):
         self.csv_button.clicked.connect(self.open_csv)
         self.folder_button.clicked.connect(self.open_folder)
         self.reload_button.clicked.connect(self.reload_files)
+        self.recursive_checkbox.toggled.connect(self.max_depth_spinbox.setEnabled)
+        self.match_mode_combo.currentIndexChanged.connect(self.update_match_mode)
         self.rename_button.clicked.connect(self.rename_files)
         self.undo_button.clicked.connect(self.undo_rename)
         
         # Campos de busca
-        self.csv_search_field.textChanged.connect(self.filter_csv)
-        self.files_search_field.textChanged.connect(self.filter_files)
+        self.csv_search_field.textChanged.connect(self.csv_search_timer.start)
+        self.files_search_field.textChanged.connect(self.files_search_timer.start)
+        self.csv_search_timer.timeout.connect(lambda: self.filter_csv(self.csv_search_field.text()))
+        self.files_search_timer.timeout.connect(lambda: self.filter_files(self.files_search_field.text()))
+        self.fuzzy_search_checkbox.toggled.connect(self.update_search_mode)
+        self.thumbnail_view_checkbox.toggled.connect(self.update_files_view)
         
         # Botões de seta
         self.csv_up_button.clicked.connect(self.csv_table.move_row_up)
@@ -282,7 +398,7 @@ class BatchRenamer(QMainWindow):
         # Sinais da tabela CSV
         self.csv_table.row_removed.connect(self.handle_csv_row_removed)
         self.csv_table.row_moved.connect(self.handle_csv_row_moved)
-        self.csv_table.data_changed.connect(self.handle_csv_data_changed)
+        self.csv_table.row_edited.connect(self.handle_csv_row_edited)
         
         # Sinais da tabela de arquivos
         self.files_table.file_selected.connect(self.handle_file_selected)
@@ -292,16 +408,26 @@ class BatchRenamer(QMainWindow):
         
         # Sinais do painel de visualização
         self.preview_panel.file_double_clicked.connect(self.handle_file_double_clicked)
+        self.preview_manager.preview_ready.connect(self.handle_preview_ready)
+        
+        # Mudanças feitas na pasta por outros programas
+        self.folder_watcher.files_changed.connect(self.handle_folder_changed)
         
     def open_csv(self):
         """Abre um arquivo CSV"""
         file_path, _ = QFileDialog.getOpenFileName(self, "Abrir Arquivo CSV", "", "CSV Files (*.csv)")
         if file_path:
             try:
+                self.csv_save_timer.stop()
                 if self.csv_manager.open_csv(file_path):
-                    self.csv_table.set_data(self.csv_manager.csv_data)
+                    self.csv_search_index.set_names(self.csv_manager.csv_data)
+                    self.csv_search_field.clear()
+                    self.filter_csv("")
                     self.csv_path_label.setText(file_path)
             except Exception as e:
+                # A tabela lê direto dos dados do CSV, que podem ter sido descartados
+                self.csv_search_index.set_names(self.csv_manager.csv_data)
+                self.filter_csv("")
                 QMessageBox.critical(self, "Erro", f"Erro ao abrir arquivo CSV: {str(e)}")
                 
     def open_folder(self):
@@ -309,20 +435,29 @@ class BatchRenamer(QMainWindow):
         folder_path = QFileDialog.getExistingDirectory(self, "Abrir Pasta")
         if folder_path:
             try:
+                self.apply_recursive_mode()
                 if self.file_manager.open_folder(folder_path):
                     self.files_table.set_files(self.file_manager.folder_files)
                     self.folder_path_label.setText(folder_path)
+                    self.folder_watcher.watch(folder_path)
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Erro ao abrir pasta: {str(e)}")
                 
     def reload_files(self):
         """Recarrega os arquivos da pasta"""
         try:
+            self.apply_recursive_mode()
             files = self.file_manager.load_folder_files(self.extensions_field.text())
             self.files_table.set_files(files)
+            self.folder_watcher.watch(self.file_manager.folder_path)
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao recarregar arquivos: {str(e)}")
             
+    def apply_recursive_mode(self):
+        """Repassa ao gerenciador de arquivos as opções de leitura de subpastas"""
+        max_depth = self.max_depth_spinbox.value() or None
+        self.file_manager.set_recursive(self.recursive_checkbox.isChecked(), max_depth)
+            
     def rename_files(self):
         """Renomeia os arquivos"""
         if not self.csv_manager.csv_data:
@@ -333,19 +468,41 @@ class BatchRenamer(QMainWindow):
             QMessageBox.warning(self, "Aviso", "Nenhum arquivo na pasta.")
             return
             
-        # Verifica se há entradas CSV suficientes
-        if len(self.csv_manager.csv_data) < len(self.file_manager.folder_files):
+        # O modo por chave lê o arquivo, então as edições pendentes vão para o disco antes
+        if not self.flush_csv_changes():
+            return
+            
+        # Um lote interrompido precisa ser resolvido antes que o log seja reutilizado
+        if self.rename_wal.load_pending() is not None:
+            self.check_interrupted_batch()
+            if self.rename_wal.load_pending() is not None:
+                return
+            
+        # Valida o plano inteiro antes de tocar em qualquer arquivo
+        try:
+            plan = self.build_rename_plan()
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", str(e))
+            return
+        
+        if not plan.is_valid():
             QMessageBox.warning(
-                self, 
-                "Aviso", 
-                f"O número de nomes no CSV ({len(self.csv_manager.csv_data)}) é menor que o número de arquivos ({len(self.file_manager.folder_files)})."
+                self,
+                "Aviso",
+                "Nenhum arquivo foi renomeado. Problemas encontrados no plano:" +
+                self.format_problems(plan.errors + plan.warnings)
             )
+            return
+            
+        message = "Deseja renomear os arquivos?"
+        if plan.warnings:
+            message += "\n" + self.format_problems(plan.warnings)
             
         # Pede confirmação
         reply = QMessageBox.question(
             self, 
             "Confirmar Renomeação", 
-            "Deseja renomear os arquivos?",
+            message,
             QMessageBox.Yes | QMessageBox.No, 
             QMessageBox.No
         )
@@ -353,55 +510,185 @@ class BatchRenamer(QMainWindow):
         if reply == QMessageBox.No:
             return
             
+        self.start_rename_worker(plan)
+        
+    def update_match_mode(self, index):
+        """Habilita a escolha de colunas só nos modos por chave"""
+        keyed = index > 0
+        self.key_column_spinbox.setEnabled(keyed)
+        self.new_name_column_spinbox.setEnabled(keyed)
+        
+    def build_rename_plan(self):
+        """Monta o plano de renomeação conforme o modo de correspondência escolhido"""
+        match_mode = self.match_mode_combo.currentIndex()
+        if match_mode == 0:
+            return self.rename_planner.build_positional_plan(
+                self.file_manager.folder_path,
+                self.file_manager.folder_files,
+                self.csv_manager.csv_data,
+                self.file_manager.existing_names
+            )
+        
+        # O índice do CSV é montado uma vez e cada arquivo é procurado nele pela chave
+        mapping, duplicates, incomplete_rows = self.csv_manager.load_mapping(
+            self.key_column_spinbox.value() - 1,
+            self.new_name_column_spinbox.value() - 1
+        )
+        return self.rename_planner.build_keyed_plan(
+            self.file_manager.folder_path,
+            self.file_manager.folder_files,
+            mapping,
+            match_stem=match_mode == 2,
+            existing_names=self.file_manager.existing_names,
+            duplicates=duplicates,
+            incomplete_rows=incomplete_rows
+        )
+        
+    def format_problems(self, problems, limit=10):
+        """Formata uma lista de problemas limitando a quantidade exibida"""
+        text = ""
+        for i, problem in enumerate(problems[:limit], 1):
+            text += f"\n{i}. {problem}"
+        if len(problems) > limit:
+            text += f"\n... e mais {len(problems) - limit} problemas não exibidos."
+        return text
+        
+    def start_rename_worker(self, plan):
+        """Executa o plano de renomeação em uma thread de trabalho"""
+        worker = RenameWorker(self.file_manager, plan, self.rename_wal)
+        self.start_worker(worker, "Renomeando arquivos...", "Renomeando", plan.count_steps(), self.handle_rename_finished)
+        
+    def start_worker(self, worker, label_text, title, total, finished_handler):
+        """Executa um worker de renomeação em uma thread com diálogo de progresso"""
+        self.rename_thread = QThread(self)
+        self.rename_worker = worker
+        self.rename_worker.moveToThread(self.rename_thread)
+        
+        # Diálogo de progresso com cancelamento
+        self.progress_dialog = QProgressDialog(label_text, "Cancelar", 0, total, self)
+        self.progress_dialog.setWindowTitle(title)
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+        self.progress_dialog.setMinimumDuration(0)
+        # O worker está ocupado no loop, então o cancelamento precisa ser chamado diretamente
+        self.progress_dialog.canceled.connect(self.rename_worker.cancel, Qt.DirectConnection)
+        
+        self.rename_thread.started.connect(self.rename_worker.run)
+        self.rename_worker.progress.connect(self.handle_rename_progress)
+        self.rename_worker.finished.connect(finished_handler)
+        self.rename_worker.finished.connect(self.rename_thread.quit)
+        self.rename_thread.finished.connect(self.rename_worker.deleteLater)
+        self.rename_thread.finished.connect(self.rename_thread.deleteLater)
+        
+        self.rename_button.setEnabled(False)
+        self.undo_button.setEnabled(False)
+        # As renomeações do próprio lote não devem ser sincronizadas no meio do caminho
+        self.folder_watcher.pause()
+        self.rename_thread.start()
+        
+    def finish_worker(self):
+        """Libera o worker e reabilita a interface ao fim de um lote"""
+        self.progress_dialog.close()
+        self.progress_dialog = None
+        self.rename_worker = None
+        self.rename_thread = None
+        self.rename_button.setEnabled(True)
+        self.undo_button.setEnabled(True)
+        self.folder_watcher.resume()
+        
+    def handle_rename_progress(self, processed, total, rate, eta):
+        """Atualiza o diálogo de progresso da renomeação"""
+        if not self.progress_dialog:
+            return
+        self.progress_dialog.setMaximum(total)
+        self.progress_dialog.setValue(processed)
+        self.progress_dialog.setLabelText(
+            f"Renomeando {processed} de {total} arquivos\n"
+            f"{rate:.0f} arquivos/s - tempo restante: {int(eta)} s"
+        )
+        
+    def handle_rename_finished(self, result):
+        """Finaliza o lote de renomeação"""
+        self.finish_worker()
+        
         try:
-            # Prepara operações de renomeação
-            operations = []
-            successful_renames = 0
-            failed_renames = 0
-            error_details = []
-            
-            # Processa até o número de entradas CSV
-            for i, file_name in enumerate(self.file_manager.folder_files):
-                if i >= len(self.csv_manager.csv_data):
-                    break
-                    
-                old_name = file_name
-                new_name = f"{self.csv_manager.csv_data[i]}{os.path.splitext(file_name)[1]}"
-                
-                try:
-                    if self.file_manager.rename_file(old_name, new_name):
-                        operations.append({
-                            "original_name": old_name,
-                            "new_name": new_name
-                        })
-                        successful_renames += 1
-                except Exception as e:
-                    failed_renames += 1
-                    error_details.append(f"Erro ao renomear '{old_name}' para '{new_name}': {str(e)}")
-                    
+            operations = result["operations"]
+            error_details = result["errors"]
+            
             # Salva o histórico se houver renomeações bem-sucedidas
-            if successful_renames > 0:
+            if operations:
                 self.history_manager.add_operation(self.file_manager.folder_path, operations)
+            # Com o histórico gravado o lote está encerrado e o log pode ser descartado
+            self.rename_wal.commit()
                 
-            # Atualiza a lista de arquivos
+            # Atualiza a lista de arquivos uma única vez ao final do lote
             self.files_table.set_files(self.file_manager.folder_files)
             
             # Mostra resultado
-            result_message = f"Renomeação concluída.\nArquivos renomeados com sucesso: {successful_renames}\nFalhas: {failed_renames}"
+            result_message = f"Renomeação concluída.\nArquivos renomeados com sucesso: {len(operations)}\nFalhas: {len(error_details)}"
+            
+            if result["cancelled"]:
+                result_message += f"\nRenomeação cancelada após {result['processed']} de {result['total']} arquivos."
             
             if error_details:
                 result_message += "\n\nDetalhes das falhas:"
-                for i, error in enumerate(error_details, 1):
-                    if i <= 10:  # Limita a 10 erros
-                        result_message += f"\n{i}. {error}"
-                    if len(error_details) > 10:
-                        result_message += f"\n... e mais {len(error_details) - 10} erros não exibidos."
-                        
+                for i, error in enumerate(error_details[:10], 1):  # Limita a 10 erros
+                    result_message += f"\n{i}. {error}"
+                if len(error_details) > 10:
+                    result_message += f"\n... e mais {len(error_details) - 10} erros não exibidos."
+                    
             QMessageBox.information(self, "Concluído", result_message)
             
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro durante a renomeação: {str(e)}")
             
+    def check_interrupted_batch(self):
+        """Oferece concluir ou reverter um lote de renomeação interrompido"""
+        batch = self.rename_wal.load_pending()
+        if batch is None:
+            return
+        if not batch["steps"]:
+            self.rename_wal.commit()
+            return
+            
+        folder_path = batch["folder_path"]
+        message_box = QMessageBox(self)
+        message_box.setIcon(QMessageBox.Warning)
+        message_box.setWindowTitle("Renomeação Interrompida")
+        message_box.setText(
+            f"Um lote de renomeação em:\n{folder_path}\nfoi interrompido antes de terminar "
+            f"({len(batch['done'])} de {len(batch['steps'])} passos registrados).\n\n"
+            "Deseja concluir o lote ou reverter os arquivos já renomeados?"
+        )
+        roll_forward_button = message_box.addButton("Concluir", QMessageBox.AcceptRole)
+        rollback_button = message_box.addButton("Reverter", QMessageBox.DestructiveRole)
+        message_box.addButton("Decidir Depois", QMessageBox.RejectRole)
+        message_box.exec_()
+        clicked_button = message_box.clickedButton()
+        
+        try:
+            if clicked_button == roll_forward_button:
+                operations, errors = self.rename_wal.roll_forward(batch)
+                if operations:
+                    self.history_manager.add_operation(folder_path, operations)
+                result_message = f"Lote concluído.\nArquivos renomeados: {len(operations)}\nFalhas: {len(errors)}"
+            elif clicked_button == rollback_button:
+                restored, errors = self.rename_wal.rollback(batch)
+                result_message = f"Lote revertido.\nRenomeações desfeitas: {restored}\nFalhas: {len(errors)}"
+            else:
+                return
+            self.rename_wal.commit()
+            
+            if errors:
+                result_message += "\n\nDetalhes das falhas:" + self.format_problems(errors)
+            QMessageBox.information(self, "Concluído", result_message)
+            
+            if self.file_manager.folder_path == folder_path:
+                self.reload_files()
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao recuperar lote interrompido: {str(e)}")
+            
     def undo_rename(self):
         """Desfaz a última operação de renomeação"""
         last_operation = self.history_manager.get_last_operation()
@@ -427,76 +714,187 @@ class BatchRenamer(QMainWindow):
         if reply == QMessageBox.No:
             return
             
+        # O desfazer atua na pasta do histórico, que pode não ser a pasta aberta
+        if self.file_manager.folder_path == folder_path:
+            file_manager = self.file_manager
+        else:
+            file_manager = FileManager()
+            file_manager.folder_path = folder_path
+            file_manager.add_change_listener(self.preview_manager.invalidate)
+        self.undo_folder_path = folder_path
+        
+        operations = last_operation["operations"]
+        worker = UndoWorker(file_manager, operations)
+        self.start_worker(worker, "Desfazendo renomeação...", "Desfazendo", len(operations), self.handle_undo_finished)
+        
+    def handle_undo_finished(self, result):
+        """Finaliza o desfazer da última operação"""
+        self.finish_worker()
+        
         try:
-            successful_undos = 0
-            failed_undos = 0
-            error_details = []
+            successful_undos = result["restored"]
+            error_details = result["errors"]
+            skipped = result["skipped"]
             
-            for op in last_operation["operations"]:
-                original_name = op["original_name"]
-                new_name = op["new_name"]
-                
-                try:
-                    if self.file_manager.rename_file(new_name, original_name):
-                        successful_undos += 1
-                except Exception as e:
-                    failed_undos += 1
-                    error_details.append(f"Erro ao desfazer renomeação de '{new_name}' para '{original_name}': {str(e)}")
-                    
-            # Remove a operação do histórico se pelo menos um desfazer foi bem-sucedido
+            # Só sai do histórico o que foi restaurado; o resto pode ser desfeito depois
             if successful_undos > 0:
-                self.history_manager.remove_last_operation()
+                if result["remaining"]:
+                    self.history_manager.replace_last_operation(result["remaining"])
+                else:
+                    self.history_manager.remove_last_operation()
                 
                 # Atualiza a lista de arquivos se estiver na mesma pasta
-                if self.file_manager.folder_path == folder_path:
+                if self.file_manager.folder_path == self.undo_folder_path:
                     self.files_table.set_files(self.file_manager.folder_files)
                     
             # Mostra resultado
-            result_message = f"Desfazer concluído.\nArquivos restaurados com sucesso: {successful_undos}\nFalhas: {failed_undos}"
+            result_message = (
+                f"Desfazer concluído.\nArquivos restaurados com sucesso: {successful_undos}"
+                f"\nIgnorados: {len(skipped)}\nFalhas: {len(error_details)}"
+            )
             
+            if result["cancelled"]:
+                result_message += f"\nDesfazer cancelado após {result['processed']} de {result['total']} arquivos."
+            
+            if skipped:
+                result_message += "\n\nArquivos ignorados:" + self.format_problems(skipped)
             if error_details:
-                result_message += "\n\nDetalhes das falhas:"
-                for i, error in enumerate(error_details, 1):
-                    if i <= 10:
-                        result_message += f"\n{i}. {error}"
-                    if len(error_details) > 10:
-                        result_message += f"\n... e mais {len(error_details) - 10} erros não exibidos."
+                result_message += "\n\nDetalhes das falhas:" + self.format_problems(error_details)
                         
             QMessageBox.information(self, "Concluído", result_message)
             
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao desfazer renomeação: {str(e)}")
             
+    def compact_history(self):
+        """Remove do diário de histórico as operações já desfeitas"""
+        self.history_manager.compact()
+        QMessageBox.information(
+            self,
+            "Concluído",
+            f"Histórico compactado.\nOperações mantidas: {self.history_manager.get_operation_count()}"
+        )
+            
     def filter_csv(self, text):
         """Filtra os dados do CSV"""
-        filtered_data = self.csv_manager.filter_data(text)
-        self.csv_table.set_data(filtered_data)
+        self.csv_search_timer.stop()
+        # A tabela recebe as posições que passam pela busca, não uma nova lista de nomes
+        rows = None
+        if self.fuzzy_search_checkbox.isChecked():
+            # Enquanto o índice aproximado é montado, vale a busca por trecho
+            rows = self.csv_manager.fuzzy_search(text)
+        if rows is None:
+            rows = self.csv_search_index.search(text)
+        self.csv_visible_rows = rows
+        self.csv_table.set_data(self.csv_manager.csv_data, self.csv_visible_rows)
         
     def filter_files(self, text):
         """Filtra os arquivos"""
-        filtered_files = [f for f in self.file_manager.folder_files if text.lower() in f.lower()]
-        self.files_table.set_files(filtered_files)
+        self.files_search_timer.stop()
+        fuzzy_search = None
+        if self.fuzzy_search_checkbox.isChecked():
+            fuzzy_search = self.file_manager.name_index.search
+        self.files_table.filter_files(text, fuzzy_search)
+        
+    def update_files_view(self, checked):
+        """Mostra a grade de miniaturas ou a tabela de nomes"""
+        view = self.thumbnail_grid if checked else self.files_table
+        self.files_stack.setCurrentWidget(view)
+        # A linha atual continua visível ao trocar de visão
+        if self.files_table.currentIndex().isValid():
+            view.scrollTo(self.files_table.currentIndex())
+        
+    def update_search_mode(self, checked):
+        """Reaplica as buscas ao ligar ou desligar a busca aproximada"""
+        # Os índices só existem com a busca ligada; a montagem é em segundo plano e, até
+        # terminar, vale a busca por trecho
+        self.csv_manager.set_fuzzy_search(checked)
+        self.file_manager.set_fuzzy_search(checked)
+        self.filter_csv(self.csv_search_field.text())
+        self.filter_files(self.files_search_field.text())
+        
+    def csv_source_row(self, row_index):
+        """Converte a linha exibida na tabela para a linha correspondente do CSV"""
+        if self.csv_visible_rows is None:
+            return row_index
+        return self.csv_visible_rows[row_index]
         
     def handle_csv_row_removed(self, row_index):
         """Lida com remoção de linha do CSV"""
-        if self.csv_manager.remove_row(row_index):
-            self.csv_manager.update_csv_file()
+        source_row = self.csv_source_row(row_index)
+        if self.csv_manager.remove_row(source_row):
+            self.csv_search_index.remove(source_row)
+            if self.csv_visible_rows is not None:
+                self.csv_visible_rows.pop(row_index)
+                # As linhas depois da removida sobem uma posição no CSV; a lista é
+                # alterada no lugar porque a tabela exibe por meio dela
+                self.csv_visible_rows[:] = [i - 1 if i > source_row else i for i in self.csv_visible_rows]
+            self.schedule_csv_save()
             
     def handle_csv_row_moved(self, current_index, new_index):
         """Lida com movimento de linha do CSV"""
-        if self.csv_manager.move_row(current_index, new_index):
-            self.csv_manager.update_csv_file()
+        # As setas trocam linhas vizinhas da tabela, que podem não ser vizinhas no CSV filtrado
+        first_row, second_row = self.csv_source_row(current_index), self.csv_source_row(new_index)
+        if self.csv_manager.swap_rows(first_row, second_row):
+            self.csv_search_index.swap(first_row, second_row)
+            self.schedule_csv_save()
             
-    def handle_csv_data_changed(self):
-        """Lida com mudança nos dados do CSV"""
-        self.csv_manager.csv_data = self.csv_table.get_data()
-        self.csv_manager.update_csv_file()
+    def handle_csv_row_edited(self, row_index, name):
+        """Lida com a edição de um nome do CSV"""
+        source_row = self.csv_source_row(row_index)
+        if self.csv_manager.set_row(source_row, name):
+            self.csv_search_index.update(source_row, name)
+            self.schedule_csv_save()
+            
+    def schedule_csv_save(self):
+        """Agenda a gravação do CSV, reiniciando a espera a cada nova alteração"""
+        self.csv_save_timer.start()
+        
+    def flush_csv_changes(self):
+        """Grava imediatamente as alterações pendentes do CSV"""
+        self.csv_save_timer.stop()
+        try:
+            self.csv_manager.save_if_dirty()
+            return True
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", str(e))
+            return False
         
     def handle_file_selected(self, file_name):
         """Lida com seleção de arquivo"""
         file_path = os.path.join(self.file_manager.folder_path, file_name)
-        self.preview_manager.set_current_file(file_path)
-        preview_data, message = self.preview_manager.get_preview()
+        # A visualização é gerada em segundo plano; enquanto isso o painel avisa
+        # que está carregando (a não ser que ela já esteja no cache)
+        self.preview_panel.clear_preview()
+        self.preview_panel.content_label.setText("Carregando visualização...")
+        self.preview_manager.request_preview(file_path)
+        # A seleção normalmente vem da linha atual, sem precisar procurar o arquivo
+        row = self.files_table.currentRow()
+        if row < 0 or self.files_table.file_at(row) != file_name:
+            row = self.files_table.find_row(file_name)
+        self.prefetch_neighbors(row)
+        
+    def prefetch_neighbors(self, row):
+        """Antecipa as visualizações dos vizinhos, mais na direção em que o usuário anda"""
+        if row < 0:
+            return
+        step = -1 if row < self.last_preview_row else 1
+        self.last_preview_row = row
+        rows = [row + step * distance for distance in range(1, self.prefetch_count + 1)]
+        rows.append(row - step)
+        folder_path = self.file_manager.folder_path
+        self.preview_manager.prefetch([
+            os.path.join(folder_path, self.files_table.file_at(neighbor))
+            for neighbor in rows if 0 <= neighbor < self.files_table.rowCount()
+        ])
+        
+    def handle_preview_ready(self, generation, file_path, preview_data, message):
+        """Exibe a visualização gerada, se ainda for a do arquivo selecionado"""
+        if generation != self.preview_manager.generation:
+            return
+        if isinstance(preview_data, QImage):
+            # QPixmap só pode ser criado na thread da interface
+            preview_data = QPixmap.fromImage(preview_data)
         if preview_data:
             self.preview_panel.set_preview(preview_data, file_path)
             if message:
@@ -510,7 +908,7 @@ class BatchRenamer(QMainWindow):
         """Lida com renomeação de arquivo"""
         try:
             if self.file_manager.rename_file(old_name, new_name):
-                self.files_table.set_files(self.file_manager.folder_files)
+                self.files_table.update_file(old_name, new_name)
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao renomear arquivo: {str(e)}")
             
@@ -518,11 +916,20 @@ class BatchRenamer(QMainWindow):
         """Lida com deleção de arquivo"""
         try:
             if self.file_manager.delete_file(file_name):
-                self.files_table.set_files(self.file_manager.folder_files)
+                self.files_table.remove_files([file_name])
+                self.preview_manager.cancel_pending()
                 self.preview_panel.clear_preview()
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao deletar arquivo: {str(e)}")
             
+    def handle_folder_changed(self, added, removed):
+        """Aplica à tabela as mudanças detectadas na pasta"""
+        # A tabela mantém o filtro ativo ao acrescentar ou remover arquivos
+        if removed:
+            self.files_table.remove_files(removed)
+        if added:
+            self.files_table.add_files(added)
+            
     def handle_file_located(self, file_name):
         """Lida com localização de arquivo no Explorer"""
         try:
@@ -548,6 +955,20 @@ class BatchRenamer(QMainWindow):
             "Contato: seu.email@example.com"
         )
         
+    def closeEvent(self, event):
+        """Grava o CSV e cancela a renomeação e as visualizações em andamento antes de fechar a janela"""
+        self.flush_csv_changes()
+        if self.rename_thread is not None:
+            self.rename_worker.cancel()
+            self.rename_thread.quit()
+            self.rename_thread.wait()
+        # Visualizações pendentes são descartadas; as já iniciadas terminam antes de sair
+        self.preview_manager.cancel_pending()
+        self.preview_manager.thread_pool.waitForDone()
+        self.preview_manager.prefetch_pool.waitForDone()
+        self.thumbnail_grid.wait_for_tasks()
+        super().closeEvent(event)
+
     def update_ui_text(self):
         # Atualiza os textos da barra de menus
         self.file_menu.setTitle(self.language_manager.get_text("file_menu"))
@@ -556,6 +977,7 @@ class BatchRenamer(QMainWindow):
         # Atualiza os textos das ações do menu Arquivo
         self.open_csv_action.setText(self.language_manager.get_text("open_csv"))
         self.open_folder_action.setText(self.language_manager.get_text("open_folder"))
+        self.compact_history_action.setText(self.language_manager.get_text("compact_history"))
         self.language_menu.setTitle(self.language_manager.get_text("language_menu"))
         self.english_action.setText(self.language_manager.get_text("english"))
         self.portuguese_action.setText(self.language_manager.get_text("portuguese"))
@@ -569,6 +991,15 @@ class BatchRenamer(QMainWindow):
         self.csv_button.setText(self.language_manager.get_text("open_csv"))
         self.folder_button.setText(self.language_manager.get_text("open_folder"))
         self.reload_button.setText(self.language_manager.get_text("reload_files"))
+        self.recursive_checkbox.setText(self.language_manager.get_text("include_subfolders"))
+        self.max_depth_label.setText(self.language_manager.get_text("max_depth"))
+        self.fuzzy_search_checkbox.setText(self.language_manager.get_text("fuzzy_search"))
+        self.thumbnail_view_checkbox.setText(self.language_manager.get_text("thumbnail_view"))
+        self.match_mode_label.setText(self.language_manager.get_text("match_mode"))
+        for index, key in enumerate(("match_by_position", "match_by_name", "match_by_key")):
+            self.match_mode_combo.setItemText(index, self.language_manager.get_text(key))
+        self.key_column_label.setText(self.language_manager.get_text("key_column"))
+        self.new_name_column_label.setText(self.language_manager.get_text("new_name_column"))
         self.rename_button.setText(self.language_manager.get_text("rename_files"))
         self.undo_button.setText(self.language_manager.get_text("undo_rename"))
         